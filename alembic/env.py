@@ -3,6 +3,7 @@ from logging.config import fileConfig
 from sqlalchemy import engine_from_config, pool
 
 from alembic import context
+from shotgrid_orm.migrations import configure_context, sgorm_from_config
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -13,11 +14,11 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
-# add your model's MetaData object here
-# for 'autogenerate' support
-# from myapp import mymodel
-# target_metadata = mymodel.Base.metadata
-target_metadata = None
+# the SGORM model of the SG schema named by sg_schema_file in alembic.ini (or
+# $SG_SCHEMA_FILE); pass the model options the database was built with, e.g.
+# sgorm_from_config(config, link_tables=True, index_policy=True)
+sg_orm = sgorm_from_config(config)
+target_metadata = sg_orm.Base.metadata
 
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
@@ -38,9 +39,10 @@ def run_migrations_offline() -> None:
 
     """
     url = config.get_main_option("sqlalchemy.url")
-    context.configure(
+    configure_context(
+        context,
+        target_metadata,
         url=url,
-        target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -63,7 +65,7 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        configure_context(context, target_metadata, connection=connection)
 
         with context.begin_transaction():
             context.run_migrations()
@@ -0,0 +1,58 @@
+"""Benchmark: create_script with the native ScriptGenerator vs. sqlacodegen.
+
+Usage:
+    python benchmarks/bench_codegen.py [--entities 300] [--fields 60]
+"""
+
+import argparse
+import functools
+import json
+import os
+import tempfile
+import time
+
+from sqlacodegen_v2 import generators
+from synthetic_schema import make_schema
+
+from shotgrid_orm import SGORM, SchemaType, ScriptGenerator
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entities", type=int, default=300)
+    parser.add_argument("--fields", type=int, default=60)
+    args = parser.parse_args()
+
+    schema_text = json.dumps(make_schema(args.entities, args.fields))
+    print(f"schema: {args.entities} entities x {args.fields} fields")
+    orm = SGORM(SchemaType.JSON_TEXT, schema_text, echo=False)
+
+    with tempfile.TemporaryDirectory() as out_dir:
+
+        def write(generator_class, name):
+            path = os.path.join(out_dir, name)
+            orm.create_script(path, generator_class=generator_class)
+            return path
+
+        runs = []
+        for label, generator_class in (("sqlacodegen", generators.DeclarativeGenerator), ("native", ScriptGenerator)):
+            path, seconds = timed(functools.partial(write, generator_class, f"{label}.py"))
+            runs.append((label, seconds, os.path.getsize(path)))
+        _, again = timed(lambda: write(ScriptGenerator, "native_again.py"))
+        with open(os.path.join(out_dir, "native.py")) as a, open(os.path.join(out_dir, "native_again.py")) as b:
+            identical = a.read() == b.read()
+
+    print(f"{'':12}{'time':>10}{'size':>12}")
+    for label, seconds, size in runs:
+        print(f"{label:12}{seconds:9.3f}s{size:>12,}")
+    print(f"native is {runs[0][1] / runs[1][1]:.1f}x faster; rerun {again:.3f}s, identical output: {identical}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Benchmark: importing one entity from the per-entity package vs. the single sgmodel.py.
+
+Each import runs in a fresh interpreter; peak memory is the traced allocations
+of the import.
+
+Usage:
+    python benchmarks/bench_package_import.py [--entities 300] [--fields 60] [--hubs 10] [--entity CustomEntity100]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+
+from synthetic_schema import make_schema
+
+from shotgrid_orm import SGORM, SchemaType
+
+IMPORT_PROBE = """
+import json, sys, time, tracemalloc
+sys.path.insert(0, sys.argv[1])
+tracemalloc.start()
+start = time.perf_counter()
+import sgmodel
+cls = sgmodel.CLASSES[sys.argv[2]]
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "peak": tracemalloc.get_traced_memory()[1], "tables": len(cls.metadata.tables)}))
+"""
+
+
+def probe(path, entity):
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE, path, entity], check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entities", type=int, default=300)
+    parser.add_argument("--fields", type=int, default=60)
+    parser.add_argument("--hubs", type=int, default=10, help="entity types single-type links point to (0: any)")
+    parser.add_argument("--entity", default="CustomEntity100")
+    args = parser.parse_args()
+
+    print(f"schema: {args.entities} entities x {args.fields} fields, {args.hubs} hubs, importing {args.entity}")
+    schema = make_schema(args.entities, args.fields, hubs=args.hubs)
+    orm = SGORM(SchemaType.JSON_TEXT, json.dumps(schema), echo=False)
+
+    with tempfile.TemporaryDirectory() as script_dir, tempfile.TemporaryDirectory() as package_dir:
+        orm.create_script(f"{script_dir}/sgmodel.py")
+        orm.create_package(f"{package_dir}/sgmodel")
+        runs = [("sgmodel.py", probe(script_dir, args.entity)), ("package", probe(package_dir, args.entity))]
+
+    print(f"{'':12}{'import':>10}{'peak MB':>10}{'tables':>8}")
+    for label, run in runs:
+        print(f"{label:12}{run['seconds']:9.3f}s{run['peak'] / 2**20:10.1f}{run['tables']:8}")
+    print(f"package import is {runs[0][1]['seconds'] / runs[1][1]['seconds']:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
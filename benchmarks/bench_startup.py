@@ -0,0 +1,44 @@
+"""Benchmark: SGORM startup building every class up front vs. lazily.
+
+Usage:
+    python benchmarks/bench_startup.py [--entities 300] [--fields 60] [--hubs 10] [--entity CustomEntity100]
+"""
+
+import argparse
+import json
+import time
+
+from synthetic_schema import make_schema
+
+from shotgrid_orm import SGORM, SchemaType
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entities", type=int, default=300)
+    parser.add_argument("--fields", type=int, default=60)
+    parser.add_argument("--hubs", type=int, default=10, help="entity types single-type links point to (0: any)")
+    parser.add_argument("--entity", default="CustomEntity100")
+    args = parser.parse_args()
+
+    schema_text = json.dumps(make_schema(args.entities, args.fields, hubs=args.hubs))
+    print(f"schema: {args.entities} entities x {args.fields} fields, {args.hubs} hubs")
+
+    # total SGORM() time is what a process pays at startup; lazy pays per class on first access
+    eager, eager_time = timed(lambda: SGORM(SchemaType.JSON_TEXT, schema_text, echo=False))
+    lazy, lazy_time = timed(lambda: SGORM(SchemaType.JSON_TEXT, schema_text, echo=False, lazy=True))
+    _, access_time = timed(lambda: lazy[args.entity])
+
+    print(f"{'':8}{'SGORM()':>10}{'+ ' + args.entity:>24}{'tables':>8}")
+    print(f"{'eager':8}{eager_time:9.3f}s{eager_time:23.3f}s{len(eager.Base.metadata.tables):8}")
+    print(f"{'lazy':8}{lazy_time:9.3f}s{lazy_time + access_time:23.3f}s{len(lazy.Base.metadata.tables):8}")
+
+
+if __name__ == "__main__":
+    main()
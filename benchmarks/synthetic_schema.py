@@ -0,0 +1,84 @@
+"""Synthetic SG schema generator for benchmarks.
+
+Builds a schema shaped like a large production site: many entity types, each
+with a mix of scalar fields, single- and multi-type entity links and
+multi_entity fields.
+"""
+
+import json
+import random
+
+FIELD_TYPES = [
+    "text",
+    "number",
+    "float",
+    "checkbox",
+    "date",
+    "date_time",
+    "list",
+    "status_list",
+    "serializable",
+    "url",
+    "duration",
+    "timecode",
+    "percent",
+    "tag_list",
+]
+
+
+def field_def(entity_type, name, data_type, valid_types=None, valid_values=None):
+    properties = {"default_value": {"value": None}}
+    if valid_types is not None:
+        properties["valid_types"] = {"value": valid_types}
+    if valid_values is not None:
+        properties["valid_values"] = {"value": valid_values}
+    return {
+        "data_type": {"value": data_type},
+        "editable": name != "id",
+        "entity_type": {"value": entity_type},
+        "mandatory": {"value": False},
+        "name": {"value": name},
+        "properties": properties,
+        "unique": False,
+        "visible": {"value": True},
+    }
+
+
+def make_schema(entities=300, fields=60, seed=0, hubs=None):
+    """Return a SG schema dict with `entities` entity types of `fields` fields each.
+
+    With hubs, single-type entity fields only link to the first `hubs` entity
+    types, the way production links mostly go to a few hubs (Project,
+    HumanUser, Step); otherwise to any entity type.
+    """
+    rng = random.Random(seed)
+    names = ["Project"] + [f"CustomEntity{i:03d}" for i in range(1, entities)]
+    link_targets = names[:hubs] if hubs else names
+    schema = {}
+    for name in names:
+        entity_fields = {
+            "id": field_def(name, "id", "number"),
+            "code": field_def(name, "code", "text"),
+            "project": field_def(name, "project", "entity", ["Project"]),
+            "created_at": field_def(name, "created_at", "date_time"),
+            "updated_at": field_def(name, "updated_at", "date_time"),
+        }
+        for i in range(fields - len(entity_fields)):
+            kind = rng.random()
+            field_name = f"sg_field_{i:03d}"
+            if kind < 0.1:
+                entity_fields[field_name] = field_def(name, field_name, "entity", [rng.choice(link_targets)])
+            elif kind < 0.15:
+                entity_fields[field_name] = field_def(name, field_name, "entity", rng.sample(names, 3))
+            elif kind < 0.2:
+                entity_fields[field_name] = field_def(name, field_name, "multi_entity", rng.sample(names, 2))
+            else:
+                data_type = rng.choice(FIELD_TYPES)
+                valid_values = ["wtg", "ip", "fin"] if data_type in ("list", "status_list") else None
+                entity_fields[field_name] = field_def(name, field_name, data_type, valid_values=valid_values)
+        schema[name] = {"name": {"value": name}, "visible": {"value": True}, "fields": entity_fields}
+    return schema
+
+
+if __name__ == "__main__":
+    print(json.dumps(make_schema(), indent=1))
@@ -1 +1,18 @@
+from .cache import *
 from .classes import *
+from .codegen import *
+from .connection import *
+from .control import *
+from .events import *
+from .extract import *
+from .indexes import *
+from .lists import *
+from .loader import *
+from .migrations import *
+from .query import *
+from .readthrough import *
+from .retirement import *
+from .schema_diff import *
+from .shard import *
+from .sync import *
+from .writeback import *
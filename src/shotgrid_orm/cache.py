@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+__all__ = [
+    "DEFAULT_CACHE_DIR",
+    "DEFAULT_SCHEMA_TTL",
+    "SCHEMA_EVENT_PREFIX",
+    "SchemaCache",
+    "probe_schema",
+    "schema_fingerprint",
+]
+
+DEFAULT_CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "shotgrid_orm")
+DEFAULT_SCHEMA_TTL = 3600  # seconds
+
+# EventLogEntry types written by SG when a field is created, changed, retired or revived.
+SCHEMA_EVENT_PREFIX = "Shotgun_DisplayColumn_"
+
+
+def schema_fingerprint(sg_schema):
+    """Content hash of a SG schema; identical schemas always fingerprint the same."""
+    text = json.dumps(sg_schema, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def probe_schema(sg):
+    """Cheap change token for the schema of a live site, or None if it can't be probed.
+
+    Combines the entity list (one schema_entity_read call) with the id of the
+    latest field-level schema event, so both entity and field changes move it.
+    """
+    try:
+        entities = sg.schema_entity_read()
+        event = sg.find_one(
+            "EventLogEntry",
+            [["event_type", "starts_with", SCHEMA_EVENT_PREFIX]],
+            ["id"],
+            order=[{"field_name": "id", "direction": "desc"}],
+        )
+    except Exception:
+        return None
+    event_id = event["id"] if event else 0
+    return f"{schema_fingerprint(entities)[:16]}:{event_id}"
+
+
+class SchemaCache:
+    """On-disk cache of SG schemas, one JSON file per site URL.
+
+    Each entry stores the schema, its fingerprint, a change-probe token and the
+    time it was last validated. An entry is fresh for ttl seconds; after that it
+    is revalidated with the (cheap) probe and only refetched if the probe moved.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl=DEFAULT_SCHEMA_TTL, probe=probe_schema):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.probe = probe
+
+    def path(self, site_url):
+        key = hashlib.sha256(site_url.rstrip("/").lower().encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.cache_dir, f"schema-{key}.json")
+
+    def load(self, site_url):
+        try:
+            with open(self.path(site_url)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or "sg_schema" not in entry:
+            return None
+        return entry
+
+    def save(self, site_url, sg_schema, probe=None, fingerprint=None):
+        entry = {
+            "site_url": site_url,
+            "fingerprint": fingerprint or schema_fingerprint(sg_schema),
+            "probe": probe,
+            "validated_at": time.time(),
+            "sg_schema": sg_schema,
+        }
+        self._write(site_url, entry)
+        return entry
+
+    def touch(self, site_url, entry):
+        entry["validated_at"] = time.time()
+        self._write(site_url, entry)
+        return entry
+
+    def is_fresh(self, entry):
+        if self.ttl is None:
+            return True
+        return time.time() - entry.get("validated_at", 0) < self.ttl
+
+    def invalidate(self, site_url):
+        try:
+            os.remove(self.path(site_url))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.startswith("schema-") and name.endswith(".json"):
+                os.remove(os.path.join(self.cache_dir, name))
+
+    def _write(self, site_url, entry):
+        # write-then-rename so concurrent workers never read a partial file
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(entry, f, default=str)
+            os.replace(tmp_path, self.path(site_url))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
@@ -3,11 +3,12 @@ import functools
 import json
 import os
 import traceback
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from typing import List, Optional
 
 import sqlalchemy as sa
-from sqlacodegen_v2 import generators
 from sqlalchemy import create_engine
 from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column
 
@@ -20,6 +21,57 @@ except ImportError:
     pass
 
 from . import sgtypes
+from .cache import SchemaCache, schema_fingerprint
+from .codegen import PackageGenerator, ScriptGenerator
+from .connection import DEFAULT_BACKOFF, DEFAULT_RETRIES, ThreadLocalConnections, call_with_retry
+from .events import (
+    DEFAULT_CURSOR_NAME,
+    DEFAULT_EVENT_PAGE_SIZE,
+    DEFAULT_GAP_TIMEOUT,
+    DEFAULT_MAX_GAPS,
+    DEFAULT_REFETCH_SIZE,
+    EventTailer,
+)
+from .extract import DEFAULT_EXTRACT_WORKERS, ExtractJob, Extractor
+from .indexes import IndexPolicy, index_name
+from .lists import LIST_TYPES, ListEncoder, list_fields, list_value_table, seed_rows
+from .loader import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_PAGE_SIZE,
+    DEFAULT_UPSERT_BATCH_SIZE,
+    RETIRED_COLUMN,
+    insert_rows,
+    instance_row,
+    load_entity,
+    sg_field_map,
+    upsert_rows,
+)
+from .query import LocalQuery
+from .readthrough import DEFAULT_CLAIM_TIMEOUT, DEFAULT_MAX_AGE, ReadThrough
+from .relationships import DEFAULT_RELATIONSHIP_LAZY, entity_links, entity_relationship, polymorphic_accessor
+from .retirement import reconcile_ids, sync_retirements
+from .schema_diff import SchemaMigration, diff_schemas
+from .shard import DEFAULT_SHARD_PROCESSES, ShardedLoader
+from .sync import sync_entity
+from .writeback import DEFAULT_WRITE_BATCH_SIZE, WriteBack
+
+__all__ = [
+    "SchemaType",
+    "SGORM",
+    "LazyClassMap",
+    "TABLE_IGNORE_LIST",
+    "FIELD_IGNORE_LIST",
+    "SQLITE_MEMORY_SQA_URL",
+    "DEFAULT_SCHEMA_TYPE",
+    "DEFAULT_SCHEMA_FILE",
+    "DEFAULT_SQA_URL",
+    "DEFAULT_OUT_SCRIPT",
+    "DEFAULT_OUT_PACKAGE",
+    "DEFAULT_SCHEMA_WORKERS",
+    "DEFAULT_GENERATOR_CLASS",
+    "has_sg",
+    "sg_connect",
+]
 
 
 class SchemaType(Enum):
@@ -39,8 +91,12 @@ DEFAULT_SCHEMA_TYPE = SchemaType.JSON_FILE
 DEFAULT_SCHEMA_FILE = "schema.json"
 DEFAULT_SQA_URL = "sqlite+pysqlite:///:memory:"
 DEFAULT_OUT_SCRIPT = "sgmodel.py"
+DEFAULT_OUT_PACKAGE = "sgmodel"
+DEFAULT_SCHEMA_WORKERS = 4
 
-DEFAULT_GENERATOR_CLASS = generators.DeclarativeGenerator
+# ScriptGenerator renders the model directly; a sqlacodegen generator such as
+# sqlacodegen_v2.generators.DeclarativeGenerator can still be passed to create_script
+DEFAULT_GENERATOR_CLASS = ScriptGenerator
 
 
 def has_sg():
@@ -57,6 +113,91 @@ def has_sg():
     return decorator_has_sg
 
 
+@has_sg()
+def sg_connect(sg_schema_type, sg_schema_source):
+    sg = None
+    if sg_schema_type in [SchemaType.SG_USER, SchemaType.SG_SCRIPT]:
+        if isinstance(sg_schema_source, dict):
+            url = sg_schema_source.get("url") or sg_schema_source.get("base_url")
+            if url:
+                if sg_schema_type == SchemaType.SG_USER:
+                    login = sg_schema_source.get("login")
+                    password = sg_schema_source.get("password")
+                    auth_token = sg_schema_source.get("auth_token")
+                    if login and password:
+                        sg = sgapi.Shotgun(url, login=login, password=password, auth_token=auth_token)
+
+                elif sg_schema_type == SchemaType.SG_SCRIPT:
+                    script_name = sg_schema_source.get("script_name") or sg_schema_source.get("script")
+                    api_key = sg_schema_source.get("api_key")
+                    sudo_as_login = sg_schema_source.get("sudo_as_login")
+                    if script_name and api_key:
+                        sg = sgapi.Shotgun(url, script_name=script_name, api_key=api_key, sudo_as_login=sudo_as_login)
+        else:
+            print(f"invalid schema source type: {type(sg_schema_source)}")
+
+    elif sg_schema_type == SchemaType.SG_CONNECTION:
+        sg = sg_schema_source
+
+    else:
+        print(f"invalid schema source: {sg_schema_type}")
+
+    return sg
+
+
+class LazyClassMap(Mapping):
+    """Mapping of entity name -> class that builds each class on first access.
+
+    Building a class also builds the classes its single-type entity FKs point to
+    (transitively), so the materialized tables always form a complete FK graph.
+    Iterating the keys never builds anything; values()/items() build everything.
+    """
+
+    def __init__(self, sg_orm):
+        self.sg_orm = sg_orm
+        self.tables = {}
+        self._classes = {}
+        self._attempted = set()
+        self._names = [
+            name for name in sg_orm.sg_schema if name not in sg_orm.ignored_tables and sg_orm.sg_schema.get(name)
+        ]
+        self._name_set = set(self._names)
+
+    def __getitem__(self, name):
+        if name not in self._classes:
+            created = []
+            self._materialize(name, created)
+            if created:
+                self.sg_orm.on_sg_classes_created(created)
+        return self._classes[name]
+
+    def __contains__(self, name):
+        return name in self._name_set
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    @property
+    def materialized(self):
+        """The classes built so far, by entity name."""
+        return dict(self._classes)
+
+    def _materialize(self, name, created):
+        if name in self._attempted or name not in self._name_set:
+            return
+        self._attempted.add(name)
+
+        self.sg_orm.create_sg_table(name, self.tables)
+        self.sg_orm.create_sg_class(name, self.tables, self._classes)
+        if name in self._classes:
+            created.append(self._classes[name])
+        for reference in self.tables[name]["references"]:
+            self._materialize(reference, created)
+
+
 class SGORM:
 
     def __init__(
@@ -66,6 +207,21 @@ class SGORM:
         ignored_tables=TABLE_IGNORE_LIST,
         ignored_fields=FIELD_IGNORE_LIST,
         echo=True,
+        schema_workers=DEFAULT_SCHEMA_WORKERS,
+        retries=DEFAULT_RETRIES,
+        backoff=DEFAULT_BACKOFF,
+        schema_cache=None,
+        lazy=False,
+        engine=None,
+        sessionmaker=None,
+        link_tables=False,
+        index_policy=None,
+        type_profile=sgtypes.DEFAULT_TYPE_PROFILE,
+        encode_lists=False,
+        relationships=False,
+        relationship_lazy=DEFAULT_RELATIONSHIP_LAZY,
+        polymorphic_accessors=False,
+        retired_column=False,
     ):
 
         if not sg_schema_type:
@@ -77,6 +233,48 @@ class SGORM:
 
         self.echo = echo
 
+        # concurrency and retry policy for talking to a live SG site
+        self.schema_workers = schema_workers
+        self.retries = retries
+        self.backoff = backoff
+
+        # optional on-disk cache for schemas read from a live site
+        if isinstance(schema_cache, (str, os.PathLike)):
+            schema_cache = SchemaCache(cache_dir=os.fspath(schema_cache))
+        self.schema_cache = schema_cache
+        self._schema_fingerprint = None
+
+        # build classes on first access instead of all up front
+        self.lazy = lazy
+
+        # store multi_entity fields in per-field link tables instead of _ids strings
+        self.link_tables = link_tables
+
+        # secondary indexes to generate (IndexPolicy); True for the default policy
+        self.index_policy = IndexPolicy() if index_policy is True else index_policy
+
+        # SG data type -> column type mapping: a name from sgtypes.TYPE_PROFILES or a dict like them
+        if isinstance(type_profile, str):
+            if type_profile not in sgtypes.TYPE_PROFILES:
+                raise ValueError(f"unknown type profile: {type_profile}")
+            self.sg_types = sgtypes.TYPE_PROFILES[type_profile]
+        else:
+            self.sg_types = type_profile
+        self.type_profile = type_profile
+
+        # store status_list/list values as SmallInteger codes of a shared lookup table
+        self.encode_lists = encode_lists
+        self._list_encoder = None
+
+        # ORM navigation: relationship() for FK entity fields (loaded with relationship_lazy)
+        # and properties resolving polymorphic _id/_type pairs
+        self.relationships = relationships
+        self.relationship_lazy = relationship_lazy
+        self.polymorphic_accessors = polymorphic_accessors
+
+        # soft-delete retired records (a "retired" flag on every table) instead of deleting them
+        self.retired_column = retired_column
+
         if not ignored_tables:
             ignored_tables = TABLE_IGNORE_LIST
         if not ignored_fields:
@@ -96,19 +294,26 @@ class SGORM:
         # read the SG schema0
         self.sg_schema, self.sg = self.read_sg_schema()
 
-        # create classes
-        self.classes, self.tables = self.create_sg_classes()
+        # create classes, all up front or on access when lazy
+        self.classes, self.tables = self.load_sg_classes()
+        if not self.lazy:
+            self.create_sg_relationships(list(self.classes.values()))
+
+        if self.encode_lists:
+            # seed the lookup table with the schema's valid values whenever it is created
+            sa.event.listen(list_value_table(self.Base.metadata), "after_create", self.seed_list_values)
 
-        # create in-memory engine so that classes can be reflected
-        self.engine = create_engine(SQLITE_MEMORY_SQA_URL, echo=self.echo)
+        # engine and session are created on first use; without a caller-supplied
+        # engine an in-memory SQLite database with all tables is created then
+        self._engine = engine
+        self._owns_engine = engine is None
+        self._sessionmaker = sessionmaker
+        self._session = None
 
         # if (drop_all):
         #     self.info("dropping all tables")
         #     self.Base.metadata.drop_all(bind=self.engine)
 
-        # create the ORM
-        self.session = self.create_sg_orm()
-
         # self.create_script(out_script)
 
     def __getitem__(self, class_name):
@@ -124,8 +329,49 @@ class SGORM:
         if echo:
             print(message)
 
+    @property
+    def engine(self):
+        """The engine sessions are bound to.
+
+        Defaults to an in-memory SQLite engine, created (with all tables) on first
+        access. A caller-supplied engine is used as is; no DDL is run on it.
+        """
+        if self._engine is None:
+            self._engine = create_engine(SQLITE_MEMORY_SQA_URL, echo=self.echo)
+            self._owns_engine = True
+            self.Base.metadata.create_all(self._engine)
+        return self._engine
+
+    @engine.setter
+    def engine(self, engine):
+        self._engine = engine
+        self._owns_engine = False
+
+    @property
+    def session(self):
+        """A session created on first access by create_sg_orm()."""
+        if self._session is None:
+            self._session = self.create_sg_orm()
+        return self._session
+
+    @session.setter
+    def session(self, session):
+        self._session = session
+
+    def on_sg_classes_created(self, created):
+        """Add relationships to lazily materialized classes and create their tables in the in-memory engine."""
+        self.create_sg_relationships(created)
+        if self._engine is not None and self._owns_engine:
+            tables = [cls.__table__ for cls in created]
+            for cls in created:
+                tables.extend(self.entity_link_tables(cls.__name__).values())
+            if self.encode_lists:
+                tables.append(list_value_table(self.Base.metadata))
+            self.Base.metadata.create_all(self._engine, tables=tables)
+
     def create_sg_orm(self):
-        self.Base.metadata.create_all(self.engine)
+        if self._sessionmaker is not None:
+            return self._sessionmaker()
         session = Session(self.engine)
         return session
 
@@ -137,10 +383,43 @@ class SGORM:
 
         elif self.sg_schema_type in [SchemaType.SG_USER, SchemaType.SG_SCRIPT, SchemaType.SG_CONNECTION]:
             sg = self.sg_connect()
-            sg_schema = self.read_schema_from_sg(sg)
+            if self.schema_cache and sg:
+                sg_schema = self.read_schema_from_cache(sg)
+            else:
+                sg_schema = self.read_schema_from_sg(sg)
 
         return sg_schema, sg
 
+    @property
+    def schema_fingerprint(self):
+        """Content hash of the loaded SG schema."""
+        if self._schema_fingerprint is None:
+            self._schema_fingerprint = schema_fingerprint(self.sg_schema)
+        return self._schema_fingerprint
+
+    def read_schema_from_cache(self, sg):
+        """Serve the schema from self.schema_cache, refetching only when it moved.
+
+        A fresh entry (younger than the cache TTL) is used as is. A stale entry is
+        revalidated with the cache's change probe and refetched from the site only
+        if the probe token differs or can't be obtained.
+        """
+        site_url = sg.base_url
+        entry = self.schema_cache.load(site_url)
+        if entry and self.schema_cache.is_fresh(entry):
+            self.info(f"using cached schema for {site_url}")
+        else:
+            probe = self.schema_cache.probe(sg) if self.schema_cache.probe else None
+            if entry and probe is not None and entry.get("probe") == probe:
+                self.info(f"cached schema for {site_url} unchanged, revalidated")
+                entry = self.schema_cache.touch(site_url, entry)
+            else:
+                self.info(f"fetching schema for {site_url}")
+                entry = self.schema_cache.save(site_url, self.read_schema_from_sg(sg), probe=probe)
+
+        self._schema_fingerprint = entry["fingerprint"]
+        return entry["sg_schema"]
+
     def read_schema_from_json(self):
         sg_schema = {}
         if isinstance(self.sg_schema_source, str):
@@ -150,198 +429,800 @@ class SGORM:
                         sg_schema = json.load(f)
             elif self.sg_schema_type == SchemaType.JSON_TEXT:
                 sg_schema = json.loads(self.sg_schema_source)
+        elif isinstance(self.sg_schema_source, Mapping) and self.sg_schema_type == SchemaType.JSON_TEXT:
+            # an already parsed schema
+            sg_schema = self.sg_schema_source
 
         return sg_schema
 
-    @has_sg()
     def sg_connect(self):
-        sg = None
-        if self.sg_schema_type in [SchemaType.SG_USER, SchemaType.SG_SCRIPT]:
-            if isinstance(self.sg_schema_source, dict):
-                url = self.sg_schema_source.get("url") or self.sg_schema_source.get("base_url")
-                if url:
-                    if self.sg_schema_type == SchemaType.SG_USER:
-                        login = self.sg_schema_source.get("login")
-                        password = self.sg_schema_source.get("password")
-                        auth_token = self.sg_schema_source.get("auth_token")
-                        if login and password:
-                            sg = sgapi.Shotgun(url, login=login, password=password, auth_token=auth_token)
-
-                    elif self.sg_schema_type == SchemaType.SG_SCRIPT:
-                        script_name = self.sg_schema_source.get("script_name") or self.sg_schema_source.get("script")
-                        api_key = self.sg_schema_source.get("api_key")
-                        sudo_as_login = self.sg_schema_source.get("sudo_as_login")
-                        if script_name and api_key:
-                            sg = sgapi.Shotgun(
-                                url, script_name=script_name, api_key=api_key, sudo_as_login=sudo_as_login
-                            )
-            else:
-                print(f"invalid schema source type: {type(self.sg_schema_source)}")
-
-        elif self.sg_schema_type == SchemaType.SG_CONNECTION:
-            sg = self.sg_schema_source
+        return sg_connect(self.sg_schema_type, self.sg_schema_source)
 
-        else:
-            print(f"invalid schema source: {self.sg_schema_type}")
+    def sg_connection_factory(self):
+        """Return a callable opening a new, independent SG connection, or None.
 
-        return sg
+        Only credential-based schema sources can be reconnected; a caller-supplied
+        connection (SchemaType.SG_CONNECTION) cannot be cloned.
+        """
+        if self.sg_schema_type in [SchemaType.SG_USER, SchemaType.SG_SCRIPT] and isinstance(
+            self.sg_schema_source, dict
+        ):
+            return functools.partial(sg_connect, self.sg_schema_type, self.sg_schema_source)
+        return None
 
     def read_schema_from_sg(self, sg):
         sg_schema = {}
         if sg:
-            entities = sg.schema_entity_read()
-            for entity_name in sorted(entities):
+            entities = call_with_retry(sg.schema_entity_read, retries=self.retries, backoff=self.backoff)
+            entity_names = sorted(entities)
+            entity_fields = self.read_fields_from_sg(sg, entity_names)
+            for entity_name in entity_names:
                 entity = entities.get(entity_name, {})
-                fields = sg.schema_field_read(entity_name)
-                entity["fields"] = fields
+                entity["fields"] = entity_fields[entity_name]
                 sg_schema[entity_name] = entity
         else:
             print("no sg")
 
         return sg_schema
 
+    def read_fields_from_sg(self, sg, entity_names):
+        """Read the field schema of every entity, fanning out over a worker pool.
+
+        Each worker thread opens its own connection (shotgun_api3.Shotgun is not
+        thread-safe). Falls back to serial reads on sg when the schema source
+        can't be reconnected or schema_workers is 1.
+        """
+        connect = self.sg_connection_factory()
+        workers = min(self.schema_workers or 1, len(entity_names))
+        if not connect or workers <= 1:
+            return {
+                entity_name: call_with_retry(
+                    sg.schema_field_read, entity_name, retries=self.retries, backoff=self.backoff
+                )
+                for entity_name in entity_names
+            }
+
+        connections = ThreadLocalConnections(connect)
+
+        def read_fields(entity_name):
+            return call_with_retry(
+                lambda: connections.get().schema_field_read(entity_name), retries=self.retries, backoff=self.backoff
+            )
+
+        self.info(f"reading fields of {len(entity_names)} entities with {workers} workers")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(read_fields, entity_names)
+            return dict(zip(entity_names, results))
+
+    def model_options(self):
+        """Options that change the generated model."""
+        return {
+            "ignored_tables": sorted(self.ignored_tables),
+            "ignored_fields": sorted(self.ignored_fields),
+            "link_tables": self.link_tables,
+            "index_policy": self.index_policy.options() if self.index_policy else None,
+            "encode_lists": self.encode_lists,
+            "retired_column": self.retired_column,
+            "type_profile": {
+                data_type: [str(sg_type["hint"]), repr(sg_type.get("column_type"))]
+                for data_type, sg_type in sorted(self.sg_types.items())
+            },
+        }
+
+    def load_sg_classes(self):
+        """Build the classes; in lazy mode nothing is built here, classes are materialized on access."""
+        if self.lazy:
+            classes = LazyClassMap(self)
+            return classes, classes.tables
+        return self.create_sg_classes()
+
     def create_sg_classes(self):
 
         classes = {}
         tables = {}
         for table in self.sg_schema:
-            self.info(f"TABLE {table}")
+            self.create_sg_table(table, tables)
 
-            if table in self.ignored_tables:
-                self.info(f"ignoring table: {table}")
-                continue
+        for node in tables:
+            self.create_sg_class(node, tables, classes)
 
-            t_def = self.sg_schema.get(table)
-            if not t_def:
-                self.info(f"NO definition for table: {table}")
-                continue
+        return classes, tables
 
-            if table not in tables:
-                tables[table] = {}
+    def create_sg_table(self, table, tables):
+        """Derive the annotations and namespace of one entity's class into tables[table]."""
+        self.info(f"TABLE {table}")
 
-            t_namespace = tables[table].get("namespace")
-            if not isinstance(t_namespace, dict):
-                t_namespace = {"__tablename__": table}
-            t_annotations = tables[table].get("annotations")
-            if not isinstance(t_annotations, dict):
-                t_annotations = {}
+        if table in self.ignored_tables:
+            self.info(f"ignoring table: {table}")
+            return
 
-            tables[table]["definition"] = t_def
+        t_def = self.sg_schema.get(table)
+        if not t_def:
+            self.info(f"NO definition for table: {table}")
+            return
 
-            fields = t_def.get("fields")
-            for field in fields:
+        if table not in tables:
+            tables[table] = {}
 
-                if field in self.ignored_fields:
-                    self.info(f"ignoring field: {field}")
-                    continue
+        t_namespace = tables[table].get("namespace")
+        if not isinstance(t_namespace, dict):
+            t_namespace = {"__tablename__": table}
+        t_annotations = tables[table].get("annotations")
+        if not isinstance(t_annotations, dict):
+            t_annotations = {}
+        # tables this one has FK constraints to
+        t_references = []
+        # column lists to create secondary indexes on
+        t_indexes = []
 
-                field_code = field
-                if field == "metadata":
-                    field_code = f"_{field}"
+        tables[table]["definition"] = t_def
 
-                field_def = fields.get(field)
-                field_type = field_def.get("data_type")
-                field_type_value = field_type.get("value")
-                self.info(f"==> {field_code} ({field_type_value})")
+        fields = t_def.get("fields")
+        for field in fields:
 
-                if field_code == "id":
-                    self.info("* id field")
-                    t_annotations[field_code] = Mapped[int]
-                    t_namespace[field_code] = mapped_column(sa.BigInteger, primary_key=True, autoincrement=False)
+            if field in self.ignored_fields:
+                self.info(f"ignoring field: {field}")
+                continue
 
-                else:
-                    if field_type_value in ["entity", "multi_entity"]:
-                        self.info(f"* {field_type_value} field")
-                        valid_types = field_def.get("properties", {}).get("valid_types", {}).get("value") or []
-                        self.info(f"  valid_types: {valid_types}")
-
-                        if field_type_value == "entity":
-                            t_annotations[f"{field_code}_id"] = Mapped[Optional[int]]
-                            if len(valid_types) == 1:
-                                v_table = valid_types[0]
-                                if v_table in self.sg_schema and v_table not in self.ignored_tables:
-                                    # Single valid type: FK to target table; _type column is redundant.
-                                    t_namespace[f"{field_code}_id"] = mapped_column(
-                                        sa.BigInteger, sa.ForeignKey(f"{v_table}.id")
-                                    )
-                                    self.info(f"  -> FK to {v_table}.id, no _type column")
-                                else:
-                                    t_namespace[f"{field_code}_id"] = mapped_column(sa.BigInteger)
-                                    self.info(f"  -> {v_table} not in schema, plain BigInteger (no FK)")
-                            else:
-                                # Zero or multiple valid types: keep _type for runtime disambiguation.
-                                # NOTE: For ORM navigation of polymorphic refs, consider
-                                # SQLAlchemy's association_proxy or per-pair junction tables.
-                                t_namespace[f"{field_code}_id"] = mapped_column(sa.BigInteger)
-                                t_annotations[f"{field_code}_type"] = Mapped[Optional[str]]
-                                t_namespace[f"{field_code}_type"] = mapped_column(sa.String)
-                                self.info(f"  -> polymorphic ({valid_types}), keeping _type column")
-
-                        else:  # multi_entity
-                            t_annotations[f"{field_code}_ids"] = Mapped[Optional[str]]
-                            t_namespace[f"{field_code}_ids"] = mapped_column(sa.String)
-                            if len(valid_types) != 1:
-                                # Zero or multiple valid types: keep _type for disambiguation.
-                                t_annotations[f"{field_code}_type"] = Mapped[Optional[str]]
-                                t_namespace[f"{field_code}_type"] = mapped_column(sa.String)
-                                self.info(f"  -> polymorphic multi_entity ({valid_types}), keeping _type column")
-                            else:
-                                self.info("  -> single-type multi_entity, no _type column")
+            field_code = field
+            if field == "metadata":
+                field_code = f"_{field}"
 
-                    else:
-                        self.info(f"* {field_type_value} field")
-                        if field_type_value in list(sgtypes.sg_types.keys()):
-                            self.info(f"assigning annotation for {field_code}")
-                            t_annotations[field_code] = copy.deepcopy(
-                                sgtypes.sg_types_optional.get(field_type_value).get("hint")
-                            )
-                            # self.info(f"assigning namespace for {field_code}")
-                            # t_namespace[field_code] = copy.deepcopy(sgtypes.sg_types.get(field_type_value).get("type"))
-                            self.info("done assigning normal type")
-                        else:
-                            self.info(f"{field_type_value} unsupported")
+            field_def = fields.get(field)
+            field_type = field_def.get("data_type")
+            field_type_value = field_type.get("value")
+            self.info(f"==> {field_code} ({field_type_value})")
 
-            tables[table]["annotations"] = t_annotations
-            tables[table]["namespace"] = t_namespace
+            if field_code == "id":
+                self.info("* id field")
+                t_annotations[field_code] = Mapped[int]
+                t_namespace[field_code] = mapped_column(sa.BigInteger, primary_key=True, autoincrement=False)
 
-        for node in tables:
-            self.info(f"setting annotations in namespace for {node}")
+            else:
+                if field_type_value in ["entity", "multi_entity"]:
+                    self.info(f"* {field_type_value} field")
+                    valid_types = field_def.get("properties", {}).get("valid_types", {}).get("value") or []
+                    self.info(f"  valid_types: {valid_types}")
+
+                    if field_type_value == "entity":
+                        t_annotations[f"{field_code}_id"] = Mapped[Optional[int]]
+                        if len(valid_types) == 1:
+                            v_table = valid_types[0]
+                            if v_table in self.sg_schema and v_table not in self.ignored_tables:
+                                # Single valid type: FK to target table; _type column is redundant.
+                                t_namespace[f"{field_code}_id"] = mapped_column(
+                                    sa.BigInteger, sa.ForeignKey(f"{v_table}.id")
+                                )
+                                t_references.append(v_table)
+                                self.info(f"  -> FK to {v_table}.id, no _type column")
+                            else:
+                                t_namespace[f"{field_code}_id"] = mapped_column(sa.BigInteger)
+                                self.info(f"  -> {v_table} not in schema, plain BigInteger (no FK)")
+                            if self.wants_index(table, field, field_type_value):
+                                t_indexes.append([f"{field_code}_id"])
+                        else:
+                            # Zero or multiple valid types: keep _type for runtime disambiguation.
+                            # NOTE: For ORM navigation of polymorphic refs, consider
+                            # SQLAlchemy's association_proxy or per-pair junction tables.
+                            t_namespace[f"{field_code}_id"] = mapped_column(sa.BigInteger)
+                            t_annotations[f"{field_code}_type"] = Mapped[Optional[str]]
+                            t_namespace[f"{field_code}_type"] = mapped_column(sa.String)
+                            self.info(f"  -> polymorphic ({valid_types}), keeping _type column")
+                            if self.wants_index(table, field, field_type_value):
+                                t_indexes.append([f"{field_code}_id", f"{field_code}_type"])
+
+                    elif self.link_tables:  # multi_entity, as a link table
+                        link = self.create_link_table(table, field_code, valid_types)
+                        t_references.extend(fk.target_fullname.split(".")[0] for fk in link.c.target_id.foreign_keys)
+                        self.info(f"  -> link table {link.name}, no _ids column")
+
+                    else:  # multi_entity
+                        sg_type = self.sg_types["multi_entity"]
+                        column_type = sg_type.get("column_type", sa.String)
+                        t_annotations[f"{field_code}_ids"] = copy.deepcopy(sg_type["hint"])
+                        t_namespace[f"{field_code}_ids"] = mapped_column(column_type)
+                        if len(valid_types) != 1:
+                            # Zero or multiple valid types: keep _type for disambiguation.
+                            t_annotations[f"{field_code}_type"] = copy.deepcopy(sg_type["hint"])
+                            t_namespace[f"{field_code}_type"] = mapped_column(column_type)
+                            self.info(f"  -> polymorphic multi_entity ({valid_types}), keeping _type column")
+                        else:
+                            self.info("  -> single-type multi_entity, no _type column")
 
-            t_namespace = tables[node]["namespace"]
-            t_annotations = tables[node]["annotations"]
-            t_namespace["__annotations__"] = t_annotations
+                else:
+                    self.info(f"* {field_type_value} field")
+                    if self.encode_lists and field_type_value in LIST_TYPES:
+                        list_value_table(self.Base.metadata)
+                        t_annotations[field_code] = Mapped[Optional[int]]
+                        t_namespace[field_code] = mapped_column(sa.SmallInteger)
+                        self.info(
+                            f"  -> {field_type_value} encoded as {list_value_table(self.Base.metadata).name} code"
+                        )
+                        if self.wants_index(table, field, field_type_value):
+                            t_indexes.append([field_code])
+                    elif field_type_value in list(sgtypes.sg_types.keys()):
+                        self.info(f"assigning annotation for {field_code}")
+                        sg_type = self.sg_types.get(field_type_value)
+                        t_annotations[field_code] = copy.deepcopy(sg_type.get("hint"))
+                        if sg_type.get("column_type") is not None:
+                            self.info(f"assigning namespace for {field_code}")
+                            t_namespace[field_code] = mapped_column(sg_type["column_type"])
+                        self.info("done assigning normal type")
+                        if self.wants_index(table, field, field_type_value):
+                            t_indexes.append([field_code])
+                    else:
+                        self.info(f"{field_type_value} unsupported")
 
-            try:
-                self.info(f"creating class {node}")
-                TClass = type(node, (self.Base,), t_namespace)
+        if self.retired_column:
+            if RETIRED_COLUMN in t_namespace:
+                self.info(f"  {table} has a {RETIRED_COLUMN} field, no soft-delete column")
+            else:
+                t_annotations[RETIRED_COLUMN] = Mapped[Optional[bool]]
+                t_namespace[RETIRED_COLUMN] = mapped_column(sa.Boolean, default=False)
 
-                self.info(f"adding class {node}")
-                tables[node]["class"] = TClass
-                classes[node] = TClass
+        if t_indexes:
+            t_namespace["__table_args__"] = tuple(
+                sa.Index(index_name(table, columns), *columns) for columns in t_indexes
+            )
 
-            except Exception as error:
-                self.info(f"Error creating type {node}: {error}")
-                self.info(traceback.format_exc())
+        tables[table]["annotations"] = t_annotations
+        tables[table]["namespace"] = t_namespace
+        tables[table]["references"] = t_references
+
+    def create_sg_relationships(self, created):
+        """Add relationship() attributes / polymorphic accessors to the classes in created.
+
+        Derived from the mapped tables, so lazily materialized classes get them
+        too. Attributes that would shadow an existing one are skipped.
+        """
+        if not (self.relationships or self.polymorphic_accessors):
+            return
+        for TClass in created:
+            foreign_keys, polymorphic = entity_links(TClass.__table__)
+            for name, column, target in foreign_keys if self.relationships else []:
+                if hasattr(TClass, name):
+                    self.info(f"{TClass.__name__}.{name} exists, no relationship to {target}")
+                    continue
+                setattr(TClass, name, entity_relationship(TClass, name, column, target, self.relationship_lazy))
+            for name, id_column, type_column in polymorphic if self.polymorphic_accessors else []:
+                if hasattr(TClass, name):
+                    self.info(f"{TClass.__name__}.{name} exists, no polymorphic accessor")
+                    continue
+                setattr(TClass, name, polymorphic_accessor(id_column.key, type_column.key, self.classes))
+
+    def wants_index(self, table, field, field_type):
+        """True if the index policy asks for an index on the column(s) of field."""
+        return bool(self.index_policy) and self.index_policy.wants(table, field, field_type)
+
+    def create_link_table(self, table, field_code, valid_types):
+        """Create the link table of a multi_entity field: one row per (source, target) pair.
+
+        Named "<table>__<field>", keyed by (source_id, target_id, target_type) and
+        indexed on the target side for reverse lookups. target_id gets a FK when
+        the field has a single valid type in the schema.
+        """
+        name = f"{table}__{field_code}"
+        if name in self.Base.metadata.tables:
+            return self.Base.metadata.tables[name]
+
+        target_fk = []
+        if len(valid_types) == 1 and valid_types[0] in self.sg_schema and valid_types[0] not in self.ignored_tables:
+            target_fk = [sa.ForeignKey(f"{valid_types[0]}.id")]
+
+        return sa.Table(
+            name,
+            self.Base.metadata,
+            sa.Column("source_id", sa.BigInteger, sa.ForeignKey(f"{table}.id"), primary_key=True, autoincrement=False),
+            sa.Column("target_id", sa.BigInteger, *target_fk, primary_key=True, autoincrement=False),
+            sa.Column("target_type", sa.String(255), primary_key=True),
+            sa.Column("ordinal", sa.Integer, nullable=False),
+            sa.Index(index_name(name, ["target"]), "target_id", "target_type"),
+        )
+
+    def create_sg_class(self, node, tables, classes):
+        """Create the declarative class for tables[node] and register it in classes."""
+        self.info(f"setting annotations in namespace for {node}")
+
+        t_namespace = tables[node]["namespace"]
+        t_annotations = tables[node]["annotations"]
+        t_namespace["__annotations__"] = t_annotations
+
+        try:
+            self.info(f"creating class {node}")
+            TClass = type(node, (self.Base,), t_namespace)
+
+            self.info(f"adding class {node}")
+            tables[node]["class"] = TClass
+            classes[node] = TClass
+
+        except Exception as error:
+            self.info(f"Error creating type {node}: {error}")
+            self.info(traceback.format_exc())
+
+    def entity_table(self, entity_type):
+        """Return the Table generated for entity_type, raising ValueError if there is none."""
+        TClass = self.get(entity_type)
+        if TClass is None:
+            raise ValueError(f"no class generated for entity type: {entity_type}")
+        return TClass.__table__
+
+    def dependency_order(self, entity_types=None):
+        """entity_types (default: all) ordered so that the tables their FKs point at come first.
+
+        FKs to entity types outside entity_types are ignored. Types in a FK
+        cycle can't all be ordered this way: the FKs closing the cycle are left
+        out of the sort.
+        """
+        tables = {self.entity_table(entity_type): entity_type for entity_type in entity_types or list(self.classes)}
+        return [tables[table] for table, _ in sa.schema.sort_tables_and_constraints(tables) if table is not None]
+
+    @property
+    def list_encoder(self):
+        """ListEncoder translating list values to codes for the loaders, or None without encode_lists."""
+        if self.encode_lists and self._list_encoder is None:
+            self._list_encoder = ListEncoder(self.list_fields())
+        return self._list_encoder
+
+    def list_fields(self):
+        """{entity_type: {sg_field: valid_values}} of the status_list/list fields of the model."""
+        return list_fields(self.sg_schema, self.ignored_tables, self.ignored_fields)
+
+    def seed_list_values(self, table, connection, **kw):
+        """after_create hook of the lookup table: insert the valid values of every list field."""
+        rows = seed_rows(self.list_fields())
+        if rows:
+            connection.execute(table.insert(), rows)
+
+    def list_codes(self, entity_type, field, engine=None):
+        """{value: code} of an encoded list field, as stored in the lookup table of engine."""
+        with (engine or self.engine).connect() as connection:
+            return ListEncoder({}).read_codes(connection, entity_type, field)
+
+    def entity_link_tables(self, entity_type):
+        """{sg_field: link Table} for the multi_entity fields of entity_type stored in link tables."""
+        self.entity_table(entity_type)
+        fields = self.sg_schema[entity_type].get("fields") or {}
+        link_tables = {}
+        for field, field_def in fields.items():
+            if field_def.get("data_type", {}).get("value") == "multi_entity":
+                name = f"{entity_type}__{'_metadata' if field == 'metadata' else field}"
+                if name in self.Base.metadata.tables:
+                    link_tables[field] = self.Base.metadata.tables[name]
+        return link_tables
+
+    def field_map(self, entity_type):
+        """Map the SG fields of entity_type to their generated columns (see loader.sg_field_map)."""
+        return sg_field_map(
+            self.sg_schema[entity_type], self.entity_table(entity_type), self.entity_link_tables(entity_type)
+        )
+
+    def local_query(self, entity_type):
+        """LocalQuery translating sg.find arguments to SQL over the mirrored table of entity_type."""
+        return LocalQuery(
+            entity_type,
+            self.entity_table(entity_type),
+            self.sg_schema[entity_type],
+            self.entity_link_tables(entity_type),
+            self.list_encoder,
+        )
+
+    def find(self, entity_type, filters, fields=None, order=None, filter_operator=None, limit=0, page=0, engine=None):
+        """sg.find over the local mirror: same arguments, SG-shaped dicts back.
+
+        Filters use the Shotgun syntax (see query.LocalQuery for the supported
+        operators) and are answered with a single SELECT on engine (default
+        self.engine), plus one per requested link-table field.
+        """
+        query = self.local_query(entity_type)
+        with (engine or self.engine).connect() as connection:
+            return query.find(connection, filters, fields, order, filter_operator, limit, page)
+
+    def find_one(self, entity_type, filters, fields=None, order=None, filter_operator=None, engine=None):
+        """sg.find_one over the local mirror; returns None when nothing matches."""
+        rows = self.find(entity_type, filters, fields, order, filter_operator, limit=1, engine=engine)
+        return rows[0] if rows else None
+
+    def read_through(self, engine=None, connect=None, max_age=DEFAULT_MAX_AGE, claim_timeout=DEFAULT_CLAIM_TIMEOUT):
+        """ReadThrough serving get/find from engine, refetching from SG past max_age seconds.
+
+        SG calls use connect, else a connection per thread opened from the
+        schema credentials, else the connection the schema was read from.
+        Processes sharing engine's database fetch each miss once; see
+        readthrough.ReadThrough.
+        """
+        return ReadThrough(
+            self,
+            engine or self.engine,
+            connect,
+            max_age=max_age,
+            retries=self.retries,
+            backoff=self.backoff,
+            claim_timeout=claim_timeout,
+        )
+
+    def event_tailer(
+        self,
+        engine=None,
+        sg=None,
+        name=DEFAULT_CURSOR_NAME,
+        page_size=DEFAULT_EVENT_PAGE_SIZE,
+        refetch_size=DEFAULT_REFETCH_SIZE,
+        gap_timeout=DEFAULT_GAP_TIMEOUT,
+        max_gaps=DEFAULT_MAX_GAPS,
+    ):
+        """EventTailer applying EventLogEntry changes to engine; call .poll() or .run() on it.
+
+        sg defaults to the connection the schema was read from. name selects
+        the cursor, so independent consumers can tail the same site. Skipped
+        event ids are re-read for gap_timeout seconds in case they commit late.
+        """
+        sg = sg or self.sg
+        if not sg:
+            raise ValueError("no SG connection to tail events from")
+        return EventTailer(
+            self,
+            sg,
+            engine or self.engine,
+            name=name,
+            page_size=page_size,
+            refetch_size=refetch_size,
+            retries=self.retries,
+            backoff=self.backoff,
+            gap_timeout=gap_timeout,
+            max_gaps=max_gaps,
+        )
+
+    def load_entity(
+        self,
+        entity_type,
+        engine=None,
+        sg=None,
+        filters=None,
+        page_size=DEFAULT_PAGE_SIZE,
+        batch_size=DEFAULT_BATCH_SIZE,
+        resume=False,
+    ):
+        """Bulk-load every record of entity_type from SG into engine.
+
+        Pages through sg.find by id and writes batches with executemany INSERTs;
+        the target table must exist and not already hold the records. engine
+        defaults to self.engine and sg to the connection the schema was read from.
+
+        With resume=True progress is checkpointed with every batch (see
+        loader.load_entity) and batches are upserted, so a load that died part
+        way continues after the last committed batch when called again.
+        """
+        sg = sg or self.sg
+        if not sg:
+            raise ValueError("no SG connection to load from")
+        table = self.entity_table(entity_type)
+        stats = load_entity(
+            sg,
+            engine or self.engine,
+            entity_type,
+            table,
+            self.sg_schema[entity_type],
+            filters=filters,
+            page_size=page_size,
+            batch_size=batch_size,
+            retries=self.retries,
+            backoff=self.backoff,
+            write=upsert_rows if resume else insert_rows,
+            checkpoint=resume,
+            link_tables=self.entity_link_tables(entity_type),
+            encoder=self.list_encoder,
+        )
+        self.info(f"loaded {entity_type}: {stats['fetched']} fetched, {stats['written']} written")
+        return stats
+
+    def upsert(self, entity_type, rows, engine=None, batch_size=DEFAULT_UPSERT_BATCH_SIZE):
+        """Insert or update rows of entity_type by id in batches.
+
+        rows are {column_name: value} dicts or instances of the generated class.
+        Uses the dialect's native upsert where there is one (see
+        loader.upsert_rows) instead of a SELECT per row like session.merge().
+        """
+        table = self.entity_table(entity_type)
+        rows = [row if isinstance(row, dict) else instance_row(row) for row in rows]
+        with (engine or self.engine).begin() as connection:
+            if self.list_encoder is not None:
+                rows = self.list_encoder.encode_rows(connection, entity_type, rows)
+            return upsert_rows(connection, table, rows, batch_size=batch_size)
+
+    def sync_entity(
+        self,
+        entity_type,
+        engine=None,
+        sg=None,
+        filters=None,
+        page_size=DEFAULT_PAGE_SIZE,
+        batch_size=DEFAULT_BATCH_SIZE,
+    ):
+        """Incrementally sync entity_type: upsert only the records changed since its watermark.
+
+        The per-entity watermark (last updated_at and id seen) is kept in the
+        sg_sync_watermark table of the target database and committed with every
+        batch, so an interrupted sync resumes where it stopped.
+        """
+        sg = sg or self.sg
+        if not sg:
+            raise ValueError("no SG connection to sync from")
+        table = self.entity_table(entity_type)
+        stats = sync_entity(
+            sg,
+            engine or self.engine,
+            entity_type,
+            table,
+            self.sg_schema[entity_type],
+            filters=filters,
+            page_size=page_size,
+            batch_size=batch_size,
+            retries=self.retries,
+            backoff=self.backoff,
+            link_tables=self.entity_link_tables(entity_type),
+            encoder=self.list_encoder,
+        )
+        self.info(f"synced {entity_type}: {stats['fetched']} fetched, {stats['written']} written")
+        return stats
+
+    def sync_retirements(
+        self, entity_type, engine=None, sg=None, page_size=DEFAULT_PAGE_SIZE, batch_size=DEFAULT_BATCH_SIZE
+    ):
+        """Delete (or, with retired_column, flag) the records of entity_type SG has retired.
+
+        Retired ids are paged with retired_only=True; see retirement.sync_retirements.
+        """
+        sg = sg or self.sg
+        if not sg:
+            raise ValueError("no SG connection to sync from")
+        stats = sync_retirements(
+            sg,
+            engine or self.engine,
+            entity_type,
+            self.entity_table(entity_type),
+            page_size=page_size,
+            batch_size=batch_size,
+            retries=self.retries,
+            backoff=self.backoff,
+            link_tables=self.entity_link_tables(entity_type),
+        )
+        self.info(f"retired {entity_type}: {stats['retired']} in SG, {stats['applied']} applied")
+        return stats
+
+    def reconcile_ids(self, entity_type, engine=None, sg=None, page_size=DEFAULT_PAGE_SIZE):
+        """Remove rows of entity_type SG no longer returns, by anti-joining a temp table of live ids.
+
+        Catches deletions sync_retirements can't see (e.g. records retired and
+        then purged); see retirement.reconcile_ids.
+        """
+        sg = sg or self.sg
+        if not sg:
+            raise ValueError("no SG connection to reconcile with")
+        stats = reconcile_ids(
+            sg,
+            engine or self.engine,
+            entity_type,
+            self.entity_table(entity_type),
+            page_size=page_size,
+            retries=self.retries,
+            backoff=self.backoff,
+            link_tables=self.entity_link_tables(entity_type),
+        )
+        self.info(f"reconciled {entity_type}: {stats['live']} live, {stats['applied']} removed")
+        return stats
+
+    def write_back(self, session=None, sg=None, batch_size=DEFAULT_WRITE_BATCH_SIZE):
+        """WriteBack tracking session (default self.session); call .push() to send its changes to SG.
+
+        Create it before making the changes: they are collected at every flush.
+        See writeback.WriteBack.
+        """
+        sg = sg or self.sg
+        if not sg:
+            raise ValueError("no SG connection to write back to")
+        return WriteBack(
+            self, sg, session or self.session, batch_size=batch_size, retries=self.retries, backoff=self.backoff
+        )
+
+    def sync(self, entity_types=None, engine=None, sg=None, page_size=DEFAULT_PAGE_SIZE, batch_size=DEFAULT_BATCH_SIZE):
+        """Incrementally sync several entity types (default: all); returns {entity_type: stats}.
+
+        Entity types are synced in dependency_order, so on databases enforcing
+        FKs the rows a FK points at are written before the rows pointing at
+        them. Links to records that aren't mirrored, and FK cycles, still fail
+        there; see the README.
+        """
+        return {
+            entity_type: self.sync_entity(entity_type, engine, sg, page_size=page_size, batch_size=batch_size)
+            for entity_type in self.dependency_order(entity_types)
+        }
+
+    def extract(
+        self,
+        entity_types=None,
+        engine=None,
+        workers=DEFAULT_EXTRACT_WORKERS,
+        ranges_per_entity=None,
+        rate_limit=None,
+        connect=None,
+        page_size=DEFAULT_PAGE_SIZE,
+        batch_size=DEFAULT_BATCH_SIZE,
+    ):
+        """Load several entity types (default: all) with concurrent fetchers and one writer.
+
+        Each of the `workers` fetch threads opens its own SG connection with
+        connect (default: sg_connection_factory(), i.e. the credentials the
+        schema was read with); rate_limit caps SG requests per second overall.
+        Rows are upserted, so re-running an extraction is safe. Without
+        credentials to reconnect with, the schema connection is used by a
+        single worker. Returns {entity_type: stats}.
+        """
+        connect = connect or self.sg_connection_factory()
+        if connect is None:
+            if not self.sg:
+                raise ValueError("no SG connection to extract from")
+            connect, workers = (lambda: self.sg), 1
+        jobs = [
+            ExtractJob(
+                entity_type,
+                self.entity_table(entity_type),
+                self.sg_schema[entity_type],
+                link_tables=self.entity_link_tables(entity_type),
+            )
+            for entity_type in (entity_types or list(self.classes))
+        ]
+        extractor = Extractor(
+            connect,
+            engine or self.engine,
+            workers=workers,
+            ranges_per_entity=ranges_per_entity,
+            rate_limit=rate_limit,
+            page_size=page_size,
+            batch_size=batch_size,
+            retries=self.retries,
+            backoff=self.backoff,
+            encoder=self.list_encoder,
+        )
+        stats = extractor.run(jobs)
+        for entity_stats in stats.values():
+            self.info(
+                f"extracted {entity_stats['entity']}: {entity_stats['fetched']} fetched, "
+                f"{entity_stats['written']} written"
+            )
+        return stats
 
-        return classes, tables
+    def load_sharded(
+        self,
+        entity_type,
+        engine=None,
+        processes=DEFAULT_SHARD_PROCESSES,
+        shards=None,
+        connect=None,
+        filters=None,
+        page_size=DEFAULT_PAGE_SIZE,
+        batch_size=DEFAULT_BATCH_SIZE,
+    ):
+        """Load one (large) entity type with a pool of worker processes, one id range each.
+
+        The id space is probed with two find_one calls and split into `shards`
+        ranges (default 4 per process). Every worker reconnects to SG with connect
+        (default: sg_connection_factory()) and to engine's database by URL, so
+        engine must not be in-memory SQLite. Rows are upserted by id.
+        """
+        connect = connect or self.sg_connection_factory()
+        if connect is None:
+            raise ValueError("sharded loading needs SG credentials to reconnect in worker processes")
+        sg = self.sg or connect()
+        loader = ShardedLoader(
+            connect,
+            engine or self.engine,
+            processes=processes,
+            shards=shards,
+            page_size=page_size,
+            batch_size=batch_size,
+            retries=self.retries,
+            backoff=self.backoff,
+            encoder=self.list_encoder,
+        )
+        stats = loader.run(
+            sg,
+            entity_type,
+            self.entity_table(entity_type),
+            self.sg_schema[entity_type],
+            filters,
+            self.entity_link_tables(entity_type),
+        )
+        self.info(
+            f"loaded {entity_type} in {stats['shards']} shards: {stats['fetched']} fetched, {stats['written']} written"
+        )
+        return stats
+
+    def schema_orm(self, sg_schema):
+        """A lazy SGORM over sg_schema (a parsed schema dict) with the model options of this one."""
+        return SGORM(
+            sg_schema_type=SchemaType.JSON_TEXT,
+            sg_schema_source=sg_schema,
+            ignored_tables=self.ignored_tables,
+            ignored_fields=self.ignored_fields,
+            echo=False,
+            lazy=True,
+            link_tables=self.link_tables,
+            index_policy=self.index_policy,
+            type_profile=self.type_profile,
+            encode_lists=self.encode_lists,
+            retired_column=self.retired_column,
+        )
+
+    def migration_from(self, old_schema):
+        """SchemaMigration from a model generated for old_schema to this one.
+
+        The schemas are diffed at the entity/field level (schema_diff.diff_schemas)
+        and only the tables of changed entities are built on either side, so the
+        cost follows the size of the change. old_schema is a parsed schema dict,
+        e.g. a SchemaCache entry's "sg_schema" or an older schema JSON file.
+        """
+        diff = diff_schemas(old_schema, self.sg_schema, self.ignored_tables, self.ignored_fields)
+        return SchemaMigration(diff, self.schema_orm(old_schema), self)
 
     def create_script(self, out_script=DEFAULT_OUT_SCRIPT, generator_class=DEFAULT_GENERATOR_CLASS):
+        """Write the model as a standalone Python module to out_script.
+
+        The default ScriptGenerator renders the classes straight from their
+        tables. A sqlacodegen generator class (sqlacodegen_v2.generators.DeclarativeGenerator)
+        goes through sqlacodegen instead, which inspects the metadata against a
+        SQLite dialect and is much slower on large schemas.
+        """
 
         if not out_script:
             out_script = DEFAULT_OUT_SCRIPT
         if not generator_class:
             generator_class = DEFAULT_GENERATOR_CLASS
 
-        gen = generator_class(self.Base.metadata, self.engine, [])
-        code = gen.generate()
+        if issubclass(generator_class, ScriptGenerator):
+            code = generator_class(self).generate()
+        else:
+            code = self.sqlacodegen_script(generator_class)
         with open(out_script, "w") as f:
-            # ensures no auto-increment since we are using SG's id's
-            code = code.replace(
-                "id = mapped_column(BigInteger, primary_key=True)",
-                "id = mapped_column(BigInteger, primary_key=True, autoincrement=False)",
-            )
+            f.write(code)
 
-            code += """
+    def create_package(self, out_dir=DEFAULT_OUT_PACKAGE, generator_class=PackageGenerator):
+        """Write the model as a package with one module per entity to out_dir (see PackageGenerator).
+
+        Importing the package, or any one entity of it, only imports the
+        entities needed. entities/ is regenerated as a whole: modules of
+        entities no longer in the model are removed. Returns the written paths.
+        """
+        if not out_dir:
+            out_dir = DEFAULT_OUT_PACKAGE
+
+        files = generator_class(self).generate()
+        entities_dir = os.path.join(out_dir, "entities")
+        if os.path.isdir(entities_dir):
+            for name in os.listdir(entities_dir):
+                if name.endswith(".py") and f"entities/{name}" not in files:
+                    os.remove(os.path.join(entities_dir, name))
+
+        paths = []
+        for relative_path, code in files.items():
+            path = os.path.join(out_dir, *relative_path.split("/"))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(code)
+            paths.append(path)
+        return paths
+
+    def sqlacodegen_script(self, generator_class):
+        # the generator only needs a dialect, so don't build the in-memory database for it
+        bind = self._engine if self._engine is not None else create_engine(SQLITE_MEMORY_SQA_URL)
+        gen = generator_class(self.Base.metadata, bind, [])
+        code = gen.generate()
+        # ensures no auto-increment since we are using SG's id's
+        code = code.replace(
+            "id = mapped_column(BigInteger, primary_key=True)",
+            "id = mapped_column(BigInteger, primary_key=True, autoincrement=False)",
+        )
+
+        code += """
 
 ########################################
 # generated classes dict for easy access
@@ -350,4 +1231,4 @@ import inspect
 CLASSES = {n: c for n, c in globals().copy().items() if inspect.isclass(c) }
 
 """
-            f.write(code)
+        return code
@@ -0,0 +1,350 @@
+import functools
+import inspect
+from datetime import date, datetime
+
+import sqlalchemy as sa
+
+from .relationships import entity_links
+
+__all__ = [
+    "PackageGenerator",
+    "ScriptGenerator",
+]
+
+# annotation of the columns of each Python type; anything else (JSON payloads) is Any
+TYPE_HINTS = {int: "int", str: "str", bool: "bool", float: "float", date: "date", datetime: "datetime"}
+
+
+def type_module(type_class):
+    """Module a generated script imports type_class from."""
+    if getattr(sa, type_class.__name__, None) is type_class:
+        return "sqlalchemy"
+    parts = type_class.__module__.split(".")
+    if parts[:2] == ["sqlalchemy", "dialects"]:
+        return ".".join(parts[:3])
+    return type_class.__module__
+
+
+@functools.lru_cache(maxsize=None)
+def type_arguments(type_class):
+    """Constructor argument names of type_class, which its repr() renders."""
+    return tuple(inspect.signature(type_class.__init__).parameters)
+
+
+def fk_targets(table):
+    """Names of the tables the FKs of table point to, in column order."""
+    return [fk.target_fullname.split(".")[0] for column in table.columns for fk in column.foreign_keys]
+
+
+def column_hint(column):
+    """Name of the Python type column values have, for the Mapped[] annotation."""
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        python_type = None
+    return TYPE_HINTS.get(python_type, "Any")
+
+
+class ScriptGenerator:
+    """Writes the module of an SGORM model straight from its tables.
+
+    The classes of sg_orm are rendered as declarative classes over the columns,
+    FKs and indexes of their tables, with Mapped[] annotations derived from the
+    column types; tables without a class (link tables, the list lookup table)
+    as Table() definitions. relationship() attributes are rendered for
+    sg_orm.relationships; polymorphic accessors need the runtime class map and
+    are left out. Nothing is reflected or inspected through an engine, and
+    classes, columns and imports are emitted in a fixed order, so the same
+    model always gives the same text.
+
+    Drop-in for a sqlacodegen generator in SGORM.create_script: the module
+    defines Base = declarative_base() and a CLASSES dict of the entity classes.
+    """
+
+    def __init__(self, sg_orm):
+        self.sg_orm = sg_orm
+        # {module: {name, ...}} the rendered code needs
+        self.imports = {}
+
+    def use(self, module, *names):
+        self.imports.setdefault(module, set()).update(names)
+
+    def model(self):
+        """({name: class}, [table without a class]) of sg_orm, sorted by name."""
+        classes = {name: self.sg_orm.classes[name] for name in sorted(self.sg_orm.classes)}
+        mapped = {cls.__table__.name for cls in classes.values()}
+        tables = [table for name, table in sorted(self.sg_orm.Base.metadata.tables.items()) if name not in mapped]
+        return classes, tables
+
+    def generate(self):
+        classes, tables = self.model()
+        self.imports = {}
+        self.use("sqlalchemy.orm", "declarative_base")
+        body = [self.render_class(name, cls) for name, cls in classes.items()]
+        body.extend(self.render_table(table) for table in tables)
+        body.append(self.render_classes_dict(classes))
+
+        sections = [self.render_imports(), "Base = declarative_base()"] + body
+        return "\n\n\n".join(sections) + "\n"
+
+    def render_imports(self):
+        standard, third_party, local = {}, {}, {}
+        for module, names in self.imports.items():
+            if module.startswith("."):
+                local[module] = names
+            elif module in ("datetime", "typing"):
+                standard[module] = names
+            else:
+                third_party[module] = names
+        blocks = []
+        for group in (standard, third_party, local):
+            if group:
+                blocks.append(
+                    "\n".join(f"from {module} import {', '.join(sorted(group[module]))}" for module in sorted(group))
+                )
+        return "\n\n".join(blocks)
+
+    def render_type(self, column_type):
+        """Source of column_type, including its dialect variants."""
+        self.use_type(column_type)
+        # repr() leaves the variants out
+        code = repr(column_type)
+        for dialect_name, variant in sorted(column_type._variant_mapping.items()):
+            code += f".with_variant({self.render_type(variant)}, {dialect_name!r})"
+        return code
+
+    def use_type(self, column_type):
+        """Import the class of column_type and of the types its repr() nests (JSONB(astext_type=Text()))."""
+        self.use(type_module(type(column_type)), type(column_type).__name__)
+        for name in type_arguments(type(column_type)):
+            value = getattr(column_type, name, None)
+            if isinstance(value, sa.types.TypeEngine):
+                self.use_type(value)
+
+    def column_args(self, column):
+        """Positional and keyword arguments of column after its name."""
+        args = [self.render_type(column.type)]
+        for fk in sorted(column.foreign_keys, key=lambda fk: fk.target_fullname):
+            self.use("sqlalchemy", "ForeignKey")
+            args.append(f"ForeignKey({fk.target_fullname!r})")
+        if column.primary_key:
+            args.append("primary_key=True")
+        if column.autoincrement is not True and column.autoincrement != "auto":
+            args.append(f"autoincrement={column.autoincrement!r}")
+        if not column.nullable and not column.primary_key:
+            args.append("nullable=False")
+        if column.default is not None and column.default.is_scalar:
+            args.append(f"default={column.default.arg!r}")
+        return args
+
+    def render_index(self, index):
+        self.use("sqlalchemy", "Index")
+        args = [repr(index.name)] + [repr(column.name) for column in index.columns]
+        if index.unique:
+            args.append("unique=True")
+        args.extend(f"{key}={value!r}" for key, value in sorted(index.dialect_kwargs.items()))
+        return f"Index({', '.join(args)})"
+
+    def render_unique(self, constraint):
+        self.use("sqlalchemy", "UniqueConstraint")
+        args = [repr(column.name) for column in constraint.columns]
+        if constraint.name:
+            args.append(f"name={constraint.name!r}")
+        return f"UniqueConstraint({', '.join(args)})"
+
+    def table_args(self, table):
+        """Index / UniqueConstraint sources of table, in a fixed order."""
+        uniques = [
+            constraint
+            for constraint in table.constraints
+            if isinstance(constraint, sa.UniqueConstraint) and not isinstance(constraint, sa.PrimaryKeyConstraint)
+        ]
+        args = [self.render_unique(constraint) for constraint in sorted(uniques, key=lambda c: c.name or "")]
+        args.extend(self.render_index(index) for index in sorted(table.indexes, key=lambda index: index.name or ""))
+        return args
+
+    def render_class(self, name, cls):
+        table = cls.__table__
+        self.use("sqlalchemy.orm", "Mapped", "mapped_column")
+        lines = [f"class {name}(Base):", f"    __tablename__ = {table.name!r}"]
+        table_args = self.table_args(table)
+        if table_args:
+            lines.append("    __table_args__ = (")
+            lines.extend(f"        {arg}," for arg in table_args)
+            lines.append("    )")
+        lines.append("")
+
+        for column in table.columns:
+            hint = column_hint(column)
+            if hint in ("date", "datetime"):
+                self.use("datetime", hint)
+            elif hint == "Any":
+                self.use("typing", "Any")
+            if column.nullable and not column.primary_key:
+                self.use("typing", "Optional")
+                hint = f"Optional[{hint}]"
+            args = self.column_args(column)
+            if column.key != column.name:
+                args.insert(0, repr(column.name))
+            lines.append(f"    {column.key}: Mapped[{hint}] = mapped_column({', '.join(args)})")
+
+        relationships = self.render_relationships(name, cls) if self.sg_orm.relationships else []
+        if relationships:
+            lines.append("")
+            lines.extend(relationships)
+        return "\n".join(lines)
+
+    def render_relationships(self, name, cls):
+        """relationship() lines matching relationships.entity_relationship for the FK columns of cls."""
+        table = cls.__table__
+        lazy = self.sg_orm.relationship_lazy
+        lines = []
+        taken = set(table.columns.keys())
+        foreign_keys, _ = entity_links(table)
+        for field, column, target in foreign_keys:
+            if field in taken or target not in self.sg_orm.classes:
+                continue
+            taken.add(field)
+            self.use("typing", "Optional")
+            self.use("sqlalchemy.orm", "backref", "relationship")
+            kwargs = [f"foreign_keys='[{name}.{column.key}]'"]
+            if target == table.name:
+                kwargs.append(f"remote_side='[{name}.id]'")
+            kwargs.append(f"backref=backref({f'{table.name}_{field}'!r}, lazy={lazy!r})")
+            kwargs.append(f"lazy={lazy!r}")
+            lines.append(f"    {field}: Mapped[Optional[{target!r}]] = relationship({target!r}, {', '.join(kwargs)})")
+        return lines
+
+    def render_table(self, table):
+        self.use("sqlalchemy", "Column", "Table")
+        lines = [f"t_{table.name} = Table(", f"    {table.name!r},", "    Base.metadata,"]
+        for column in table.columns:
+            lines.append(f"    Column({', '.join([repr(column.name)] + self.column_args(column))}),")
+        lines.extend(f"    {arg}," for arg in self.table_args(table))
+        lines.append(")")
+        return "\n".join(lines)
+
+    def render_classes_dict(self, classes):
+        lines = ["# generated classes dict for easy access", "CLASSES = {"]
+        lines.extend(f"    {name!r}: {name}," for name in classes)
+        lines.append("}")
+        return "\n".join(lines)
+
+
+PACKAGE_INIT = """\
+\"\"\"SG model generated by shotgrid_orm, one module per entity in entities/.
+
+Entity classes are imported on first access (sgmodel.Shot, sgmodel.CLASSES["Shot"]),
+together with every entity they reach through FKs. Call load_all() before
+using Base.metadata as a whole, e.g. for create_all().
+\"\"\"
+
+import importlib
+from collections.abc import Mapping
+
+from ._base import Base
+
+# entity -> entities its FKs point to
+REFERENCES = {{
+{references}}}
+ENTITIES = tuple(REFERENCES)
+
+
+def __getattr__(name):
+    if name not in REFERENCES:
+        raise AttributeError(f"module {{__name__!r}} has no attribute {{name!r}}")
+    # one flat import per entity of the FK closure, so long FK chains and cycles need no recursion
+    pending = [name]
+    while pending:
+        entity = pending.pop()
+        if entity not in globals():
+            globals()[entity] = getattr(importlib.import_module(f".entities.{{entity}}", __name__), entity)
+            pending.extend(REFERENCES[entity])
+    return globals()[name]
+
+
+def __dir__():
+    return sorted(set(globals()) | set(ENTITIES))
+
+
+def load_all():
+    \"\"\"Import every entity class.\"\"\"
+    return {{name: __getattr__(name) for name in ENTITIES}}
+
+
+class LazyClasses(Mapping):
+    \"\"\"Entity name -> class, importing each entity on first lookup.\"\"\"
+
+    def __getitem__(self, name):
+        if name not in REFERENCES:
+            raise KeyError(name)
+        return __getattr__(name)
+
+    def __iter__(self):
+        return iter(ENTITIES)
+
+    def __len__(self):
+        return len(ENTITIES)
+
+
+# generated classes dict for easy access
+CLASSES = LazyClasses()
+"""
+
+
+class PackageGenerator(ScriptGenerator):
+    """Writes the model of an SGORM as a package with one module per entity.
+
+    entities/<Entity>.py holds the class of one entity and the link tables of
+    its multi_entity fields, and imports no other entity. The package
+    __init__ imports entity modules on first attribute access through a module
+    __getattr__, along with the closure of the entities they have FKs to
+    (REFERENCES), and its CLASSES is a Mapping doing the same. Importing the
+    package costs one Base no matter how many entities the schema has.
+    _base.py holds Base and the tables of no entity (the list lookup table).
+
+    Import entities through the package: a module imported directly does not
+    pull in its FK targets, and backrefs of relationships only appear on a
+    class once the entity declaring them has been imported.
+    """
+
+    def generate(self):
+        """{relative path: source} of the package files."""
+        classes, tables = self.model()
+        owners = {cls.__table__.name: name for name, cls in classes.items()}
+        owned, shared = {}, []
+        for table in tables:
+            # link tables go with their source entity, the target of their first FK column
+            owner = next((owners[target] for target in fk_targets(table) if target in owners), None)
+            if owner is None:
+                shared.append(table)
+            else:
+                owned.setdefault(owner, []).append(table)
+
+        files = {
+            "_base.py": self.render_base(shared),
+            "entities/__init__.py": '"""One module per entity, imported by the package on demand."""\n',
+        }
+        references = {}
+        for name, cls in classes.items():
+            entity_tables = [cls.__table__] + owned.get(name, [])
+            targets = {owners[target] for table in entity_tables for target in fk_targets(table) if target in owners}
+            references[name] = sorted(targets - {name})
+            files[f"entities/{name}.py"] = self.render_entity_module(name, cls, owned.get(name, []))
+        files["__init__.py"] = PACKAGE_INIT.format(
+            references="".join(f"    {name!r}: {tuple(targets)!r},\n" for name, targets in references.items())
+        )
+        return files
+
+    def render_base(self, tables):
+        self.imports = {}
+        self.use("sqlalchemy.orm", "declarative_base")
+        body = [self.render_table(table) for table in tables]
+        return "\n\n\n".join([self.render_imports(), "Base = declarative_base()"] + body) + "\n"
+
+    def render_entity_module(self, name, cls, tables):
+        self.imports = {}
+        self.use(".._base", "Base")
+        body = [self.render_class(name, cls)]
+        body.extend(self.render_table(table) for table in tables)
+        return "\n\n\n".join([self.render_imports()] + body) + "\n"
@@ -0,0 +1,108 @@
+import http.client
+import threading
+import time
+import xmlrpc.client
+
+__all__ = [
+    "DEFAULT_BACKOFF",
+    "DEFAULT_RETRIES",
+    "TRANSIENT_ERRORS",
+    "TRANSIENT_HTTP_STATUSES",
+    "RateLimitedConnection",
+    "RateLimiter",
+    "ThreadLocalConnections",
+    "call_with_retry",
+    "is_transient",
+]
+
+# Errors worth retrying: dropped sockets/timeouts and malformed HTTP responses.
+TRANSIENT_ERRORS = (OSError, http.client.HTTPException)
+
+# HTTP statuses worth retrying. shotgun_api3 raises xmlrpc ProtocolError for
+# every status >= 300, and 401/403/404 (bad credentials, blocked API access)
+# won't go away by asking again.
+TRANSIENT_HTTP_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+
+
+def is_transient(error):
+    """Whether error is worth retrying: a network failure or a transient HTTP status."""
+    if isinstance(error, xmlrpc.client.ProtocolError):
+        return error.errcode in TRANSIENT_HTTP_STATUSES
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+def call_with_retry(func, *args, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, **kwargs):
+    """Call func(*args, **kwargs), retrying transient errors with exponential backoff.
+
+    The delay before retry n (starting at 0) is backoff * 2**n seconds. The last
+    error is re-raised once the retries are exhausted.
+    """
+    attempt = 0
+    while True:
+        try:
+            return func(*args, **kwargs)
+        except Exception as error:
+            if attempt >= retries or not is_transient(error):
+                raise
+            time.sleep(backoff * (2**attempt))
+            attempt += 1
+
+
+class ThreadLocalConnections:
+    """Hands out one Shotgun connection per thread.
+
+    shotgun_api3.Shotgun is not thread-safe, so worker pools must never share a
+    connection. connect is a zero-argument callable returning a new connection.
+    """
+
+    def __init__(self, connect):
+        self.connect = connect
+        self._local = threading.local()
+
+    def get(self):
+        sg = getattr(self._local, "sg", None)
+        if sg is None:
+            sg = self.connect()
+            self._local.sg = sg
+        return sg
+
+
+class RateLimiter:
+    """Spaces calls at least 1 / rate seconds apart across all threads; rate=None disables it."""
+
+    def __init__(self, rate=None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+class RateLimitedConnection:
+    """Wraps a Shotgun connection so every API call first waits on a shared RateLimiter."""
+
+    def __init__(self, sg, limiter):
+        self.sg = sg
+        self.limiter = limiter
+
+    def __getattr__(self, name):
+        attr = getattr(self.sg, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            self.limiter.acquire()
+            return attr(*args, **kwargs)
+
+        return call
@@ -0,0 +1,119 @@
+from datetime import datetime, timezone
+
+import sqlalchemy as sa
+
+__all__ = [
+    "CONTROL_METADATA",
+    "LOAD_DONE",
+    "LOAD_RUNNING",
+    "create_control_tables",
+    "event_cursor",
+    "event_gap",
+    "fetch_claim",
+    "load_checkpoint",
+    "row_fetch",
+    "sync_watermark",
+]
+
+# Bookkeeping tables the loaders keep in the target database. They live in their
+# own MetaData so they never show up in SGORM.Base.metadata, generated scripts or
+# autogenerated migrations of the SG model.
+CONTROL_METADATA = sa.MetaData()
+
+# per-entity high-water mark of incremental syncs
+sync_watermark = sa.Table(
+    "sg_sync_watermark",
+    CONTROL_METADATA,
+    sa.Column("entity_type", sa.String(255), primary_key=True),
+    sa.Column("updated_at", sa.DateTime),  # UTC, naive
+    sa.Column("last_id", sa.BigInteger, nullable=False, default=0),
+    sa.Column("synced_at", sa.DateTime),  # UTC, naive
+)
+
+# progress of full loads, so an interrupted load resumes after the last committed batch
+LOAD_RUNNING = "running"
+LOAD_DONE = "done"
+load_checkpoint = sa.Table(
+    "sg_load_checkpoint",
+    CONTROL_METADATA,
+    sa.Column("entity_type", sa.String(255), primary_key=True),
+    sa.Column("last_id", sa.BigInteger, nullable=False, default=0),
+    sa.Column("rows", sa.BigInteger, nullable=False, default=0),
+    sa.Column("status", sa.String(16), nullable=False),  # LOAD_RUNNING or LOAD_DONE
+    sa.Column("started_at", sa.DateTime),  # UTC, naive
+    sa.Column("updated_at", sa.DateTime),  # UTC, naive
+)
+
+# when read-through lookups last fetched each record from SG
+row_fetch = sa.Table(
+    "sg_row_fetch",
+    CONTROL_METADATA,
+    sa.Column("entity_type", sa.String(255), primary_key=True),
+    sa.Column("id", sa.BigInteger, primary_key=True, autoincrement=False),
+    sa.Column("fetched_at", sa.DateTime, nullable=False),  # UTC, naive
+)
+
+# read-through misses being fetched, so processes sharing the database fetch each lookup once
+fetch_claim = sa.Table(
+    "sg_fetch_claim",
+    CONTROL_METADATA,
+    sa.Column("key", sa.String(64), primary_key=True),  # sha256 of the lookup
+    sa.Column("owner", sa.String(32), nullable=False),
+    sa.Column("claimed_at", sa.DateTime, nullable=False),  # UTC, naive
+    sa.Column("done_at", sa.DateTime),  # UTC, naive; None while the fetch runs
+)
+
+# last EventLogEntry id applied by each event tailer
+event_cursor = sa.Table(
+    "sg_event_cursor",
+    CONTROL_METADATA,
+    sa.Column("name", sa.String(255), primary_key=True),
+    sa.Column("last_event_id", sa.BigInteger, nullable=False, default=0),
+    sa.Column("updated_at", sa.DateTime),  # UTC, naive
+)
+
+# event ids an event tailer skipped over, re-read in case they commit late
+event_gap = sa.Table(
+    "sg_event_gap",
+    CONTROL_METADATA,
+    sa.Column("name", sa.String(255), primary_key=True),
+    sa.Column("event_id", sa.BigInteger, primary_key=True, autoincrement=False),
+    sa.Column("seen_at", sa.DateTime, nullable=False),  # UTC, naive
+)
+
+
+def create_control_tables(engine):
+    CONTROL_METADATA.create_all(engine)
+
+
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def to_utc_naive(value):
+    """Normalize an (aware or naive UTC) datetime to naive UTC for storage."""
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def from_utc_naive(value):
+    """Attach UTC to a stored naive datetime so SG interprets it correctly."""
+    if value is not None and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def read_row(connection, table, **key):
+    """Return the row of table matching key as a dict, or None."""
+    query = sa.select(table).where(*[table.c[name] == value for name, value in key.items()])
+    row = connection.execute(query).mappings().first()
+    return dict(row) if row else None
+
+
+def write_row(connection, table, key, values):
+    """Insert or update the row of table identified by key (dialect neutral)."""
+    condition = [table.c[name] == value for name, value in key.items()]
+    result = connection.execute(table.update().where(*condition).values(**values))
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(**key, **values))
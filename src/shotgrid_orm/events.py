@@ -0,0 +1,275 @@
+import time
+from datetime import timedelta
+
+import sqlalchemy as sa
+
+from .connection import DEFAULT_BACKOFF, DEFAULT_RETRIES, call_with_retry
+from .control import create_control_tables, event_cursor, event_gap, read_row, utcnow, write_row
+from .loader import ID_ORDER, ID_ORDER_DESC, add_link_rows, delete_rows, flatten_record, upsert_rows, write_batch
+
+__all__ = [
+    "DEFAULT_CURSOR_NAME",
+    "DEFAULT_EVENT_PAGE_SIZE",
+    "DEFAULT_GAP_TIMEOUT",
+    "DEFAULT_MAX_GAPS",
+    "DEFAULT_POLL_INTERVAL",
+    "DEFAULT_REFETCH_SIZE",
+    "EventTailer",
+    "event_entity",
+    "group_events",
+]
+
+DEFAULT_EVENT_PAGE_SIZE = 1000
+DEFAULT_REFETCH_SIZE = 500
+DEFAULT_POLL_INTERVAL = 2.0
+DEFAULT_CURSOR_NAME = "default"
+DEFAULT_GAP_TIMEOUT = 120  # seconds a skipped event id is re-read before it counts as rolled back
+DEFAULT_MAX_GAPS = 1000  # skipped ids tracked per poll; the highest are kept
+
+EVENT_FIELDS = ["event_type", "entity", "meta"]
+
+
+def event_entity(event):
+    """(entity_type, entity_id) an EventLogEntry changed, or None for non-entity events.
+
+    Entity events are named Shotgun_<EntityType>_<Action> (New, Change,
+    Retirement, Revival). The id comes from meta, as retired entities are no
+    longer linked from the event.
+    """
+    parts = (event.get("event_type") or "").split("_")
+    if len(parts) < 3 or parts[0] != "Shotgun":
+        return None
+    meta = event.get("meta") or {}
+    entity = event.get("entity") or {}
+    entity_type = meta.get("entity_type") or entity.get("type") or "_".join(parts[1:-1])
+    entity_id = meta.get("entity_id") or entity.get("id")
+    if not entity_id:
+        return None
+    return entity_type, entity_id
+
+
+def group_events(events):
+    """{entity_type: [entity_id, ...]} of the entities events touched, each id once, in event order."""
+    touched = {}
+    for event in events:
+        key = event_entity(event)
+        if key is not None:
+            touched.setdefault(key[0], {})[key[1]] = None
+    return {entity_type: list(ids) for entity_type, ids in touched.items()}
+
+
+class EventTailer:
+    """Applies SG changes to the mirror by tailing EventLogEntry.
+
+    Each poll reads the events after the cursor (one page of page_size), groups
+    the entities they touched by type and refetches them with ["id", "in", ...]
+    in chunks of refetch_size. Returned records are upserted, ids SG no longer
+    returns (retired or deleted) are deleted, and the cursor is advanced, all in
+    one transaction per poll. Refetching the current state instead of replaying
+    field changes makes repeated or out-of-order events harmless, and several
+    events on one entity cost a single fetch. The changes of a poll are applied
+    in foreign key order (SGORM.dependency_order), so an event on a Shot that
+    now links to a new Sequence can come before the Sequence's own event.
+
+    EventLogEntry ids are handed out before their transaction commits, so an
+    event can become visible after higher ids were already applied. Ids the
+    cursor skipped over are kept in the sg_event_gap control table (up to
+    max_gaps per poll) and re-read on every poll until they show up or
+    gap_timeout seconds have passed; ids of rolled back transactions never
+    show up and simply expire.
+
+    Entity types without a generated table are skipped. The cursor is stored
+    under name in the sg_event_cursor control table; a tailer without one
+    starts at the latest event.
+    """
+
+    def __init__(
+        self,
+        sg_orm,
+        sg,
+        engine=None,
+        name=DEFAULT_CURSOR_NAME,
+        page_size=DEFAULT_EVENT_PAGE_SIZE,
+        refetch_size=DEFAULT_REFETCH_SIZE,
+        retries=DEFAULT_RETRIES,
+        backoff=DEFAULT_BACKOFF,
+        gap_timeout=DEFAULT_GAP_TIMEOUT,
+        max_gaps=DEFAULT_MAX_GAPS,
+    ):
+        self.sg_orm = sg_orm
+        self.sg = sg
+        self.engine = engine or sg_orm.engine
+        self.name = name
+        self.page_size = page_size
+        self.refetch_size = refetch_size
+        self.retries = retries
+        self.backoff = backoff
+        self.gap_timeout = gap_timeout
+        self.max_gaps = max_gaps
+        create_control_tables(self.engine)
+
+    def call_sg(self, method, *args, **kwargs):
+        return call_with_retry(getattr(self.sg, method), *args, retries=self.retries, backoff=self.backoff, **kwargs)
+
+    @property
+    def cursor(self):
+        """Id of the last applied event, or None before the first poll."""
+        with self.engine.connect() as connection:
+            row = read_row(connection, event_cursor, name=self.name)
+        return row["last_event_id"] if row else None
+
+    @property
+    def gaps(self):
+        """{event_id: seen_at} of the skipped event ids still being re-read."""
+        with self.engine.connect() as connection:
+            rows = connection.execute(
+                sa.select(event_gap.c.event_id, event_gap.c.seen_at).where(event_gap.c.name == self.name)
+            )
+            return dict(rows.all())
+
+    def reset(self, last_event_id=None):
+        """Move the cursor to last_event_id (default: the latest event) and forget skipped ids."""
+        if last_event_id is None:
+            latest = self.call_sg("find_one", "EventLogEntry", [], ["id"], order=ID_ORDER_DESC)
+            last_event_id = latest["id"] if latest else 0
+        with self.engine.begin() as connection:
+            connection.execute(sa.delete(event_gap).where(event_gap.c.name == self.name))
+            write_row(
+                connection, event_cursor, {"name": self.name}, {"last_event_id": last_event_id, "updated_at": utcnow()}
+            )
+        return last_event_id
+
+    def poll(self):
+        """Apply the next page of events and any late ones.
+
+        Returns {"events", "late", "fetched", "written", "deleted", "last_event_id"}.
+        """
+        last_event_id = self.cursor
+        if last_event_id is None:
+            last_event_id = self.reset()
+        events = self.call_sg(
+            "find",
+            "EventLogEntry",
+            [["id", "greater_than", last_event_id]],
+            EVENT_FIELDS,
+            order=ID_ORDER,
+            limit=self.page_size,
+        )
+        gaps = self.gaps
+        late = self.find_events(sorted(gaps)) if gaps else []
+        stats = {
+            "events": len(events),
+            "late": len(late),
+            "fetched": 0,
+            "written": 0,
+            "deleted": 0,
+            "last_event_id": events[-1]["id"] if events else last_event_id,
+        }
+        if not events and not gaps:
+            return stats
+
+        changes = []
+        for entity_type, ids in group_events(late + events).items():
+            try:
+                table = self.sg_orm.entity_table(entity_type)
+            except ValueError:
+                continue
+            records = self.refetch(entity_type, ids)
+            stats["fetched"] += len(records)
+            changes.append((entity_type, table, ids, records))
+        order = {
+            entity_type: index
+            for index, entity_type in enumerate(self.sg_orm.dependency_order([change[0] for change in changes]))
+        }
+        changes.sort(key=lambda change: order[change[0]])
+
+        now = utcnow()
+        expired_at = now - timedelta(seconds=self.gap_timeout)
+        done = {event["id"] for event in late}
+        done.update(event_id for event_id, seen_at in gaps.items() if seen_at < expired_at)
+        skipped = self.skipped(last_event_id, events)
+        with self.engine.begin() as connection:
+            for entity_type, table, ids, records in changes:
+                written, deleted = self.apply(connection, entity_type, table, ids, records)
+                stats["written"] += written
+                stats["deleted"] += deleted
+            if done:
+                connection.execute(
+                    sa.delete(event_gap).where(event_gap.c.name == self.name, event_gap.c.event_id.in_(done))
+                )
+            if skipped:
+                connection.execute(
+                    sa.insert(event_gap),
+                    [{"name": self.name, "event_id": event_id, "seen_at": now} for event_id in skipped],
+                )
+            write_row(
+                connection,
+                event_cursor,
+                {"name": self.name},
+                {"last_event_id": stats["last_event_id"], "updated_at": now},
+            )
+        return stats
+
+    def find_events(self, event_ids):
+        events = []
+        for start in range(0, len(event_ids), self.page_size):
+            chunk = event_ids[start : start + self.page_size]
+            events.extend(
+                self.call_sg(
+                    "find", "EventLogEntry", [["id", "in", chunk]], EVENT_FIELDS, order=ID_ORDER, limit=len(chunk)
+                )
+            )
+        return events
+
+    def skipped(self, last_event_id, events):
+        """Ids between last_event_id and the last of events that events lack, the highest max_gaps of them."""
+        seen = {event["id"] for event in events}
+        skipped = []
+        event_id = events[-1]["id"] - 1 if events else last_event_id
+        while event_id > last_event_id and len(skipped) < self.max_gaps:
+            if event_id not in seen:
+                skipped.append(event_id)
+            event_id -= 1
+        return skipped
+
+    def refetch(self, entity_type, ids):
+        fields = [field for field in self.sg_orm.field_map(entity_type) if field != "id"]
+        records = []
+        for start in range(0, len(ids), self.refetch_size):
+            chunk = ids[start : start + self.refetch_size]
+            records.extend(self.call_sg("find", entity_type, [["id", "in", chunk]], fields, limit=len(chunk)))
+        return records
+
+    def apply(self, connection, entity_type, table, ids, records):
+        """Upsert records and delete the ids among ids SG did not return; returns (written, deleted)."""
+        field_map = self.sg_orm.field_map(entity_type)
+        rows, links = [], {}
+        for record in records:
+            rows.append(flatten_record(record, field_map, table))
+            add_link_rows(links, record, field_map)
+        written = write_batch(connection, table, rows, links, upsert_rows, self.sg_orm.list_encoder) if rows else 0
+        found = {record["id"] for record in records}
+        gone = [entity_id for entity_id in ids if entity_id not in found]
+        deleted = delete_rows(connection, table, gone, self.sg_orm.entity_link_tables(entity_type)) if gone else 0
+        return written, deleted
+
+    def run(self, poll_interval=DEFAULT_POLL_INTERVAL, stop=None, max_polls=None):
+        """Poll until stop (a threading.Event) is set or after max_polls polls.
+
+        Full pages are followed immediately so a backlog drains at page rate;
+        the tailer only sleeps poll_interval once it has caught up. Returns the
+        summed stats.
+        """
+        totals = {"polls": 0, "events": 0, "late": 0, "fetched": 0, "written": 0, "deleted": 0, "last_event_id": None}
+        while not (stop is not None and stop.is_set()) and (max_polls is None or totals["polls"] < max_polls):
+            stats = self.poll()
+            totals["polls"] += 1
+            for key in ("events", "late", "fetched", "written", "deleted"):
+                totals[key] += stats[key]
+            totals["last_event_id"] = stats["last_event_id"]
+            if stats["events"] < self.page_size and (max_polls is None or totals["polls"] < max_polls):
+                if stop is not None:
+                    stop.wait(poll_interval)
+                else:
+                    time.sleep(poll_interval)
+        return totals
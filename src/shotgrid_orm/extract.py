@@ -0,0 +1,211 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import sqlalchemy as sa
+
+from .connection import DEFAULT_BACKOFF, DEFAULT_RETRIES, RateLimitedConnection, RateLimiter, ThreadLocalConnections
+from .loader import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_PAGE_SIZE,
+    add_link_rows,
+    flatten_record,
+    id_ranges,
+    iter_pages,
+    range_filters,
+    sg_field_map,
+    upsert_rows,
+    write_batch,
+)
+
+__all__ = [
+    "DEFAULT_EXTRACT_WORKERS",
+    "DEFAULT_QUEUE_SIZE",
+    "ExtractJob",
+    "Extractor",
+]
+
+DEFAULT_EXTRACT_WORKERS = 4
+DEFAULT_QUEUE_SIZE = 64  # pages in flight between the fetchers and the writer
+
+_DONE = object()
+
+
+class ExtractJob:
+    """One entity type to extract into table."""
+
+    def __init__(self, entity_type, table, t_def, filters=None, link_tables=None):
+        self.entity_type = entity_type
+        self.table = table
+        self.t_def = t_def
+        self.filters = filters
+        self.field_map = sg_field_map(t_def, table, link_tables)
+        self.fields = [field for field in self.field_map if field != "id"]
+
+
+def stages(jobs):
+    """Split jobs into stages to run one after another, in FK dependency order.
+
+    A job goes to a later stage than the jobs whose tables its FKs point at,
+    so their rows are written first. FKs closing a cycle are left out of the
+    sort, and the jobs of one stage never point at each other's tables.
+    """
+    by_table = {job.table: job for job in jobs}
+    result = []
+    names = set()  # tables of the current stage
+    for table, _ in sa.schema.sort_tables_and_constraints(by_table):
+        if table is None:
+            continue
+        targets = {fk.target_fullname.split(".")[0] for fk in table.foreign_keys}
+        if not result or targets & names:
+            result.append([])
+            names = set()
+        result[-1].append(by_table[table])
+        names.add(table.name)
+    return result
+
+
+class Extractor:
+    """Fetch several entity types concurrently and write them through a single writer.
+
+    Fetching runs on a pool of `workers` threads, each with its own SG connection
+    from connect(). Large entities are split into id ranges fetched in parallel.
+    Pages flow through a bounded queue to one writer thread that upserts them in
+    batches, so network reads and database writes overlap while memory stays
+    bounded. rate_limit caps SG requests per second across all workers.
+
+    Entity types run in stages (see stages()): a stage starts once the
+    tables its FKs point at are written, so databases enforcing FKs accept
+    the rows. Jobs within a stage overlap; stages don't.
+    """
+
+    def __init__(
+        self,
+        connect,
+        engine,
+        workers=DEFAULT_EXTRACT_WORKERS,
+        ranges_per_entity=None,
+        rate_limit=None,
+        page_size=DEFAULT_PAGE_SIZE,
+        batch_size=DEFAULT_BATCH_SIZE,
+        queue_size=DEFAULT_QUEUE_SIZE,
+        retries=DEFAULT_RETRIES,
+        backoff=DEFAULT_BACKOFF,
+        write=upsert_rows,
+        encoder=None,
+    ):
+        self.connections = ThreadLocalConnections(connect)
+        self.engine = engine
+        self.workers = max(1, workers)
+        self.ranges_per_entity = ranges_per_entity or self.workers
+        self.limiter = RateLimiter(rate_limit)
+        self.page_size = page_size
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.retries = retries
+        self.backoff = backoff
+        self.write = write
+        self.encoder = encoder
+
+    def run(self, jobs):
+        """Extract every job; returns {entity_type: {"entity", "fetched", "written"}}."""
+        self.stats = {job.entity_type: {"entity": job.entity_type, "fetched": 0, "written": 0} for job in jobs}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="shotgrid_orm-fetch") as executor:
+            for stage in stages(jobs):
+                self._run_stage(executor, stage)
+        return self.stats
+
+    def _run_stage(self, executor, jobs):
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._writer_error = None
+
+        writer = threading.Thread(target=self._write_loop, name="shotgrid_orm-writer", daemon=True)
+        writer.start()
+        try:
+            plans = list(executor.map(self._plan, jobs))
+            futures = [
+                executor.submit(self._fetch_range, job, first_id, last_id)
+                for job, ranges in zip(jobs, plans)
+                for first_id, last_id in ranges
+            ]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                self._stop.set()
+                wait(futures)  # the other fetchers return once they see _stop
+                raise
+        finally:
+            # the writer always drains the queue up to _DONE, even after a failure
+            self._queue.put(_DONE)
+            writer.join()
+
+        if self._writer_error is not None:
+            raise self._writer_error
+
+    def _sg(self):
+        return RateLimitedConnection(self.connections.get(), self.limiter)
+
+    def _plan(self, job):
+        return id_ranges(
+            self._sg(),
+            job.entity_type,
+            job.filters,
+            self.ranges_per_entity,
+            self.page_size,
+            retries=self.retries,
+            backoff=self.backoff,
+        )
+
+    def _fetch_range(self, job, first_id, last_id):
+        pages = iter_pages(
+            self._sg(),
+            job.entity_type,
+            range_filters(job.filters, first_id, last_id),
+            job.fields,
+            self.page_size,
+            after_id=first_id - 1,
+            retries=self.retries,
+            backoff=self.backoff,
+        )
+        for page in pages:
+            if self._stop.is_set():
+                return
+            rows, links = [], {}
+            for record in page:
+                rows.append(flatten_record(record, job.field_map, job.table))
+                add_link_rows(links, record, job.field_map)
+            with self._lock:
+                self.stats[job.entity_type]["fetched"] += len(rows)
+            self._queue.put((job, rows, links))
+
+    def _write_loop(self):
+        pending = {}
+        while True:
+            item = self._queue.get()
+            if item is _DONE:
+                break
+            if self._stop.is_set():
+                continue  # keep draining so no fetcher blocks on a full queue
+            job, rows, links = item
+            _, buffered, buffered_links = pending.setdefault(job.entity_type, (job, [], {}))
+            buffered.extend(rows)
+            for link_table, link_rows in links.items():
+                buffered_links.setdefault(link_table, []).extend(link_rows)
+            if len(buffered) >= self.batch_size:
+                self._flush(*pending.pop(job.entity_type))
+        if not self._stop.is_set():
+            for job, rows, links in pending.values():
+                self._flush(job, rows, links)
+
+    def _flush(self, job, rows, links):
+        try:
+            with self.engine.begin() as connection:
+                written = write_batch(connection, job.table, rows, links, self.write, self.encoder)
+        except BaseException as error:
+            self._writer_error = error
+            self._stop.set()
+            return
+        self.stats[job.entity_type]["written"] += written
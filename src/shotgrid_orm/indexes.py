@@ -0,0 +1,57 @@
+import hashlib
+
+__all__ = [
+    "IndexPolicy",
+    "index_name",
+]
+
+# longest identifier every supported dialect accepts (PostgreSQL)
+MAX_IDENTIFIER_LENGTH = 63
+
+DATE_TYPES = ("date", "date_time")
+
+
+def index_name(table, columns, max_length=MAX_IDENTIFIER_LENGTH):
+    """ix_<table>_<columns>, shortened with a hash suffix when it is too long for the dialect."""
+    name = f"ix_{table}_{'_'.join(columns)}"
+    if len(name) > max_length:
+        digest = hashlib.sha256(name.encode("utf-8")).hexdigest()[:8]
+        name = f"{name[: max_length - 9]}_{digest}"
+    return name
+
+
+class IndexPolicy:
+    """Which generated columns SGORM.create_sg_table adds secondary indexes for.
+
+    entity_links indexes the <field>_id column of entity fields (together with
+    <field>_type for polymorphic ones), date_times the date and date_time
+    fields, status_lists the status_list fields. fields adds any other field,
+    given as "field" (every entity) or "Entity.field".
+    """
+
+    def __init__(self, entity_links=True, date_times=True, status_lists=True, fields=None):
+        self.entity_links = entity_links
+        self.date_times = date_times
+        self.status_lists = status_lists
+        self.fields = set(fields or [])
+
+    def wants(self, entity_type, field, data_type):
+        """True if the column(s) generated for field of entity_type should be indexed."""
+        if field in self.fields or f"{entity_type}.{field}" in self.fields:
+            return True
+        if data_type == "entity":
+            return self.entity_links
+        if data_type in DATE_TYPES:
+            return self.date_times
+        if data_type == "status_list":
+            return self.status_lists
+        return False
+
+    def options(self):
+        """Plain-data form of the policy (see SGORM.model_options)."""
+        return {
+            "entity_links": self.entity_links,
+            "date_times": self.date_times,
+            "status_lists": self.status_lists,
+            "fields": sorted(self.fields),
+        }
@@ -0,0 +1,180 @@
+import sqlalchemy as sa
+
+from .loader import ON_CONFLICT_DIALECTS, ON_DUPLICATE_KEY_DIALECTS
+
+__all__ = [
+    "LIST_TYPES",
+    "LIST_VALUE_TABLE",
+    "ListEncoder",
+    "list_fields",
+    "list_value_table",
+]
+
+LIST_TYPES = ("status_list", "list")
+LIST_VALUE_TABLE = "sg_list_value"
+
+
+def list_value_table(metadata):
+    """The shared lookup table of list values in metadata, created on first call.
+
+    One row per (entity_type, field, code); encoded status_list/list columns
+    store the SmallInteger code.
+    """
+    if LIST_VALUE_TABLE in metadata.tables:
+        return metadata.tables[LIST_VALUE_TABLE]
+    return sa.Table(
+        LIST_VALUE_TABLE,
+        metadata,
+        sa.Column("entity_type", sa.String(255), primary_key=True),
+        sa.Column("field", sa.String(255), primary_key=True),
+        sa.Column("code", sa.SmallInteger, primary_key=True, autoincrement=False),
+        sa.Column("value", sa.String(255), nullable=False),
+        sa.UniqueConstraint("entity_type", "field", "value", name=f"uq_{LIST_VALUE_TABLE}_value"),
+    )
+
+
+def list_fields(sg_schema, ignored_tables=(), ignored_fields=()):
+    """{entity_type: {sg_field: valid_values}} of the status_list/list fields in sg_schema."""
+    fields = {}
+    for entity_type, t_def in sg_schema.items():
+        if entity_type in ignored_tables or not t_def:
+            continue
+        for field, field_def in (t_def.get("fields") or {}).items():
+            if field in ignored_fields or field_def.get("data_type", {}).get("value") not in LIST_TYPES:
+                continue
+            valid_values = field_def.get("properties", {}).get("valid_values", {}).get("value") or []
+            fields.setdefault(entity_type, {})[field] = list(valid_values)
+    return fields
+
+
+def seed_rows(fields):
+    """Lookup table rows for the valid values of fields (see list_fields); codes start at 1."""
+    return [
+        {"entity_type": entity_type, "field": field, "code": code, "value": value}
+        for entity_type, entity_fields in fields.items()
+        for field, values in entity_fields.items()
+        for code, value in enumerate(values, start=1)
+    ]
+
+
+class ListEncoder:
+    """Translates status_list/list values to the codes of the lookup table, in bulk.
+
+    The database is the source of truth: the codes of a field are read once
+    from the lookup table, and values it doesn't know yet (e.g. added to the
+    site after the tables were created) are appended with the next free code.
+    Codes added in a transaction are only cached once it commits, so a rolled
+    back load never leaves codes the lookup table doesn't have. Picklable, so
+    it can be handed to worker processes.
+    """
+
+    def __init__(self, fields):
+        # {entity_type: {column_name: sg_field}}
+        self.fields = {
+            entity_type: {(f"_{field}" if field == "metadata" else field): field for field in entity_fields}
+            for entity_type, entity_fields in fields.items()
+        }
+        self.table = list_value_table(sa.MetaData())
+        self.codes = {}
+        # {connection: {(entity_type, field): codes}} of uncommitted additions; None: re-read
+        self.pending = {}
+
+    def __getstate__(self):
+        return {"fields": self.fields, "codes": self.codes}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.table = list_value_table(sa.MetaData())
+        self.pending = {}
+
+    def read_codes(self, connection, entity_type, field):
+        """{value: code} of a field, as stored in the lookup table."""
+        table = self.table
+        query = sa.select(table.c.value, table.c.code).where(table.c.entity_type == entity_type, table.c.field == field)
+        return dict(connection.execute(query).all())
+
+    def insert_statement(self, dialect_name):
+        """INSERT into the lookup table that skips rows taken by a concurrent writer, where the dialect can."""
+        if dialect_name in ON_CONFLICT_DIALECTS:
+            return ON_CONFLICT_DIALECTS[dialect_name](self.table).on_conflict_do_nothing()
+        if dialect_name in ON_DUPLICATE_KEY_DIALECTS:
+            return ON_DUPLICATE_KEY_DIALECTS[dialect_name](self.table).prefix_with("IGNORE")
+        return self.table.insert()
+
+    def add_values(self, connection, entity_type, field, values):
+        """Append values missing from the lookup table; returns the field's {value: code}.
+
+        New values take max + 1 codes with an insert that skips conflicts, and
+        the codes are re-read until every value has one: a process adding a
+        value at the same time either gave it the same code, or took the code
+        and the value moves on to the next free one.
+        """
+        key = (entity_type, field)
+        insert = self.insert_statement(connection.dialect.name)
+        added = False
+        while True:
+            codes = self.read_codes(connection, entity_type, field)
+            missing = sorted(value for value in values if value not in codes)
+            if not missing:
+                break
+            next_code = max(codes.values(), default=0) + 1
+            rows = [
+                {"entity_type": entity_type, "field": field, "code": code, "value": value}
+                for code, value in enumerate(missing, start=next_code)
+            ]
+            connection.execute(insert, rows)
+            added = True
+        if added or key in self.pending.get(connection, {}):
+            self.hold(connection, key, codes)
+        else:
+            self.codes[key] = codes
+        return codes
+
+    def hold(self, connection, key, codes):
+        """Keep codes added on connection out of the cache until its transaction commits."""
+        if connection not in self.pending:
+            self.pending[connection] = {}
+            if not sa.event.contains(connection, "commit", self.committed):
+                sa.event.listen(connection, "commit", self.committed)
+                sa.event.listen(connection, "rollback", self.rolled_back)
+                sa.event.listen(connection, "rollback_savepoint", self.savepoint_rolled_back)
+        self.pending[connection][key] = codes
+
+    def committed(self, connection):
+        for key, codes in self.pending.pop(connection, {}).items():
+            if codes is None:
+                self.codes.pop(key, None)
+            else:
+                self.codes[key] = codes
+
+    def rolled_back(self, connection):
+        self.pending.pop(connection, None)
+
+    def savepoint_rolled_back(self, connection, name, context):
+        # additions inside the savepoint are gone; re-read the fields until commit
+        pending = self.pending.get(connection, {})
+        for key in pending:
+            pending[key] = None
+
+    def encode_rows(self, connection, entity_type, rows):
+        """Copy of rows with the list values of entity_type replaced by their codes.
+
+        Only str values are translated, so rows already holding codes pass through.
+        """
+        columns = self.fields.get(entity_type)
+        if not columns or not rows:
+            return rows
+        rows = [dict(row) for row in rows]
+        pending = self.pending.get(connection, {})
+        for column, field in columns.items():
+            values = {row[column] for row in rows if isinstance(row.get(column), str)}
+            if not values:
+                continue
+            key = (entity_type, field)
+            codes = pending[key] if key in pending else self.codes.get(key)
+            if codes is None or not values <= codes.keys():
+                codes = self.add_values(connection, entity_type, field, values)
+            for row in rows:
+                if isinstance(row.get(column), str):
+                    row[column] = codes[row[column]]
+        return rows
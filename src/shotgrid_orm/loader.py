@@ -0,0 +1,466 @@
+import json
+from datetime import date
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from .connection import DEFAULT_BACKOFF, DEFAULT_RETRIES, call_with_retry
+from .control import LOAD_DONE, LOAD_RUNNING, create_control_tables, load_checkpoint, read_row, utcnow, write_row
+
+__all__ = [
+    "DEFAULT_BATCH_SIZE",
+    "DEFAULT_PAGE_SIZE",
+    "DEFAULT_UPSERT_BATCH_SIZE",
+    "RETIRED_COLUMN",
+    "delete_rows",
+    "flatten_record",
+    "id_ranges",
+    "insert_rows",
+    "iter_pages",
+    "load_entity",
+    "read_checkpoints",
+    "replace_rows",
+    "reset_checkpoint",
+    "sg_field_map",
+    "upsert_rows",
+    "upsert_statement",
+]
+
+DEFAULT_PAGE_SIZE = 500  # the SG API caps find() pages at 500 records
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_UPSERT_BATCH_SIZE = 1000
+
+# dialects with a native "insert or update" statement
+ON_CONFLICT_DIALECTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+ON_DUPLICATE_KEY_DIALECTS = {"mysql": mysql.insert, "mariadb": mysql.insert}
+
+ID_ORDER = [{"field_name": "id", "direction": "asc"}]
+ID_ORDER_DESC = [{"field_name": "id", "direction": "desc"}]
+
+# soft-delete flag SGORM(retired_column=True) adds to every entity table
+RETIRED_COLUMN = "retired"
+
+
+def sg_field_map(t_def, table, link_tables=None):
+    """Map each SG field of an entity to the columns SGORM generated for it.
+
+    Returns {sg_field: (data_type, {role: column_name})}, where role is "value"
+    for scalar fields and "id"/"ids"/"type" for entity and multi_entity fields.
+    multi_entity fields stored in a link table ({sg_field: Table} in
+    link_tables) get a single "link" role holding that Table instead.
+    Fields without a column on table (ignored or unsupported) are left out.
+    """
+    link_tables = link_tables or {}
+    field_map = {}
+    columns = table.columns
+    for field, field_def in (t_def.get("fields") or {}).items():
+        data_type = field_def.get("data_type", {}).get("value")
+        field_code = f"_{field}" if field == "metadata" else field
+        if data_type == "entity":
+            roles = {"id": f"{field_code}_id", "type": f"{field_code}_type"}
+        elif data_type == "multi_entity":
+            roles = {"ids": f"{field_code}_ids", "type": f"{field_code}_type"}
+        else:
+            roles = {"value": field_code}
+        roles = {role: name for role, name in roles.items() if name in columns}
+        if data_type == "multi_entity" and field in link_tables:
+            roles = {"link": link_tables[field]}
+        if roles:
+            field_map[field] = (data_type, roles)
+    return field_map
+
+
+def coerce_value(value, column):
+    """Convert a SG API value to something column accepts.
+
+    dicts/lists are JSON-encoded unless the column is JSON, and SG date strings
+    ("YYYY-MM-DD") become dates for Date columns.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (dict, list)) and not isinstance(column.type, sa.JSON):
+        return json.dumps(value, sort_keys=True, default=str)
+    if isinstance(value, str) and isinstance(column.type, sa.Date):
+        return date.fromisoformat(value)
+    return value
+
+
+def flatten_record(record, field_map, table):
+    """Flatten a SG record into a {column_name: value} row for table.
+
+    entity fields become <field>_id (+ <field>_type), multi_entity fields a
+    comma-separated <field>_ids (+ a matching comma-separated <field>_type), or
+    JSON lists when those columns are JSON.
+    """
+    row = {}
+    columns = table.columns
+    if RETIRED_COLUMN in columns and RETIRED_COLUMN not in field_map:
+        # SG only returns active records
+        row[RETIRED_COLUMN] = False
+    for field, (data_type, roles) in field_map.items():
+        value = record.get(field)
+        if data_type == "entity":
+            if "id" in roles:
+                row[roles["id"]] = value.get("id") if value else None
+            if "type" in roles:
+                row[roles["type"]] = value.get("type") if value else None
+        elif data_type == "multi_entity":
+            value = value or []
+            for role, key in (("ids", "id"), ("type", "type")):
+                if role in roles:
+                    items = [v[key] for v in value]
+                    if isinstance(columns[roles[role]].type, sa.JSON):
+                        row[roles[role]] = items
+                    else:
+                        row[roles[role]] = ",".join(str(item) for item in items) if items else None
+        else:
+            row[roles["value"]] = coerce_value(value, columns[roles["value"]])
+    return row
+
+
+def iter_pages(
+    sg,
+    entity_type,
+    filters=None,
+    fields=None,
+    page_size=DEFAULT_PAGE_SIZE,
+    after_id=0,
+    retries=DEFAULT_RETRIES,
+    backoff=DEFAULT_BACKOFF,
+    retired_only=False,
+):
+    """Yield pages of records ordered by id.
+
+    Pages are fetched by id keyset ("id greater_than <last id>") rather than by
+    page number, so deep pages cost the site the same as the first one.
+    retired_only pages through retired records instead.
+    """
+    filters = list(filters or [])
+    last_id = after_id
+    while True:
+        page = call_with_retry(
+            sg.find,
+            entity_type,
+            filters + [["id", "greater_than", last_id]],
+            fields,
+            order=ID_ORDER,
+            limit=page_size,
+            retries=retries,
+            backoff=backoff,
+            **({"retired_only": True} if retired_only else {}),
+        )
+        if not page:
+            return
+        yield page
+        last_id = page[-1]["id"]
+        if len(page) < page_size:
+            return
+
+
+def id_ranges(
+    sg,
+    entity_type,
+    filters=None,
+    parts=1,
+    page_size=DEFAULT_PAGE_SIZE,
+    retries=DEFAULT_RETRIES,
+    backoff=DEFAULT_BACKOFF,
+):
+    """Split the id space of entity_type into up to `parts` contiguous (first, last) ranges.
+
+    Probes the min and max id (two find_one calls) and never makes a range
+    narrower than page_size ids. Returns [] when there are no records.
+    """
+    filters = list(filters or [])
+    first = call_with_retry(sg.find_one, entity_type, filters, ["id"], order=ID_ORDER, retries=retries, backoff=backoff)
+    if not first:
+        return []
+    last = call_with_retry(
+        sg.find_one, entity_type, filters, ["id"], order=ID_ORDER_DESC, retries=retries, backoff=backoff
+    )
+    low, high = first["id"], last["id"]
+    span = high - low + 1
+    parts = max(1, min(parts, -(-span // page_size)))
+    step = -(-span // parts)
+    return [(start, min(start + step - 1, high)) for start in range(low, high + 1, step)]
+
+
+def range_filters(filters, first_id, last_id):
+    """filters restricted to ids in [first_id, last_id]; use with iter_pages(after_id=first_id - 1)."""
+    return list(filters or []) + [["id", "less_than", last_id + 1]]
+
+
+def insert_rows(connection, table, rows):
+    """Insert rows with a single executemany INSERT."""
+    if rows:
+        connection.execute(table.insert(), rows)
+    return len(rows)
+
+
+def replace_rows(connection, table, rows):
+    """Upsert rows by primary key on any dialect: UPDATE the keys that exist, INSERT the others.
+
+    rows must have the same keys (upsert_rows groups them so). Only those
+    columns are updated, and existing rows are never deleted, so rows other
+    tables reference through FKs can be upserted too. With repeated keys the
+    last row wins.
+    """
+    if not rows:
+        return 0
+    primary_key = [column.name for column in table.primary_key.columns]
+
+    def key(row):
+        return tuple(row[name] for name in primary_key)
+
+    by_key = {key(row): row for row in rows}
+    key_columns = [table.c[name] for name in primary_key]
+    if len(key_columns) == 1:
+        match = key_columns[0].in_([k[0] for k in by_key])
+    else:
+        match = sa.or_(*[sa.and_(*[c == v for c, v in zip(key_columns, k)]) for k in by_key])
+    existing = {tuple(found) for found in connection.execute(sa.select(*key_columns).where(match))}
+
+    update_columns = [name for name in rows[0] if name not in primary_key]
+    updates = [row for k, row in by_key.items() if k in existing]
+    if updates and update_columns:
+        stmt = (
+            table.update()
+            .where(*[table.c[name] == sa.bindparam(f"key_{name}") for name in primary_key])
+            .values({name: sa.bindparam(f"value_{name}") for name in update_columns})
+        )
+        params = [
+            dict(
+                {f"key_{name}": row[name] for name in primary_key},
+                **{f"value_{name}": row[name] for name in update_columns},
+            )
+            for row in updates
+        ]
+        connection.execute(stmt, params)
+    inserts = [row for k, row in by_key.items() if k not in existing]
+    if inserts:
+        connection.execute(table.insert(), inserts)
+    return len(rows)
+
+
+def instance_row(instance):
+    """Column values set on a mapped instance, as a {column_name: value} row."""
+    state = sa.inspect(instance)
+    return {attr.columns[0].name: state.dict[attr.key] for attr in state.mapper.column_attrs if attr.key in state.dict}
+
+
+def upsert_statement(table, columns, dialect_name):
+    """INSERT ... ON CONFLICT / ON DUPLICATE KEY UPDATE of columns for dialect_name.
+
+    Returns None for dialects without a native upsert.
+    """
+    primary_key = [column.name for column in table.primary_key.columns]
+    update_columns = [name for name in columns if name not in primary_key]
+
+    if dialect_name in ON_CONFLICT_DIALECTS:
+        stmt = ON_CONFLICT_DIALECTS[dialect_name](table)
+        if not update_columns:
+            return stmt.on_conflict_do_nothing(index_elements=primary_key)
+        return stmt.on_conflict_do_update(
+            index_elements=primary_key, set_={name: stmt.excluded[name] for name in update_columns}
+        )
+
+    if dialect_name in ON_DUPLICATE_KEY_DIALECTS:
+        stmt = ON_DUPLICATE_KEY_DIALECTS[dialect_name](table)
+        # MySQL has no DO NOTHING; re-assigning the key is a no-op update
+        update_columns = update_columns or primary_key[:1]
+        return stmt.on_duplicate_key_update({name: stmt.inserted[name] for name in update_columns})
+
+    return None
+
+
+def upsert_rows(connection, table, rows, batch_size=DEFAULT_UPSERT_BATCH_SIZE):
+    """Insert rows, updating the ones whose primary key already exists.
+
+    Uses INSERT ... ON CONFLICT DO UPDATE on PostgreSQL/SQLite and INSERT ... ON
+    DUPLICATE KEY UPDATE on MySQL/MariaDB, executed in executemany chunks of
+    batch_size; other dialects fall back to replace_rows. Only the columns
+    present in a row are updated, so partial rows never null out other columns.
+    """
+    dialect_name = connection.dialect.name
+    by_columns = {}
+    for row in rows:
+        by_columns.setdefault(tuple(row), []).append(row)
+
+    for columns, group in by_columns.items():
+        stmt = upsert_statement(table, columns, dialect_name)
+        size = batch_size or len(group)
+        for start in range(0, len(group), size):
+            chunk = group[start : start + size]
+            if stmt is None:
+                replace_rows(connection, table, chunk)
+            else:
+                connection.execute(stmt, chunk)
+    return len(rows)
+
+
+def add_link_rows(links, record, field_map):
+    """Append the link table rows of record's multi_entity fields to links ({link_table: rows}).
+
+    Every link table gets an entry, even when record links nothing, so
+    replace_links also clears links that were removed in SG.
+    """
+    for field, (_, roles) in field_map.items():
+        if "link" in roles:
+            links.setdefault(roles["link"], []).extend(
+                {"source_id": record["id"], "target_id": value["id"], "target_type": value["type"], "ordinal": ordinal}
+                for ordinal, value in enumerate(record.get(field) or [])
+            )
+    return links
+
+
+def replace_links(connection, links, source_ids):
+    """Replace the links of source_ids: delete the rows they had, then insert links ({link_table: rows})."""
+    for link_table, rows in links.items():
+        connection.execute(link_table.delete().where(link_table.c.source_id.in_(source_ids)))
+        if rows:
+            connection.execute(link_table.insert(), rows)
+
+
+def unlink_rows(connection, table, ids):
+    """Remove the references to the rows of table with the given ids (a list or a SELECT of ids).
+
+    Generated FK columns pointing at them are set to NULL, as SG stops
+    returning links to retired records, and link table rows keyed on them are
+    deleted, so databases enforcing FKs accept deleting the rows.
+    """
+    target = f"{table.name}.id"
+    for other in table.metadata.tables.values():
+        for fk in other.foreign_keys:
+            if fk.target_fullname != target:
+                continue
+            column = fk.parent
+            if column.primary_key:
+                connection.execute(other.delete().where(column.in_(ids)))
+            else:
+                connection.execute(other.update().where(column.in_(ids)).values({column.name: None}))
+
+
+def delete_rows(connection, table, ids, link_tables=None):
+    """Delete the rows of table with the given ids, and their link table rows first.
+
+    References to the rows are removed first (see unlink_rows). Tables with a
+    soft-delete column (RETIRED_COLUMN) keep the rows, links and references
+    and flag the rows as retired instead.
+    """
+    if RETIRED_COLUMN in table.c:
+        retired = table.c[RETIRED_COLUMN]
+        query = table.update().where(table.c.id.in_(ids), sa.or_(retired.is_(None), retired == sa.false()))
+        return connection.execute(query.values({RETIRED_COLUMN: True})).rowcount
+    for link_table in (link_tables or {}).values():
+        connection.execute(link_table.delete().where(link_table.c.source_id.in_(ids)))
+    unlink_rows(connection, table, ids)
+    return connection.execute(table.delete().where(table.c.id.in_(ids))).rowcount
+
+
+def write_batch(connection, table, rows, links=None, write=insert_rows, encoder=None):
+    """Write a batch of entity rows with write, then replace their link table rows.
+
+    encoder (a lists.ListEncoder) translates list values to codes first.
+    """
+    if encoder is not None:
+        rows = encoder.encode_rows(connection, table.name, rows)
+    written = write(connection, table, rows)
+    if links:
+        replace_links(connection, links, [row["id"] for row in rows])
+    return written
+
+
+def load_entity(
+    sg,
+    engine,
+    entity_type,
+    table,
+    t_def,
+    filters=None,
+    page_size=DEFAULT_PAGE_SIZE,
+    batch_size=DEFAULT_BATCH_SIZE,
+    retries=DEFAULT_RETRIES,
+    backoff=DEFAULT_BACKOFF,
+    write=insert_rows,
+    after_id=0,
+    checkpoint=False,
+    link_tables=None,
+    encoder=None,
+):
+    """Stream every record of entity_type from SG into table.
+
+    Rows are written in batches of about batch_size, each in its own
+    transaction, so memory stays bounded by batch_size + page_size rows no
+    matter how large the entity is. Only records with an id above after_id are
+    loaded. multi_entity fields with a link table in link_tables are written to
+    it in the same transaction. Returns {"entity", "fetched", "written"}.
+
+    With checkpoint=True the last id committed is recorded in the
+    sg_load_checkpoint table in the same transaction as each batch, and a load
+    left unfinished by an earlier run resumes right after it ("resumed_from" in
+    the returned stats). Use an idempotent write (upsert_rows) with it.
+    """
+    field_map = sg_field_map(t_def, table, link_tables)
+    fields = [field for field in field_map if field != "id"]
+    stats = {"entity": entity_type, "fetched": 0, "written": 0}
+
+    progress = None
+    if checkpoint:
+        create_control_tables(engine)
+        with engine.connect() as connection:
+            progress = read_row(connection, load_checkpoint, entity_type=entity_type)
+        if progress and progress["status"] == LOAD_RUNNING:
+            after_id = max(after_id, progress["last_id"])
+        else:
+            progress = {"last_id": after_id, "rows": 0, "started_at": utcnow()}
+        stats["resumed_from"] = after_id
+
+    def commit(batch, links, status=LOAD_RUNNING):
+        with engine.begin() as connection:
+            written = write_batch(connection, table, batch, links, write, encoder) if batch else 0
+            if progress is not None:
+                progress.update(last_id=last_id, rows=progress["rows"] + written)
+                values = {
+                    "last_id": last_id,
+                    "rows": progress["rows"],
+                    "status": status,
+                    "started_at": progress["started_at"],
+                    "updated_at": utcnow(),
+                }
+                write_row(connection, load_checkpoint, {"entity_type": entity_type}, values)
+        stats["written"] += written
+
+    batch, links = [], {}
+    last_id = after_id
+    for page in iter_pages(sg, entity_type, filters, fields, page_size, after_id, retries, backoff):
+        stats["fetched"] += len(page)
+        for record in page:
+            batch.append(flatten_record(record, field_map, table))
+            add_link_rows(links, record, field_map)
+        last_id = page[-1]["id"]
+        if len(batch) >= batch_size:
+            commit(batch, links)
+            batch, links = [], {}
+
+    if batch or progress is not None:
+        commit(batch, links, LOAD_DONE)
+
+    return stats
+
+
+def reset_checkpoint(engine, entity_type=None):
+    """Forget the load checkpoint of entity_type (or of all entities) so the next load starts over."""
+    create_control_tables(engine)
+    with engine.begin() as connection:
+        query = load_checkpoint.delete()
+        if entity_type:
+            query = query.where(load_checkpoint.c.entity_type == entity_type)
+        connection.execute(query)
+
+
+def read_checkpoints(engine):
+    """Return {entity_type: checkpoint row} for every checkpointed load."""
+    create_control_tables(engine)
+    with engine.connect() as connection:
+        rows = connection.execute(sa.select(load_checkpoint)).mappings().all()
+    return {row["entity_type"]: dict(row) for row in rows}
@@ -0,0 +1,137 @@
+import os
+
+from alembic.autogenerate import renderers
+from alembic.operations import Operations, ops
+from sqlalchemy.engine import make_url
+
+from .classes import DEFAULT_SCHEMA_FILE, SGORM, SchemaType
+from .control import CONTROL_METADATA
+from .retirement import LIVE_IDS_TABLE
+
+__all__ = [
+    "SCHEMA_FILE_ENV",
+    "SCHEMA_FILE_OPTION",
+    "CreateIndexConcurrentlyOp",
+    "configure_context",
+    "include_object",
+    "online_safe_ops",
+    "process_revision_directives",
+    "sgorm_from_config",
+]
+
+# alembic.ini [alembic] option / environment variable naming the SG schema JSON of env.py
+SCHEMA_FILE_OPTION = "sg_schema_file"
+SCHEMA_FILE_ENV = "SG_SCHEMA_FILE"
+
+
+@Operations.register_operation("create_index_concurrently")
+class CreateIndexConcurrentlyOp(ops.CreateIndexOp):
+    """CREATE INDEX CONCURRENTLY on PostgreSQL, run outside the migration's transaction.
+
+    Builds the index without blocking writes to the table. Rendered as
+    op.create_index_concurrently(); importing shotgrid_orm registers it.
+    """
+
+    @classmethod
+    def create_index_concurrently(cls, operations, index_name, table_name, columns, **kw):
+        return operations.invoke(cls(index_name, table_name, columns, **kw))
+
+    @classmethod
+    def from_create_index(cls, op):
+        return cls(op.index_name, op.table_name, op.columns, schema=op.schema, unique=op.unique, **op.kw)
+
+
+@Operations.implementation_for(CreateIndexConcurrentlyOp)
+def create_index_concurrently(operations, operation):
+    kw = dict(operation.kw, schema=operation.schema, unique=operation.unique)
+    if operations.get_context().dialect.name != "postgresql":
+        operations.create_index(operation.index_name, operation.table_name, operation.columns, **kw)
+        return
+    with operations.get_context().autocommit_block():
+        operations.create_index(
+            operation.index_name, operation.table_name, operation.columns, postgresql_concurrently=True, **kw
+        )
+
+
+@renderers.dispatch_for(CreateIndexConcurrentlyOp)
+def render_create_index_concurrently(autogen_context, op):
+    columns = [getattr(column, "name", str(column)) for column in op.columns]
+    args = [repr(op.index_name), repr(op.table_name), repr(columns)]
+    if op.unique:
+        args.append("unique=True")
+    if op.schema:
+        args.append(f"schema={op.schema!r}")
+    return f"op.create_index_concurrently({', '.join(args)})"
+
+
+def online_safe_ops(operations, new_tables):
+    """Rewrite a list of migration ops so they don't lock large PostgreSQL tables.
+
+    Indexes on existing tables are built concurrently, and added columns are
+    nullable, which PostgreSQL adds as a catalog-only change without rewriting
+    the table. Tables in new_tables are created in the same migration and left
+    alone.
+    """
+    rewritten = []
+    for op in operations:
+        if isinstance(op, ops.ModifyTableOps):
+            op.ops = online_safe_ops(op.ops, new_tables)
+        elif isinstance(op, ops.CreateIndexOp) and op.table_name not in new_tables:
+            op = CreateIndexConcurrentlyOp.from_create_index(op)
+        elif isinstance(op, ops.AddColumnOp) and op.column.server_default is None:
+            op.column.nullable = True
+        rewritten.append(op)
+    return rewritten
+
+
+def process_revision_directives(context, revision, directives):
+    """Alembic hook making autogenerated PostgreSQL migrations online-safe (see online_safe_ops)."""
+    if context.dialect.name != "postgresql":
+        return
+    for script in directives:
+        for upgrade_ops in script.upgrade_ops_list:
+            new_tables = {op.table_name for op in upgrade_ops.ops if isinstance(op, ops.CreateTableOp)}
+            upgrade_ops.ops = online_safe_ops(upgrade_ops.ops, new_tables)
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    """Keep autogenerate from dropping the loaders' control tables, which live outside the SG model."""
+    if type_ == "table" and reflected and compare_to is None:
+        return name not in CONTROL_METADATA.tables and name != LIVE_IDS_TABLE
+    return True
+
+
+def sgorm_from_config(config, **kwargs):
+    """SGORM over the schema JSON an Alembic config points to.
+
+    The file is the sg_schema_file option of the [alembic] section, else the
+    SG_SCHEMA_FILE environment variable, else schema.json. kwargs are passed to
+    SGORM and must match the options the database was built with (link_tables,
+    index_policy, ...). The model is never lazy, so autogenerate sees every
+    table.
+    """
+    schema_file = config.get_main_option(SCHEMA_FILE_OPTION) or os.environ.get(SCHEMA_FILE_ENV) or DEFAULT_SCHEMA_FILE
+    if not os.path.isfile(schema_file):
+        raise ValueError(f"SG schema file not found: {schema_file}")
+    kwargs.setdefault("echo", False)
+    return SGORM(sg_schema_type=SchemaType.JSON_FILE, sg_schema_source=schema_file, lazy=False, **kwargs)
+
+
+def configure_context(context, target_metadata, connection=None, url=None, **kwargs):
+    """context.configure() for SGORM metadata.
+
+    Uses batch mode (render_as_batch) on SQLite, which can't alter most
+    columns in place, makes PostgreSQL migrations online-safe
+    (process_revision_directives) and ignores the control tables. kwargs
+    override or extend these options.
+    """
+    dialect_name = connection.dialect.name if connection is not None else make_url(url).get_backend_name()
+    options = {
+        "target_metadata": target_metadata,
+        "render_as_batch": dialect_name == "sqlite",
+        "process_revision_directives": process_revision_directives,
+        "include_object": include_object,
+        "compare_type": True,
+    }
+    options.update(kwargs)
+    context.configure(connection=connection, url=url, **options)
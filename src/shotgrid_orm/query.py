@@ -0,0 +1,292 @@
+import json
+from datetime import date, datetime
+
+import sqlalchemy as sa
+
+from .lists import LIST_TYPES
+from .loader import DEFAULT_PAGE_SIZE, ID_ORDER, RETIRED_COLUMN, coerce_value, sg_field_map
+
+__all__ = [
+    "LocalQuery",
+]
+
+# SG types whose values the default type profile stores JSON-encoded in String columns
+JSON_ENCODED_TYPES = ("serializable", "url", "tag_list")
+
+
+class LocalQuery:
+    """Translate sg.find arguments into SQL over a mirrored entity table.
+
+    Understands the Shotgun filter syntax (conditions, nested
+    {"filter_operator", "filters"} groups, "any"/"all") for scalar, entity and
+    multi_entity fields and returns SG-shaped dicts. link_tables and encoder
+    are the link tables and ListEncoder the loaders wrote the table with.
+    """
+
+    def __init__(self, entity_type, table, t_def, link_tables=None, encoder=None):
+        self.entity_type = entity_type
+        self.table = table
+        self.field_map = sg_field_map(t_def, table, link_tables)
+        self.encoder = encoder
+        # the type of single-type entity/multi_entity fields, which have no _type column
+        self.targets = {}
+        for field, field_def in (t_def.get("fields") or {}).items():
+            valid_types = field_def.get("properties", {}).get("valid_types", {}).get("value") or []
+            if len(valid_types) == 1:
+                self.targets[field] = valid_types[0]
+
+    def select(self, filters=None, fields=None, order=None, filter_operator=None, limit=0, page=0):
+        columns = [self.table.c.id]
+        for field in fields or []:
+            _, roles = self.field_map.get(field, (None, {}))
+            columns.extend(self.table.c[name] for role, name in roles.items() if role != "link")
+        query = sa.select(*dict.fromkeys(columns)).where(self.where(filters or [], filter_operator), self.active())
+        for item in order or ID_ORDER:
+            column = self.order_column(item["field_name"])
+            query = query.order_by(column.desc() if item.get("direction") == "desc" else column.asc())
+        if page and not limit:
+            limit = DEFAULT_PAGE_SIZE
+        if limit:
+            query = query.limit(limit).offset((max(page, 1) - 1) * limit)
+        return query
+
+    def find(self, connection, filters=None, fields=None, order=None, filter_operator=None, limit=0, page=0):
+        """Run the query on connection; returns a list of SG-shaped dicts."""
+        fields = [field for field in fields or [] if field not in ("type", "id")]
+        query = self.select(filters, fields, order, filter_operator, limit, page)
+        rows = connection.execute(query).mappings().all()
+        return self.shape(connection, rows, fields)
+
+    # filters
+
+    def where(self, filters, filter_operator=None):
+        clauses = [self.condition(condition) for condition in filters]
+        if not clauses:
+            return sa.true()
+        return sa.or_(*clauses) if filter_operator in ("any", "or") else sa.and_(*clauses)
+
+    def active(self):
+        """Exclude rows soft-deleted as retired, as sg.find never returns retired records."""
+        if RETIRED_COLUMN not in self.table.c or RETIRED_COLUMN in self.field_map:
+            return sa.true()
+        retired = self.table.c[RETIRED_COLUMN]
+        return sa.or_(retired.is_(None), retired == sa.false())
+
+    def condition(self, condition):
+        if isinstance(condition, dict):
+            filters = condition.get("filters", condition.get("conditions", []))
+            return self.where(filters, condition.get("filter_operator", condition.get("logical_operator")))
+        field, operator, *values = condition
+        value = values[0] if len(values) == 1 else values
+
+        if field == "id":
+            return self.scalar_condition(self.table.c.id, operator, value)
+        if field not in self.field_map:
+            raise ValueError(f"{self.entity_type} has no mirrored field {field!r}")
+        data_type, roles = self.field_map[field]
+        if data_type == "entity":
+            return self.entity_condition(field, roles, operator, value)
+        if data_type == "multi_entity":
+            return self.multi_entity_condition(field, roles, operator, value)
+        column = self.table.c[roles["value"]]
+        if data_type in LIST_TYPES and self.encoded(field):
+            return self.scalar_condition(column, operator, value, encode=lambda v: self.code_of(field, v))
+        return self.scalar_condition(column, operator, value, encode=lambda v: coerce_value(v, column))
+
+    def scalar_condition(self, column, operator, value, encode=None):
+        encode = encode or (lambda v: v)
+        if operator == "is":
+            return column.is_(None) if value is None else column == encode(value)
+        if operator == "is_not":
+            return column.is_not(None) if value is None else sa.or_(column != encode(value), column.is_(None))
+        if operator == "less_than":
+            return column < encode(value)
+        if operator == "greater_than":
+            return column > encode(value)
+        if operator in ("between", "not_between"):
+            clause = column.between(encode(value[0]), encode(value[1]))
+            return clause if operator == "between" else sa.not_(clause)
+        if operator in ("in", "not_in"):
+            clause = column.in_([encode(v) for v in as_list(value)])
+            return clause if operator == "in" else sa.or_(sa.not_(clause), column.is_(None))
+        if operator == "contains":
+            return column.icontains(value)
+        if operator == "not_contains":
+            return sa.or_(sa.not_(column.icontains(value)), column.is_(None))
+        if operator == "starts_with":
+            return column.istartswith(value)
+        if operator == "ends_with":
+            return column.iendswith(value)
+        raise ValueError(f"unsupported filter operator: {operator}")
+
+    def entity_condition(self, field, roles, operator, value):
+        id_column = self.table.c[roles["id"]]
+        type_column = self.table.c[roles["type"]] if "type" in roles else None
+
+        def matches(entity):
+            if entity is None:
+                return id_column.is_(None)
+            clause = id_column == entity["id"]
+            if type_column is not None:
+                clause = sa.and_(clause, type_column == entity["type"])
+            elif entity["type"] != self.targets.get(field):
+                clause = sa.false()
+            return clause
+
+        if operator in ("is", "is_not"):
+            clause = matches(value)
+        elif operator in ("in", "not_in"):
+            clause = sa.or_(sa.false(), *[matches(entity) for entity in as_list(value)])
+        elif operator in ("type_is", "type_is_not"):
+            if type_column is not None:
+                clause = type_column == value
+            else:
+                clause = sa.and_(id_column.is_not(None), sa.true() if value == self.targets.get(field) else sa.false())
+        else:
+            raise ValueError(f"unsupported filter operator for entity fields: {operator}")
+        if operator in ("is", "in", "type_is"):
+            return clause
+        return sa.or_(sa.not_(clause), id_column.is_(None)) if value is not None else sa.not_(clause)
+
+    def multi_entity_condition(self, field, roles, operator, value):
+        if operator not in ("is", "is_not", "in", "not_in"):
+            raise ValueError(f"unsupported filter operator for multi_entity fields: {operator}")
+        entities = as_list(value) if operator in ("in", "not_in") else [value]
+
+        if "link" in roles:
+            link = roles["link"]
+            linked = sa.select(link.c.source_id).where(link.c.source_id == self.table.c.id)
+            if entities == [None]:
+                clause = sa.not_(sa.exists(linked))
+            else:
+                clause = sa.exists(
+                    linked.where(
+                        sa.or_(
+                            *[
+                                sa.and_(link.c.target_id == entity["id"], link.c.target_type == entity["type"])
+                                for entity in entities
+                            ]
+                        )
+                    )
+                )
+        elif "ids" in roles:
+            column = self.table.c[roles["ids"]]
+            if isinstance(column.type, sa.JSON):
+                raise ValueError(f"filtering on JSON multi_entity column {column.name} is not supported")
+            if entities == [None]:
+                clause = column.is_(None)
+            elif "type" in roles:
+                # ids and types are parallel lists; LIKE can't pair an id with the type at the same position
+                raise ValueError(
+                    f"filtering on polymorphic multi_entity column {column.name} is not supported, use link_tables"
+                )
+            else:
+                padded = sa.literal(",") + column + sa.literal(",")
+                target = self.targets.get(field)
+                clause = sa.or_(
+                    sa.false(),
+                    *[padded.like(f"%,{entity['id']},%") for entity in entities if entity["type"] == target],
+                )
+        else:
+            raise ValueError(f"{self.entity_type}.{field} is not filterable")
+        return clause if operator in ("is", "in") else sa.not_(clause)
+
+    def order_column(self, field):
+        if field == "id":
+            return self.table.c.id
+        if field not in self.field_map:
+            raise ValueError(f"{self.entity_type} has no mirrored field {field!r}")
+        _, roles = self.field_map[field]
+        name = roles.get("value") or roles.get("id")
+        if name is None:
+            raise ValueError(f"can't order by {self.entity_type}.{field}")
+        return self.table.c[name]
+
+    # list encoding
+
+    def encoded(self, field):
+        return self.encoder is not None and field in self.encoder.fields.get(self.entity_type, {}).values()
+
+    def code_of(self, field, value):
+        lookup = self.encoder.table
+        return (
+            sa.select(lookup.c.code)
+            .where(lookup.c.entity_type == self.entity_type, lookup.c.field == field, lookup.c.value == value)
+            .scalar_subquery()
+        )
+
+    # results
+
+    def shape(self, connection, rows, fields):
+        links = self.read_links(connection, rows, fields)
+        values = {}
+        for field in fields:
+            data_type, _ = self.field_map.get(field, (None, {}))
+            if data_type in LIST_TYPES and self.encoded(field):
+                codes = self.encoder.read_codes(connection, self.entity_type, field)
+                values[field] = {code: value for value, code in codes.items()}
+        return [
+            dict({"type": self.entity_type, "id": row["id"]}, **{f: self.value(row, f, links, values) for f in fields})
+            for row in rows
+        ]
+
+    def read_links(self, connection, rows, fields):
+        """{field: {source_id: [entity dicts]}} for the requested link-table fields."""
+        links = {}
+        source_ids = [row["id"] for row in rows]
+        for field in fields:
+            _, roles = self.field_map.get(field, (None, {}))
+            if "link" not in roles or not source_ids:
+                continue
+            link = roles["link"]
+            query = (
+                sa.select(link.c.source_id, link.c.target_id, link.c.target_type)
+                .where(link.c.source_id.in_(source_ids))
+                .order_by(link.c.source_id, link.c.ordinal)
+            )
+            by_source = links.setdefault(field, {})
+            for source_id, target_id, target_type in connection.execute(query):
+                by_source.setdefault(source_id, []).append({"type": target_type, "id": target_id})
+        return links
+
+    def value(self, row, field, links, values):
+        if field not in self.field_map:
+            return None
+        data_type, roles = self.field_map[field]
+        if data_type == "entity":
+            entity_id = row[roles["id"]]
+            if entity_id is None:
+                return None
+            entity_type = row[roles["type"]] if "type" in roles else self.targets.get(field)
+            return {"type": entity_type, "id": entity_id}
+        if data_type == "multi_entity":
+            if "link" in roles:
+                return links.get(field, {}).get(row["id"], [])
+            return split_entities(row.get(roles.get("ids")), row.get(roles.get("type")), self.targets.get(field))
+        value = row[roles["value"]]
+        if field in values:
+            return values[field].get(value)
+        if isinstance(value, date) and not isinstance(value, datetime):
+            return value.isoformat()
+        if data_type in JSON_ENCODED_TYPES and isinstance(value, str):
+            try:
+                return json.loads(value)
+            except ValueError:
+                return value
+        return value
+
+
+def as_list(value):
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+def split_entities(ids, types, target=None):
+    """Entity dicts from multi_entity ids/types stored as comma-separated strings or JSON lists."""
+    if not ids:
+        return []
+    if isinstance(ids, str):
+        ids = [int(i) for i in ids.split(",")]
+    if isinstance(types, str):
+        types = types.split(",")
+    types = types or [target] * len(ids)
+    return [{"type": entity_type, "id": entity_id} for entity_id, entity_type in zip(ids, types)]
@@ -0,0 +1,269 @@
+import hashlib
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from datetime import timedelta
+
+import sqlalchemy as sa
+
+from .connection import DEFAULT_BACKOFF, DEFAULT_RETRIES, ThreadLocalConnections, call_with_retry
+from .control import create_control_tables, fetch_claim, read_row, row_fetch, utcnow
+from .loader import add_link_rows, delete_rows, flatten_record, upsert_rows, write_batch
+
+__all__ = [
+    "DEFAULT_CLAIM_POLL",
+    "DEFAULT_CLAIM_TIMEOUT",
+    "DEFAULT_MAX_AGE",
+    "ReadThrough",
+    "SingleFlight",
+]
+
+# seconds a mirrored record is served without asking SG again
+DEFAULT_MAX_AGE = 300
+
+# seconds a claim on a miss holds off other processes before they take it over
+DEFAULT_CLAIM_TIMEOUT = 30
+
+# seconds between checks of a miss another process is fetching
+DEFAULT_CLAIM_POLL = 0.05
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into a single execution.
+
+    The first caller of do(key, func) runs func; callers arriving while it runs
+    wait for it and get the same result (or exception) instead of calling func
+    themselves.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result()
+        try:
+            future.set_result(func())
+        except BaseException as error:
+            future.set_exception(error)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return future.result()
+
+
+class ReadThrough:
+    """Serves lookups from the mirror, falling back to SG for missing or stale records.
+
+    sg_orm provides the generated tables and the sg.find facade over them
+    (SGORM.find). A record counts as fresh for max_age seconds after it was
+    last fetched from SG, as recorded in the sg_row_fetch control table. Misses
+    fetch every mirrored field from SG, upsert the records (and their link rows)
+    and stamp them in one transaction, then answer from the fetched records.
+
+    Concurrent misses of the same lookup share one SG call, across processes
+    too: within a process through SingleFlight, between processes through a
+    claim row in the sg_fetch_claim control table. The process holding the
+    claim fetches; the others poll the claim every claim_poll seconds and
+    answer from the mirror once it is done. A claim dropped by a failed fetch,
+    or held longer than claim_timeout, is taken over.
+
+    SG connections come from connect (one per thread), else from the
+    credentials the schema was read with, else the schema connection is shared
+    under a lock.
+    """
+
+    def __init__(
+        self,
+        sg_orm,
+        engine=None,
+        connect=None,
+        max_age=DEFAULT_MAX_AGE,
+        retries=DEFAULT_RETRIES,
+        backoff=DEFAULT_BACKOFF,
+        claim_timeout=DEFAULT_CLAIM_TIMEOUT,
+        claim_poll=DEFAULT_CLAIM_POLL,
+    ):
+        self.sg_orm = sg_orm
+        self.engine = engine or sg_orm.engine
+        self.max_age = max_age
+        self.claim_timeout = claim_timeout
+        self.claim_poll = claim_poll
+        self.owner = uuid.uuid4().hex
+        self.retries = retries
+        self.backoff = backoff
+        connect = connect or sg_orm.sg_connection_factory()
+        self.connections = ThreadLocalConnections(connect) if connect else None
+        self._sg_lock = threading.Lock()
+        self.flights = SingleFlight()
+        create_control_tables(self.engine)
+
+    def get(self, entity_type, entity_id, fields=None):
+        """Return entity_type entity_id as sg.find_one would, or None if it doesn't exist in SG."""
+        with self.engine.connect() as connection:
+            if self.fresh_ids(connection, entity_type, [entity_id]):
+                # a fresh stamp without a row records that the entity doesn't exist in SG
+                rows = self.sg_orm.local_query(entity_type).find(connection, [["id", "is", entity_id]], fields)
+                return rows[0] if rows else None
+
+        # the flight is shared by callers asking for different fields: it carries whole records
+        def fetch():
+            records = self.fetch(entity_type, [["id", "is", entity_id]], missing_ids=[entity_id])
+            return records[0] if records else None
+
+        def reread(connection):
+            rows = self.sg_orm.local_query(entity_type).find(
+                connection, [["id", "is", entity_id]], list(self.sg_orm.field_map(entity_type))
+            )
+            return rows[0] if rows else None
+
+        key = (entity_type, entity_id)
+        record = self.flights.do(key, lambda: self.claimed(key, fetch, reread))
+        return project(record, fields) if record else None
+
+    def find(self, entity_type, filters, fields=None, order=None, filter_operator=None, limit=0):
+        """sg.find served from the mirror when it has fresh matching records, else from SG.
+
+        An empty local result counts as a miss, so records created in SG after
+        the mirror was loaded are picked up, but one that merely starts to match
+        a non-empty result only shows up once the matching records go stale.
+        """
+        query = self.sg_orm.local_query(entity_type)
+        with self.engine.connect() as connection:
+            rows = query.find(connection, filters, fields, order, filter_operator, limit)
+            if rows and len(self.fresh_ids(connection, entity_type, [row["id"] for row in rows])) == len(rows):
+                return rows
+
+        def fetch():
+            return self.fetch(entity_type, filters, order, filter_operator, limit)
+
+        def reread(connection):
+            all_fields = list(self.sg_orm.field_map(entity_type))
+            return query.find(connection, filters, all_fields, order, filter_operator, limit)
+
+        key = json.dumps([entity_type, filters, order, filter_operator, limit], sort_keys=True, default=str)
+        records = self.flights.do(key, lambda: self.claimed(key, fetch, reread))
+        return [project(record, fields) for record in records]
+
+    def find_one(self, entity_type, filters, fields=None, order=None, filter_operator=None):
+        rows = self.find(entity_type, filters, fields, order, filter_operator, limit=1)
+        return rows[0] if rows else None
+
+    def claimed(self, key, fetch, reread):
+        """Run fetch() holding the claim on key, or wait for the process holding it and return reread(connection)."""
+        name = hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        while True:
+            if self.claim(name):
+                try:
+                    result = fetch()
+                except BaseException:
+                    self.release(name, done=False)
+                    raise
+                self.release(name, done=True)
+                return result
+            while True:
+                time.sleep(self.claim_poll)
+                with self.engine.connect() as connection:
+                    row = read_row(connection, fetch_claim, key=name)
+                    if row is not None and row["done_at"] is not None:
+                        return reread(connection)
+                if row is None or row["claimed_at"] < utcnow() - timedelta(seconds=self.claim_timeout):
+                    break  # dropped or abandoned: claim it
+
+    def claim(self, name):
+        """Claim the fetch of name unless another process is fetching it; returns whether it was claimed."""
+        now = utcnow()
+        values = {"owner": self.owner, "claimed_at": now, "done_at": None}
+        expired = now - timedelta(seconds=self.claim_timeout)
+        with self.engine.begin() as connection:
+            query = fetch_claim.update().where(
+                fetch_claim.c.key == name,
+                sa.or_(fetch_claim.c.done_at.is_not(None), fetch_claim.c.claimed_at < expired),
+            )
+            if connection.execute(query.values(values)).rowcount:
+                return True
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(fetch_claim.insert().values(key=name, **values))
+        except sa.exc.IntegrityError:
+            return False
+        return True
+
+    def release(self, name, done):
+        """Mark the claim on name done, or drop it so a waiting process fetches instead.
+
+        Claims done longer than claim_timeout ago have no waiters left and are
+        purged.
+        """
+        now = utcnow()
+        mine = [fetch_claim.c.key == name, fetch_claim.c.owner == self.owner]
+        with self.engine.begin() as connection:
+            if done:
+                connection.execute(fetch_claim.update().where(*mine).values(done_at=now))
+                expired = now - timedelta(seconds=self.claim_timeout)
+                connection.execute(fetch_claim.delete().where(fetch_claim.c.done_at < expired))
+            else:
+                connection.execute(fetch_claim.delete().where(*mine))
+
+    def fresh_ids(self, connection, entity_type, ids):
+        """The ids among ids fetched from SG within max_age."""
+        query = sa.select(row_fetch.c.id).where(
+            row_fetch.c.entity_type == entity_type,
+            row_fetch.c.id.in_(ids),
+            row_fetch.c.fetched_at >= utcnow() - timedelta(seconds=self.max_age),
+        )
+        return set(connection.scalars(query))
+
+    def fetch(self, entity_type, filters, order=None, filter_operator=None, limit=0, missing_ids=()):
+        """Fetch records from SG and write them back; missing_ids not returned are deleted locally."""
+        field_map = self.sg_orm.field_map(entity_type)
+        fields = [field for field in field_map if field != "id"]
+        records = self.call_sg(
+            "find", entity_type, filters, fields, order=order, filter_operator=filter_operator, limit=limit
+        )
+        self.store(entity_type, field_map, records, [i for i in missing_ids if i not in {r["id"] for r in records}])
+        return records
+
+    def store(self, entity_type, field_map, records, missing_ids=()):
+        """Upsert records, delete missing_ids and stamp them all as fetched, in one transaction."""
+        table = self.sg_orm.entity_table(entity_type)
+        rows, links = [], {}
+        for record in records:
+            rows.append(flatten_record(record, field_map, table))
+            add_link_rows(links, record, field_map)
+        ids = [row["id"] for row in rows] + list(missing_ids)
+        if not ids:
+            return
+        with self.engine.begin() as connection:
+            if rows:
+                write_batch(connection, table, rows, links, upsert_rows, self.sg_orm.list_encoder)
+            if missing_ids:
+                delete_rows(connection, table, list(missing_ids), self.sg_orm.entity_link_tables(entity_type))
+            fetched_at = utcnow()
+            stamps = [{"entity_type": entity_type, "id": entity_id, "fetched_at": fetched_at} for entity_id in ids]
+            upsert_rows(connection, row_fetch, stamps)
+
+    def call_sg(self, method, *args, **kwargs):
+        if self.connections is not None:
+            sg = self.connections.get()
+            return call_with_retry(getattr(sg, method), *args, retries=self.retries, backoff=self.backoff, **kwargs)
+        if not self.sg_orm.sg:
+            raise ValueError("no SG connection to read through to")
+        with self._sg_lock:
+            return call_with_retry(
+                getattr(self.sg_orm.sg, method), *args, retries=self.retries, backoff=self.backoff, **kwargs
+            )
+
+
+def project(record, fields):
+    """Cut a SG record down to type, id and fields, as sg.find would have returned it."""
+    fields = [field for field in fields or [] if field not in ("type", "id")]
+    return dict({"type": record["type"], "id": record["id"]}, **{field: record.get(field) for field in fields})
@@ -0,0 +1,62 @@
+import sqlalchemy as sa
+from sqlalchemy.orm import backref, object_session, relationship
+
+__all__ = [
+    "DEFAULT_RELATIONSHIP_LAZY",
+    "entity_links",
+    "entity_relationship",
+    "polymorphic_accessor",
+]
+
+DEFAULT_RELATIONSHIP_LAZY = "select"
+
+
+def entity_links(table):
+    """Split the entity columns of table into FK links and polymorphic links.
+
+    Returns ([(name, column, target_table_name)], [(name, id_column, type_column)])
+    where name is the SG field the <field>_id column was generated for.
+    """
+    foreign_keys, polymorphic = [], []
+    for column in table.columns:
+        if not column.name.endswith("_id"):
+            continue
+        name = column.name[: -len("_id")]
+        fks = list(column.foreign_keys)
+        if len(fks) == 1:
+            foreign_keys.append((name, column, fks[0].target_fullname.split(".")[0]))
+        elif not fks and f"{name}_type" in table.columns:
+            polymorphic.append((name, column, table.columns[f"{name}_type"]))
+    return foreign_keys, polymorphic
+
+
+def entity_relationship(cls, name, column, target, lazy=DEFAULT_RELATIONSHIP_LAZY):
+    """Many-to-one relationship for the FK column of cls, with a "<table>_<field>" backref on target."""
+    kwargs = {"foreign_keys": [column], "lazy": lazy}
+    backref_kwargs = {"lazy": lazy}
+    if target == cls.__table__.name:
+        # self-reference: the many-to-one side points at the id of the "remote" row
+        kwargs["remote_side"] = [cls.__table__.c.id]
+    return relationship(target, backref=backref(f"{cls.__table__.name}_{name}", **backref_kwargs), **kwargs)
+
+
+def polymorphic_accessor(id_column, type_column, classes):
+    """Property resolving a polymorphic <field>_id / <field>_type pair to the instance it points to.
+
+    Reading loads the target through the instance's session (None when detached
+    or unset); assigning an instance (or None) sets both columns.
+    """
+
+    def getter(self):
+        target_id = getattr(self, id_column)
+        target_cls = classes.get(getattr(self, type_column))
+        session = object_session(self)
+        if target_id is None or target_cls is None or session is None:
+            return None
+        return session.get(target_cls, target_id)
+
+    def setter(self, value):
+        setattr(self, id_column, None if value is None else value.id)
+        setattr(self, type_column, None if value is None else sa.inspect(value).mapper.class_.__name__)
+
+    return property(getter, setter, doc=f"Entity referenced by {id_column} / {type_column}")
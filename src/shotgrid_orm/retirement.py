@@ -0,0 +1,105 @@
+import sqlalchemy as sa
+
+from .connection import DEFAULT_BACKOFF, DEFAULT_RETRIES
+from .loader import DEFAULT_BATCH_SIZE, DEFAULT_PAGE_SIZE, RETIRED_COLUMN, delete_rows, iter_pages, unlink_rows
+
+__all__ = [
+    "LIVE_IDS_TABLE",
+    "reconcile_ids",
+    "sync_retirements",
+]
+
+# per-connection scratch table of the ids SG currently returns
+LIVE_IDS_TABLE = "sg_live_ids"
+
+
+def sync_retirements(
+    sg,
+    engine,
+    entity_type,
+    table,
+    page_size=DEFAULT_PAGE_SIZE,
+    batch_size=DEFAULT_BATCH_SIZE,
+    retries=DEFAULT_RETRIES,
+    backoff=DEFAULT_BACKOFF,
+    link_tables=None,
+):
+    """Remove the records SG has retired from table.
+
+    Pages through the retired ids of entity_type (sg.find with retired_only=True
+    and only the id field) and deletes them in batches of batch_size, one
+    transaction each, or flags them when table has the soft-delete column (see
+    loader.delete_rows). Returns {"entity", "retired", "applied"}: ids SG
+    reported and rows actually removed or flagged.
+    """
+    stats = {"entity": entity_type, "retired": 0, "applied": 0}
+
+    def apply(ids):
+        with engine.begin() as connection:
+            stats["applied"] += delete_rows(connection, table, ids, link_tables)
+
+    batch = []
+    for page in iter_pages(sg, entity_type, None, [], page_size, 0, retries, backoff, retired_only=True):
+        stats["retired"] += len(page)
+        batch.extend(record["id"] for record in page)
+        if len(batch) >= batch_size:
+            apply(batch)
+            batch = []
+    if batch:
+        apply(batch)
+    return stats
+
+
+def reconcile_ids(
+    sg,
+    engine,
+    entity_type,
+    table,
+    page_size=DEFAULT_PAGE_SIZE,
+    retries=DEFAULT_RETRIES,
+    backoff=DEFAULT_BACKOFF,
+    link_tables=None,
+):
+    """Make the ids in table match the records SG currently returns, set-based.
+
+    Streams every active id of entity_type into a temporary table and lets the
+    database anti-join it with table, so no id list is ever held in Python:
+    rows SG no longer returns are deleted, references to them removed first (see
+    loader.unlink_rows), or flagged retired, reviving flagged rows SG returns
+    again. Runs in one transaction. Returns {"entity", "live",
+    "applied", "revived", "missing"}, where missing counts ids SG has that
+    table lacks (load or sync those).
+    """
+    live = sa.Table(
+        LIVE_IDS_TABLE,
+        sa.MetaData(),
+        sa.Column("id", sa.BigInteger, primary_key=True, autoincrement=False),
+        prefixes=["TEMPORARY"],
+    )
+    stats = {"entity": entity_type, "live": 0, "applied": 0, "revived": 0, "missing": 0}
+
+    with engine.begin() as connection:
+        live.create(connection)
+        for page in iter_pages(sg, entity_type, None, [], page_size, 0, retries, backoff):
+            connection.execute(live.insert(), [{"id": record["id"]} for record in page])
+            stats["live"] += len(page)
+
+        in_live = sa.exists().where(live.c.id == table.c.id)
+        if RETIRED_COLUMN in table.c:
+            retired = table.c[RETIRED_COLUMN]
+            active = sa.or_(retired.is_(None), retired == sa.false())
+            query = table.update().where(~in_live, active).values({RETIRED_COLUMN: True})
+            stats["applied"] = connection.execute(query).rowcount
+            query = table.update().where(in_live, retired == sa.true()).values({RETIRED_COLUMN: False})
+            stats["revived"] = connection.execute(query).rowcount
+        else:
+            for link_table in (link_tables or {}).values():
+                linked = sa.exists().where(live.c.id == link_table.c.source_id)
+                connection.execute(link_table.delete().where(~linked))
+            unlink_rows(connection, table, sa.select(table.c.id).where(~in_live))
+            stats["applied"] = connection.execute(table.delete().where(~in_live)).rowcount
+
+        mirrored = sa.exists().where(table.c.id == live.c.id)
+        stats["missing"] = connection.scalar(sa.select(sa.func.count()).select_from(live).where(~mirrored))
+        live.drop(connection)
+    return stats
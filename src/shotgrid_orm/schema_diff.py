@@ -0,0 +1,187 @@
+import io
+
+from alembic.autogenerate import render_python_code
+from alembic.migration import MigrationContext
+from alembic.operations import Operations, ops
+
+__all__ = [
+    "SchemaDiff",
+    "SchemaMigration",
+    "diff_schemas",
+]
+
+
+def field_signature(field_def):
+    """The parts of a SG field definition that decide the columns generated for it."""
+    data_type = (field_def.get("data_type") or {}).get("value")
+    valid_types = ((field_def.get("properties") or {}).get("valid_types") or {}).get("value") or []
+    return data_type, tuple(sorted(valid_types))
+
+
+class SchemaDiff:
+    """Entity/field level differences between two SG schemas.
+
+    added_entities / removed_entities list entity names; changed_entities maps
+    the entities present in both to {"added", "removed", "changed"} field name
+    lists, "changed" being fields whose data type or valid types differ.
+    """
+
+    def __init__(self, added_entities=None, removed_entities=None, changed_entities=None):
+        self.added_entities = added_entities or []
+        self.removed_entities = removed_entities or []
+        self.changed_entities = changed_entities or {}
+
+    def __bool__(self):
+        return bool(self.added_entities or self.removed_entities or self.changed_entities)
+
+    def __repr__(self):
+        return (
+            f"SchemaDiff(added_entities={self.added_entities!r}, removed_entities={self.removed_entities!r},"
+            f" changed_entities={self.changed_entities!r})"
+        )
+
+
+def diff_schemas(old_schema, new_schema, ignored_tables=(), ignored_fields=()):
+    """Compare two SG schemas (as read by read_sg_schema) and return a SchemaDiff.
+
+    Only the schema dicts are compared; nothing is built or reflected.
+    """
+
+    def entities(schema):
+        return {name for name, t_def in schema.items() if t_def and name not in ignored_tables}
+
+    def fields(t_def):
+        return {
+            field: field_signature(field_def)
+            for field, field_def in (t_def.get("fields") or {}).items()
+            if field not in ignored_fields
+        }
+
+    old_entities, new_entities = entities(old_schema), entities(new_schema)
+    changed = {}
+    for name in sorted(old_entities & new_entities):
+        old_fields, new_fields = fields(old_schema[name]), fields(new_schema[name])
+        if old_fields == new_fields:
+            continue
+        changes = {
+            "added": sorted(set(new_fields) - set(old_fields)),
+            "removed": sorted(set(old_fields) - set(new_fields)),
+            "changed": sorted(f for f in set(old_fields) & set(new_fields) if old_fields[f] != new_fields[f]),
+        }
+        changed[name] = changes
+    return SchemaDiff(sorted(new_entities - old_entities), sorted(old_entities - new_entities), changed)
+
+
+def column_ops(old_table, new_table):
+    """Add/drop/alter column and create/drop index ops turning old_table into new_table."""
+    column_changes, index_changes = [], []
+    old_columns, new_columns = old_table.columns, new_table.columns
+    for column in new_columns:
+        if column.name not in old_columns:
+            column_changes.append(ops.AddColumnOp.from_column_and_tablename(None, new_table.name, column._copy()))
+        elif repr(column.type) != repr(old_columns[column.name].type):
+            column_changes.append(
+                ops.AlterColumnOp(
+                    new_table.name,
+                    column.name,
+                    modify_type=column.type,
+                    existing_type=old_columns[column.name].type,
+                    existing_nullable=column.nullable,
+                )
+            )
+    for column in old_columns:
+        if column.name not in new_columns:
+            column_changes.append(ops.DropColumnOp.from_column_and_tablename(None, old_table.name, column._copy()))
+
+    old_indexes = {index.name: index for index in old_table.indexes}
+    new_indexes = {index.name: index for index in new_table.indexes}
+    for name in sorted(set(old_indexes) - set(new_indexes)):
+        index_changes.append(ops.DropIndexOp.from_index(old_indexes[name]))
+    for name in sorted(set(new_indexes) - set(old_indexes)):
+        index_changes.append(ops.CreateIndexOp.from_index(new_indexes[name]))
+    return column_changes, index_changes
+
+
+class SchemaMigration:
+    """Alembic operations for a SchemaDiff, derived only from the entities it touches.
+
+    upgrade_ops holds create/drop table, add/drop/alter column and index ops;
+    python() renders them for an Alembic revision, sql() as offline DDL. FK
+    constraints that only change on existing columns (a field becoming
+    polymorphic) are left alone, as their names are database-generated.
+
+    old_orm and new_orm are SGORM instances built from the two schemas with the
+    same model options; lazy ones only ever build the changed entities (and
+    the tables their FKs point to). Nothing is reflected from a database.
+    """
+
+    def __init__(self, diff, old_orm, new_orm):
+        self.diff = diff
+        self.old_orm = old_orm
+        self.new_orm = new_orm
+        self.upgrade_ops = self.build_ops()
+
+    def tables(self, sg_orm, entity_type):
+        """The entity table of entity_type followed by its link tables."""
+        return [sg_orm.entity_table(entity_type)] + list(sg_orm.entity_link_tables(entity_type).values())
+
+    def build_ops(self):
+        created, dropped, modified, indexes = [], [], [], []
+
+        for entity_type in self.diff.added_entities:
+            for table in self.tables(self.new_orm, entity_type):
+                created.append(table)
+        for entity_type in self.diff.removed_entities:
+            dropped.extend(self.tables(self.old_orm, entity_type))
+
+        for entity_type in self.diff.changed_entities:
+            old_tables = {table.name: table for table in self.tables(self.old_orm, entity_type)}
+            new_tables = {table.name: table for table in self.tables(self.new_orm, entity_type)}
+            for name, table in new_tables.items():
+                if name not in old_tables:
+                    created.append(table)
+                    continue
+                column_changes, index_changes = column_ops(old_tables[name], table)
+                if column_changes:
+                    modified.append(ops.ModifyTableOps(name, column_changes))
+                indexes.extend(index_changes)
+            dropped.extend(table for name, table in old_tables.items() if name not in new_tables)
+
+        upgrade = []
+        # parents before children, so FKs of new tables resolve
+        order = {table.name: position for position, table in enumerate(self.new_orm.Base.metadata.sorted_tables)}
+        for table in sorted(created, key=lambda table: order.get(table.name, 0)):
+            upgrade.append(ops.CreateTableOp.from_table(table))
+            upgrade.extend(ops.CreateIndexOp.from_index(index) for index in sorted(table.indexes, key=lambda i: i.name))
+        upgrade.extend(modified)
+        upgrade.extend(indexes)
+        order = {table.name: position for position, table in enumerate(self.old_orm.Base.metadata.sorted_tables)}
+        for table in sorted(dropped, key=lambda table: -order.get(table.name, 0)):
+            upgrade.append(ops.DropTableOp.from_table(table))
+        return ops.UpgradeOps(ops=upgrade)
+
+    @property
+    def downgrade_ops(self):
+        return self.upgrade_ops.reverse()
+
+    def python(self, downgrade=False):
+        """The op.* calls of the upgrade (or downgrade), for the body of an Alembic revision."""
+        return render_python_code(self.downgrade_ops if downgrade else self.upgrade_ops)
+
+    def sql(self, dialect_name, downgrade=False):
+        """DDL of the upgrade (or downgrade) for dialect_name, rendered offline."""
+        buffer = io.StringIO()
+        context = MigrationContext.configure(
+            dialect_name=dialect_name, opts={"as_sql": True, "output_buffer": buffer, "literal_binds": True}
+        )
+        self.invoke(Operations(context), downgrade)
+        return buffer.getvalue()
+
+    def apply(self, connection, downgrade=False):
+        """Run the upgrade (or downgrade) on connection, outside of any Alembic revision."""
+        self.invoke(Operations(MigrationContext.configure(connection)), downgrade)
+
+    def invoke(self, operations, downgrade=False):
+        for op in (self.downgrade_ops if downgrade else self.upgrade_ops).ops:
+            for child in op.ops if isinstance(op, ops.ModifyTableOps) else [op]:
+                operations.invoke(child)
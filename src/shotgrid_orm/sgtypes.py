@@ -1,7 +1,8 @@
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import Any, Optional
 
-from sqlalchemy import Boolean, DateTime, Float, Integer, String
+from sqlalchemy import JSON, BigInteger, Boolean, Date, DateTime, Float, Integer, String
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -95,3 +96,31 @@ sg_types_optional = {
     # NOTE: URL fields stored as strings.
     "url": {"hint": Mapped[Optional[str]], "type": mapped_column(String)},
 }
+
+
+# JSON everywhere, JSONB on PostgreSQL so payloads can be indexed and queried by key
+JSON_TYPE = JSON().with_variant(JSONB(), "postgresql")
+
+# Native column types instead of strings. Entries with a "column_type" get an
+# explicit mapped_column(column_type); the others are inferred from the hint
+# like in sg_types_optional.
+sg_types_typed = dict(
+    sg_types_optional,
+    **{
+        "date": {"hint": Mapped[Optional[date]], "type": mapped_column(Date), "column_type": Date},
+        # multi_entity _ids / _type columns hold JSON lists instead of comma-separated strings
+        "multi_entity": {"hint": Mapped[Optional[Any]], "type": mapped_column(JSON_TYPE), "column_type": JSON_TYPE},
+        "serializable": {"hint": Mapped[Optional[Any]], "type": mapped_column(JSON_TYPE), "column_type": JSON_TYPE},
+        "tag_list": {"hint": Mapped[Optional[Any]], "type": mapped_column(JSON_TYPE), "column_type": JSON_TYPE},
+        # timecodes are milliseconds, which overflow 32 bits after ~24 days
+        "timecode": {"hint": Mapped[Optional[int]], "type": mapped_column(BigInteger), "column_type": BigInteger},
+        "url": {"hint": Mapped[Optional[Any]], "type": mapped_column(JSON_TYPE), "column_type": JSON_TYPE},
+    },
+)
+
+# column type profiles selectable with SGORM(type_profile=...)
+TYPE_PROFILES = {
+    "default": sg_types_optional,
+    "typed": sg_types_typed,
+}
+DEFAULT_TYPE_PROFILE = "default"
@@ -0,0 +1,195 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import sqlalchemy as sa
+
+from .connection import DEFAULT_BACKOFF, DEFAULT_RETRIES
+from .loader import DEFAULT_BATCH_SIZE, DEFAULT_PAGE_SIZE, id_ranges, load_entity, range_filters, upsert_rows
+
+__all__ = [
+    "DEFAULT_SHARD_PROCESSES",
+    "DEFAULT_SHARDS_PER_PROCESS",
+    "ShardedLoader",
+    "load_shard",
+    "shard_spec",
+]
+
+DEFAULT_SHARD_PROCESSES = 4
+DEFAULT_SHARDS_PER_PROCESS = 4  # more, smaller ranges even out gaps in the id space
+
+
+def database_url(engine):
+    """URL a worker process can reconnect to engine's database with (password included)."""
+    url = engine.url
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        raise ValueError("sharded loading needs a database other processes can open, not in-memory SQLite")
+    return url.render_as_string(hide_password=False)
+
+
+def table_spec(table):
+    """Flatten a Table into plain data (no cross-table object references).
+
+    Foreign keys are kept as "table.column" strings so pickling never has to walk
+    the FK graph of the whole metadata.
+    """
+    return {
+        "name": table.name,
+        "columns": [
+            {
+                "key": column.key,
+                "name": column.name,
+                "type": column.type,
+                "primary_key": column.primary_key,
+                "autoincrement": column.autoincrement,
+                "nullable": column.nullable,
+                "foreign_keys": [fk.target_fullname for fk in column.foreign_keys],
+            }
+            for column in table.columns
+        ],
+        "indexes": [
+            {
+                "name": index.name,
+                "columns": [column.name for column in index.columns],
+                "unique": index.unique,
+                "kwargs": dict(index.dialect_kwargs),
+            }
+            for index in sorted(table.indexes, key=lambda index: index.name or "")
+        ],
+        "uniques": [
+            {"name": constraint.name, "columns": [column.name for column in constraint.columns]}
+            for constraint in table.constraints
+            if isinstance(constraint, sa.UniqueConstraint)
+        ],
+    }
+
+
+def build_table(spec, metadata):
+    """Recreate a Table from table_spec() output in metadata."""
+    columns = [
+        sa.Column(
+            column["name"],
+            column["type"],
+            *[sa.ForeignKey(target) for target in column["foreign_keys"]],
+            key=column["key"],
+            primary_key=column["primary_key"],
+            autoincrement=column["autoincrement"],
+            nullable=column["nullable"],
+        )
+        for column in spec["columns"]
+    ]
+    table = sa.Table(spec["name"], metadata, *columns)
+    for unique in spec["uniques"]:
+        table.append_constraint(sa.UniqueConstraint(*unique["columns"], name=unique["name"]))
+    for index in spec["indexes"]:
+        sa.Index(
+            index["name"], *[table.c[name] for name in index["columns"]], unique=index["unique"], **index["kwargs"]
+        )
+    return table
+
+
+def shard_spec(table):
+    """Picklable spec of table for worker processes; FKs are dropped as workers only write rows."""
+    spec = table_spec(table)
+    spec["columns"] = [dict(column, foreign_keys=[]) for column in spec["columns"]]
+    spec["indexes"] = []
+    spec["uniques"] = []
+    return spec
+
+
+def load_shard(shard):
+    """Process pool entry point: load one id range of an entity, upserting into its table.
+
+    shard is a dict of picklable arguments (see ShardedLoader.shards). Each call
+    opens its own SG connection and database engine.
+    """
+    metadata = sa.MetaData()
+    table = build_table(shard["spec"], metadata)
+    link_tables = {field: build_table(spec, metadata) for field, spec in shard["links"].items()}
+    engine = sa.create_engine(shard["url"])
+    try:
+        stats = load_entity(
+            shard["connect"](),
+            engine,
+            shard["entity_type"],
+            table,
+            shard["t_def"],
+            filters=range_filters(shard["filters"], shard["first_id"], shard["last_id"]),
+            page_size=shard["page_size"],
+            batch_size=shard["batch_size"],
+            retries=shard["retries"],
+            backoff=shard["backoff"],
+            write=upsert_rows,
+            after_id=shard["first_id"] - 1,
+            link_tables=link_tables,
+            encoder=shard["encoder"],
+        )
+    finally:
+        engine.dispose()
+    stats["range"] = (shard["first_id"], shard["last_id"])
+    return stats
+
+
+class ShardedLoader:
+    """Load one entity by splitting its id space into ranges loaded by a process pool.
+
+    Every worker process opens its own SG connection with connect (which must be
+    picklable, e.g. functools.partial(sg_connect, ...)) and its own database
+    connection, and upserts its range into the target table, so overlapping or
+    re-run shards are harmless.
+    """
+
+    def __init__(
+        self,
+        connect,
+        engine,
+        processes=DEFAULT_SHARD_PROCESSES,
+        shards=None,
+        page_size=DEFAULT_PAGE_SIZE,
+        batch_size=DEFAULT_BATCH_SIZE,
+        retries=DEFAULT_RETRIES,
+        backoff=DEFAULT_BACKOFF,
+        mp_context=None,
+        encoder=None,
+    ):
+        self.connect = connect
+        self.engine = engine
+        self.processes = max(1, processes)
+        self.shards_count = shards or self.processes * DEFAULT_SHARDS_PER_PROCESS
+        self.page_size = page_size
+        self.batch_size = batch_size
+        self.retries = retries
+        self.backoff = backoff
+        self.mp_context = mp_context
+        self.encoder = encoder
+
+    def shards(self, sg, entity_type, table, t_def, filters=None, link_tables=None):
+        """One picklable work item per id range of entity_type."""
+        ranges = id_ranges(sg, entity_type, filters, self.shards_count, self.page_size, self.retries, self.backoff)
+        common = {
+            "connect": self.connect,
+            "url": database_url(self.engine),
+            "spec": shard_spec(table),
+            "links": {field: shard_spec(link_table) for field, link_table in (link_tables or {}).items()},
+            "t_def": t_def,
+            "entity_type": entity_type,
+            "filters": list(filters or []),
+            "page_size": self.page_size,
+            "batch_size": self.batch_size,
+            "retries": self.retries,
+            "backoff": self.backoff,
+            "encoder": self.encoder,
+        }
+        return [dict(common, first_id=first_id, last_id=last_id) for first_id, last_id in ranges]
+
+    def run(self, sg, entity_type, table, t_def, filters=None, link_tables=None):
+        """Load entity_type; returns {"entity", "fetched", "written", "shards"}."""
+        shards = self.shards(sg, entity_type, table, t_def, filters, link_tables)
+        stats = {"entity": entity_type, "fetched": 0, "written": 0, "shards": len(shards)}
+        if not shards:
+            return stats
+        mp_context = self.mp_context or multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(self.processes, len(shards)), mp_context=mp_context) as executor:
+            for shard_stats in executor.map(load_shard, shards):
+                stats["fetched"] += shard_stats["fetched"]
+                stats["written"] += shard_stats["written"]
+        return stats
@@ -0,0 +1,146 @@
+import sqlalchemy as sa
+
+from .connection import DEFAULT_BACKOFF, DEFAULT_RETRIES, call_with_retry
+from .control import (
+    create_control_tables,
+    from_utc_naive,
+    read_row,
+    sync_watermark,
+    to_utc_naive,
+    utcnow,
+    write_row,
+)
+from .loader import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_PAGE_SIZE,
+    ID_ORDER,
+    add_link_rows,
+    flatten_record,
+    sg_field_map,
+    upsert_rows,
+    write_batch,
+)
+
+__all__ = [
+    "read_watermarks",
+    "reset_watermark",
+    "sync_entity",
+]
+
+UPDATED_AT_ORDER = [{"field_name": "updated_at", "direction": "asc"}] + ID_ORDER
+
+
+def watermark_filter(updated_at, last_id):
+    """SG filter for records strictly after the (updated_at, id) watermark."""
+    if updated_at is None:
+        return [["id", "greater_than", last_id]]
+    return [
+        {
+            "filter_operator": "any",
+            "filters": [
+                ["updated_at", "greater_than", updated_at],
+                {
+                    "filter_operator": "all",
+                    "filters": [["updated_at", "is", updated_at], ["id", "greater_than", last_id]],
+                },
+            ],
+        }
+    ]
+
+
+def sync_entity(
+    sg,
+    engine,
+    entity_type,
+    table,
+    t_def,
+    filters=None,
+    page_size=DEFAULT_PAGE_SIZE,
+    batch_size=DEFAULT_BATCH_SIZE,
+    retries=DEFAULT_RETRIES,
+    backoff=DEFAULT_BACKOFF,
+    write=upsert_rows,
+    link_tables=None,
+    encoder=None,
+):
+    """Pull the records of entity_type changed since its watermark and upsert them.
+
+    Records are read in (updated_at, id) order and the watermark is advanced in
+    the same transaction as each written batch, so a crashed sync resumes right
+    after the last committed batch. Entities without updated_at only pick up new
+    ids. Returns {"entity", "fetched", "written", "updated_at", "last_id"}.
+    """
+    create_control_tables(engine)
+    field_map = sg_field_map(t_def, table, link_tables)
+    fields = [field for field in field_map if field != "id"]
+    has_updated_at = "updated_at" in (t_def.get("fields") or {})
+    if has_updated_at and "updated_at" not in fields:
+        fields.append("updated_at")
+
+    with engine.connect() as connection:
+        watermark = read_row(connection, sync_watermark, entity_type=entity_type) or {}
+    updated_at = from_utc_naive(watermark.get("updated_at")) if has_updated_at else None
+    last_id = watermark.get("last_id") or 0
+    stats = {"entity": entity_type, "fetched": 0, "written": 0}
+
+    def commit(batch, links):
+        with engine.begin() as connection:
+            stats["written"] += write_batch(connection, table, batch, links, write, encoder) if batch else 0
+            write_row(
+                connection,
+                sync_watermark,
+                {"entity_type": entity_type},
+                {"updated_at": to_utc_naive(updated_at), "last_id": last_id, "synced_at": utcnow()},
+            )
+
+    batch, links = [], {}
+    while True:
+        page = call_with_retry(
+            sg.find,
+            entity_type,
+            list(filters or []) + watermark_filter(updated_at, last_id),
+            fields,
+            order=UPDATED_AT_ORDER if has_updated_at else ID_ORDER,
+            limit=page_size,
+            retries=retries,
+            backoff=backoff,
+        )
+        if page:
+            stats["fetched"] += len(page)
+            for record in page:
+                batch.append(flatten_record(record, field_map, table))
+                add_link_rows(links, record, field_map)
+            last_id = page[-1]["id"]
+            if has_updated_at:
+                updated_at = page[-1].get("updated_at")
+        if batch and (len(batch) >= batch_size or len(page) < page_size):
+            commit(batch, links)
+            batch, links = [], {}
+        if len(page) < page_size:
+            break
+
+    if stats["fetched"] == 0:
+        # nothing changed; still record when we last looked
+        commit([], {})
+
+    stats["updated_at"] = updated_at
+    stats["last_id"] = last_id
+    return stats
+
+
+def reset_watermark(engine, entity_type=None):
+    """Forget the watermark of entity_type (or of all entities) so the next sync starts over."""
+    create_control_tables(engine)
+    with engine.begin() as connection:
+        query = sync_watermark.delete()
+        if entity_type:
+            query = query.where(sync_watermark.c.entity_type == entity_type)
+        connection.execute(query)
+
+
+def read_watermarks(engine):
+    """Return {entity_type: watermark row} for every synced entity."""
+    create_control_tables(engine)
+    with engine.connect() as connection:
+        rows = connection.execute(sa.select(sync_watermark)).mappings().all()
+    return {row["entity_type"]: dict(row) for row in rows}
@@ -0,0 +1,218 @@
+import sqlalchemy as sa
+
+from .connection import DEFAULT_BACKOFF, DEFAULT_RETRIES, call_with_retry, is_transient
+
+__all__ = [
+    "DEFAULT_WRITE_BATCH_SIZE",
+    "WriteBack",
+    "editable_fields",
+]
+
+DEFAULT_WRITE_BATCH_SIZE = 100
+
+# stats key counting the successful requests of each type
+REQUEST_STATS = {"create": "created", "update": "updated", "delete": "deleted"}
+
+
+def editable_fields(t_def):
+    """The SG fields of an entity definition the API accepts in create/update requests."""
+    fields = []
+    for field, field_def in (t_def.get("fields") or {}).items():
+        editable = field_def.get("editable", True)
+        if isinstance(editable, dict):
+            editable = editable.get("value", True)
+        if editable and field != "id":
+            fields.append(field)
+    return fields
+
+
+def changed_columns(instance):
+    """Names of the columns whose attributes were changed on instance since it was loaded."""
+    state = sa.inspect(instance)
+    return {
+        column.name
+        for column in state.mapper.columns
+        if column.key in state.attrs and state.attrs[column.key].history.has_changes()
+    }
+
+
+class WriteBack:
+    """Pushes the changes made to a session to SG with sg.batch.
+
+    Tracks the new, modified and deleted instances of the classes of sg_orm in
+    session: changes are collected before every flush, as the change history
+    is gone after it (and autoflush runs one on most queries); push() flushes
+    to collect the rest. Columns are turned back into SG field values, the inverse of the
+    loaders: _id/_type pairs and _ids lists become entity dicts, list codes
+    become values and link-table fields are read back. Fields the schema marks
+    non-editable are never sent. Repeated changes to one instance are merged
+    into a single request.
+
+    push() sends creates, then updates, then deletes in sg.batch calls of at
+    most batch_size requests. sg.batch is all-or-nothing, so a batch SG
+    rejects is replayed one request at a time to attribute the failure to the
+    instances that caused it. Transient errors are only retried for batches
+    without creates: creates are not idempotent, and a timeout or 502 can come
+    after SG committed the batch. A batch lost to a transport error is neither
+    retried nor replayed; its requests are reported as errors and stay pending,
+    so check SG for its creates before pushing again.
+    """
+
+    def __init__(
+        self,
+        sg_orm,
+        sg,
+        session,
+        batch_size=DEFAULT_WRITE_BATCH_SIZE,
+        retries=DEFAULT_RETRIES,
+        backoff=DEFAULT_BACKOFF,
+    ):
+        self.sg_orm = sg_orm
+        self.sg = sg
+        self.session = session
+        self.batch_size = batch_size
+        self.retries = retries
+        self.backoff = backoff
+        # {instance: request} of the changes not pushed yet
+        self.pending = {}
+        sa.event.listen(session, "before_flush", self.on_before_flush)
+
+    def close(self):
+        """Stop tracking the session; pending changes are dropped."""
+        sa.event.remove(self.session, "before_flush", self.on_before_flush)
+        self.pending = {}
+
+    def on_before_flush(self, session, flush_context, instances):
+        self.collect()
+
+    def entity_type(self, instance):
+        cls = type(instance)
+        return cls.__name__ if self.sg_orm.get(cls.__name__) is cls else None
+
+    def collect(self):
+        """Add the unflushed changes of the session to pending."""
+        session = self.session
+        created, updated, deleted = [], [], []
+        for instance in session.new:
+            entity_type = self.entity_type(instance)
+            if entity_type:
+                created.append((entity_type, instance, None))
+        for instance in session.dirty:
+            entity_type = self.entity_type(instance)
+            if entity_type and session.is_modified(instance):
+                updated.append((entity_type, instance, changed_columns(instance)))
+        for instance in session.deleted:
+            entity_type = self.entity_type(instance)
+            if entity_type:
+                deleted.append((entity_type, instance))
+        if not (created or updated or deleted):
+            return
+
+        connection = session.connection()
+        for entity_type, instance, data in self.sg_data(connection, created):
+            self.add(instance, {"request_type": "create", "entity_type": entity_type, "data": data})
+        for entity_type, instance, data in self.sg_data(connection, updated):
+            if data:
+                request = {"request_type": "update", "entity_type": entity_type, "entity_id": instance.id, "data": data}
+                self.add(instance, request)
+        for entity_type, instance in deleted:
+            self.add(instance, {"request_type": "delete", "entity_type": entity_type, "entity_id": instance.id})
+
+    def add(self, instance, request):
+        """Merge request into the pending request of instance."""
+        previous = self.pending.get(instance)
+        if previous is None:
+            self.pending[instance] = request
+        elif request["request_type"] == "delete":
+            if previous["request_type"] == "create":
+                del self.pending[instance]  # never reached SG
+            else:
+                self.pending[instance] = request
+        elif previous["request_type"] != "delete":
+            previous["data"].update(request["data"])
+
+    def requests(self):
+        """[(instance, request)] of the pending changes: creates, then updates, then deletes.
+
+        Flushes the session first, so every change has been collected and
+        none is collected again by a later flush.
+        """
+        self.session.flush()
+        order = {"create": 0, "update": 1, "delete": 2}
+        return sorted(self.pending.items(), key=lambda item: order[item[1]["request_type"]])
+
+    def sg_data(self, connection, changes):
+        """Yield (entity_type, instance, data) with the SG field values of each change.
+
+        changes are (entity_type, instance, columns) where columns is the set of
+        changed column names, or None for new instances (all non-empty fields).
+        """
+        by_type = {}
+        for entity_type, instance, columns in changes:
+            by_type.setdefault(entity_type, []).append((instance, columns))
+        for entity_type, items in by_type.items():
+            query = self.sg_orm.local_query(entity_type)
+            editable = editable_fields(self.sg_orm.sg_schema[entity_type])
+            fields = [field for field in editable if field in query.field_map]
+            table = query.table
+            rows = [{column.name: getattr(instance, column.key) for column in table.columns} for instance, _ in items]
+            shaped = query.shape(connection, rows, fields)
+            for (instance, columns), record in zip(items, shaped):
+                data = {}
+                for field in fields:
+                    _, roles = query.field_map[field]
+                    if columns is None:
+                        if record[field] not in (None, []):
+                            data[field] = record[field]
+                    elif any(name in columns for role, name in roles.items() if role != "link"):
+                        data[field] = record[field]
+                yield entity_type, instance, data
+
+    def push(self):
+        """Send the pending changes to SG.
+
+        New instances get the id SG assigned, which the next flush stores (the
+        id change itself is not sent). Returns {"created", "updated", "deleted", "batches",
+        "errors"}, errors being [{"instance", "request", "error"}] of the
+        requests SG rejected. Rejected changes stay pending.
+        """
+        requests = self.requests()
+        stats = {"created": 0, "updated": 0, "deleted": 0, "batches": 0, "errors": []}
+        for start in range(0, len(requests), self.batch_size):
+            chunk = requests[start : start + self.batch_size]
+            try:
+                results = self.batch([request for _, request in chunk])
+                stats["batches"] += 1
+                outcomes = [(instance, request, result, None) for (instance, request), result in zip(chunk, results)]
+            except Exception as error:
+                if is_transient(error):
+                    # the outcome is unknown: the batch may have been committed before the connection failed
+                    stats["batches"] += 1
+                    outcomes = [(instance, request, None, error) for instance, request in chunk]
+                else:
+                    outcomes = self.replay(chunk, stats)
+            for instance, request, result, error in outcomes:
+                if error is not None:
+                    stats["errors"].append({"instance": instance, "request": request, "error": error})
+                    continue
+                del self.pending[instance]
+                stats[REQUEST_STATS[request["request_type"]]] += 1
+                if request["request_type"] == "create":
+                    instance.id = result["id"]
+        return stats
+
+    def replay(self, chunk, stats):
+        """Send the requests of a rejected chunk one at a time; returns their outcomes."""
+        outcomes = []
+        for instance, request in chunk:
+            try:
+                outcomes.append((instance, request, self.batch([request])[0], None))
+            except Exception as error:
+                outcomes.append((instance, request, None, error))
+            stats["batches"] += 1
+        return outcomes
+
+    def batch(self, requests):
+        if any(request["request_type"] == "create" for request in requests):
+            return self.sg.batch(requests)
+        return call_with_retry(self.sg.batch, requests, retries=self.retries, backoff=self.backoff)
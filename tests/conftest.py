@@ -1,9 +1,12 @@
 """Pytest configuration and fixtures for shotgrid_orm tests."""
 
 # ruff: noqa: I001
+import copy
+import json
 import pytest
 import shutil
 from pathlib import Path
+from sqlalchemy import create_engine, event
 
 from shotgrid_orm import SGORM, SchemaType
 
@@ -41,3 +44,254 @@ def test_db_path(tmp_path):
     Function-scoped to ensure each test gets a fresh database.
     """
     return str(tmp_path / "test.db")
+
+
+class FakeFault(Exception):
+    """Stands in for shotgun_api3.Fault, raised for requests the site rejects."""
+
+
+class FakeShotgun:
+    """Minimal in-memory stand-in for shotgun_api3.Shotgun.
+
+    Serves the schema from a SG schema JSON dict and records from plain dicts so
+    live-connection code paths can be exercised without a site. Supports the
+    subset of the filter syntax the ORM uses.
+    """
+
+    def __init__(self, sg_schema, base_url="https://fake.shotgunstudio.com"):
+        self.sg_schema = sg_schema
+        self.base_url = base_url
+        self.records = {}
+        self.retired = {}
+        self.calls = []
+
+    def add(self, entity_type, **data):
+        self.records.setdefault(entity_type, {})[data["id"]] = dict(data, type=entity_type)
+        return self.records[entity_type][data["id"]]
+
+    def add_shots(self, shots):
+        """Add Project 1, Sequence 10, shots 1..shots in it and an Asset linking a few of them."""
+        project = {"type": "Project", "id": 1}
+        self.add("Project", id=1, code="DEMO", name="Demo")
+        self.add("Sequence", id=10, code="SEQ010", project=project)
+        for shot_id in range(1, shots + 1):
+            self.add(
+                "Shot",
+                id=shot_id,
+                code=f"SHOT_{shot_id:04d}",
+                description=None,
+                project=project,
+                sg_sequence={"type": "Sequence", "id": 10},
+            )
+        self.add(
+            "Asset",
+            id=1,
+            code="HERO",
+            project=project,
+            shots=[{"type": "Shot", "id": 1}, {"type": "Shot", "id": 2}],
+            entity_source={"type": "Sequence", "id": 10},
+            task_assignees=[{"type": "HumanUser", "id": 5}, {"type": "Group", "id": 7}],
+        )
+
+    def retire(self, entity_type, entity_id):
+        self.retired.setdefault(entity_type, {})[entity_id] = self.records[entity_type].pop(entity_id)
+
+    def schema_entity_read(self):
+        self.calls.append(("schema_entity_read",))
+        return {name: {k: v for k, v in entity.items() if k != "fields"} for name, entity in self.sg_schema.items()}
+
+    def schema_field_read(self, entity_type, field_name=None):
+        self.calls.append(("schema_field_read", entity_type))
+        return copy.deepcopy(self.sg_schema[entity_type]["fields"])
+
+    def find(
+        self,
+        entity_type,
+        filters,
+        fields=None,
+        order=None,
+        filter_operator=None,
+        limit=0,
+        retired_only=False,
+        page=0,
+        **kwargs,
+    ):
+        self.calls.append(("find", entity_type, filters))
+        source = self.retired if retired_only else self.records
+        rows = [r for r in source.get(entity_type, {}).values() if self._match_all(r, filters, filter_operator)]
+        for item in reversed(order or [{"field_name": "id", "direction": "asc"}]):
+            rows.sort(
+                key=lambda r, f=item["field_name"]: (r.get(f) is not None, r.get(f)),
+                reverse=item.get("direction") == "desc",
+            )
+        if limit:
+            start = (max(page, 1) - 1) * limit
+            rows = rows[start : start + limit]
+        fields = [f for f in fields or [] if f not in ("type", "id")]
+        return [
+            dict({"type": entity_type, "id": r["id"]}, **{f: copy.deepcopy(r.get(f)) for f in fields}) for r in rows
+        ]
+
+    def find_one(
+        self, entity_type, filters, fields=None, order=None, filter_operator=None, retired_only=False, **kwargs
+    ):
+        rows = self.find(entity_type, filters, fields, order, filter_operator, 1, retired_only)
+        return rows[0] if rows else None
+
+    def batch(self, requests):
+        """All-or-nothing like the real API: a failing request leaves no change behind."""
+        self.calls.append(("batch", [request["request_type"] for request in requests]))
+        records, retired = copy.deepcopy(self.records), copy.deepcopy(self.retired)
+        results = []
+        for request in requests:
+            entity_type = request["entity_type"]
+            rows = records.setdefault(entity_type, {})
+            if request["request_type"] == "create":
+                used = list(rows) + list(retired.get(entity_type, {}))
+                record = dict(request["data"], type=entity_type, id=max(used, default=0) + 1)
+                rows[record["id"]] = record
+                results.append(copy.deepcopy(record))
+                continue
+            if request["entity_id"] not in rows:
+                raise FakeFault(f"{entity_type} {request['entity_id']} does not exist")
+            if request["request_type"] == "update":
+                rows[request["entity_id"]].update(copy.deepcopy(request["data"]))
+                results.append(dict(request["data"], type=entity_type, id=request["entity_id"]))
+            else:
+                retired.setdefault(entity_type, {})[request["entity_id"]] = rows.pop(request["entity_id"])
+                results.append(True)
+        # update in place: fake_sg_api connections share these dicts
+        self.records.clear()
+        self.records.update(records)
+        self.retired.clear()
+        self.retired.update(retired)
+        return results
+
+    def _match_all(self, row, filters, filter_operator=None):
+        matches = [self._match(row, f) for f in filters]
+        return any(matches) if filter_operator in ("any", "or") else all(matches)
+
+    def _match(self, row, condition):
+        if isinstance(condition, dict):
+            return self._match_all(row, condition["filters"], condition.get("filter_operator"))
+        field, operator, *values = condition
+        value = row.get(field)
+        operand = values[0] if len(values) == 1 else values
+        if isinstance(value, dict):
+            value = (value.get("type"), value.get("id"))
+        if isinstance(operand, dict):
+            operand = (operand.get("type"), operand.get("id"))
+        if operator == "is":
+            return value == operand
+        if operator == "is_not":
+            return value != operand
+        if operator == "in":
+            return value in operand
+        if operator == "not_in":
+            return value not in operand
+        if operator == "greater_than":
+            return value is not None and value > operand
+        if operator == "less_than":
+            return value is not None and value < operand
+        if operator == "between":
+            return value is not None and operand[0] <= value <= operand[1]
+        if operator == "starts_with":
+            return value is not None and value.startswith(operand)
+        raise NotImplementedError(operator)
+
+
+@pytest.fixture(scope="function")
+def sqlite_engine(test_db_path):
+    """SQLite engine on the test database file."""
+    engine = create_engine(f"sqlite+pysqlite:///{test_db_path}", echo=False)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="function")
+def fk_engine(test_db_path):
+    """SQLite engine that enforces foreign keys, as PostgreSQL does."""
+    engine = create_engine(f"sqlite+pysqlite:///{test_db_path}", echo=False)
+
+    @event.listens_for(engine, "connect")
+    def enforce_foreign_keys(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def example_schema(example_schema_path):
+    """Provide the example schema as a dict."""
+    with open(example_schema_path) as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def fake_sg(example_schema):
+    """Provide a FakeShotgun serving the example schema."""
+    return FakeShotgun(copy.deepcopy(example_schema))
+
+
+@pytest.fixture
+def make_sg_orm(fake_sg):
+    """Factory of SGORM instances; the schema comes from fake_sg unless another source is given.
+
+    make_sg_orm(source=None, sg_schema_type=SchemaType.SG_CONNECTION, create=False, **kwargs)
+    passes kwargs on to SGORM; create=True also creates the tables on its engine.
+    """
+
+    def make(source=None, sg_schema_type=SchemaType.SG_CONNECTION, create=False, **kwargs):
+        orm = SGORM(
+            sg_schema_type=sg_schema_type,
+            sg_schema_source=fake_sg if source is None else source,
+            echo=False,
+            **kwargs,
+        )
+        if create:
+            orm.Base.metadata.create_all(orm.engine)
+        return orm
+
+    return make
+
+
+@pytest.fixture
+def mirror(make_sg_orm, sqlite_engine):
+    """Factory of SGORM mirrors of fake_sg on sqlite_engine (or engine=), with the tables created.
+
+    mirror(entity_types=(), **kwargs) loads entity_types from the FakeShotgun in
+    the order given; kwargs go to make_sg_orm.
+    """
+
+    def load(entity_types=(), engine=None, **kwargs):
+        orm = make_sg_orm(engine=engine or sqlite_engine, create=True, **kwargs)
+        for entity_type in entity_types:
+            orm.load_entity(entity_type)
+        return orm
+
+    return load
+
+
+@pytest.fixture
+def fake_sg_api(monkeypatch, example_schema):
+    """Patch shotgun_api3 so credential-based SGORM sources connect to FakeShotgun.
+
+    Returns the list of connections opened, in creation order. Like separate
+    sessions against one site, they all share the same records.
+    """
+    import types
+
+    from shotgrid_orm import classes
+
+    connections = []
+
+    def shotgun(url, **kwargs):
+        sg = FakeShotgun(copy.deepcopy(example_schema), base_url=url)
+        if connections:
+            sg.records, sg.retired = connections[0].records, connections[0].retired
+        connections.append(sg)
+        return sg
+
+    monkeypatch.setattr(classes, "sgapi", types.SimpleNamespace(Shotgun=shotgun))
+    return connections
@@ -0,0 +1,178 @@
+"""Tests for the native model script generator."""
+
+import copy
+import importlib.util
+import json
+import sys
+
+import sqlalchemy as sa
+from sqlacodegen_v2 import generators
+from sqlalchemy.orm import Session, configure_mappers
+
+from shotgrid_orm import SGORM, SchemaType
+
+
+def import_script(path, name):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def describe(metadata):
+    """Comparable summary of every table's columns, keys, defaults and indexes."""
+    return {
+        name: (
+            sorted(
+                (
+                    c.name,
+                    repr(c.type),
+                    sorted(c.type._variant_mapping),
+                    c.primary_key,
+                    c.nullable,
+                    c.autoincrement,
+                    c.default.arg if c.default is not None else None,
+                    sorted(fk.target_fullname for fk in c.foreign_keys),
+                )
+                for c in table.columns
+            ),
+            sorted((index.name, [c.name for c in index.columns]) for index in table.indexes),
+        )
+        for name, table in metadata.tables.items()
+    }
+
+
+def test_script_round_trips_the_model(make_sg_orm, tmp_path):
+    """The generated module rebuilds the same tables, link and lookup tables included."""
+    orm = make_sg_orm(link_tables=True, index_policy=True, encode_lists=True, retired_column=True, type_profile="typed")
+    path = tmp_path / "sgmodel_native.py"
+    orm.create_script(str(path))
+
+    module = import_script(path, "sgmodel_native")
+    assert describe(module.Base.metadata) == describe(orm.Base.metadata)
+    assert sorted(module.CLASSES) == sorted(orm.classes)
+    assert "autoincrement=False" in path.read_text()
+
+    engine = sa.create_engine("sqlite+pysqlite:///:memory:")
+    module.Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(module.CLASSES["Shot"](id=1, code="sh010"))
+        session.commit()
+        assert session.get(module.Shot, 1).retired is False
+
+
+def test_script_is_deterministic(make_sg_orm, tmp_path):
+    """Separate builds, eager or lazy, write the same text."""
+    texts = []
+    for kwargs in ({}, {"lazy": True}, {}):
+        path = tmp_path / "sgmodel.py"
+        make_sg_orm(index_policy=True, **kwargs).create_script(str(path))
+        texts.append(path.read_text())
+    assert texts[1:] == texts[:1] * 2
+
+
+def test_script_relationships(make_sg_orm, tmp_path):
+    """With relationships=True the script declares the same many-to-one links and backrefs."""
+    path = tmp_path / "sgmodel_relationships.py"
+    orm = make_sg_orm(relationships=True, relationship_lazy="selectin")
+    orm.create_script(str(path))
+    module = import_script(path, "sgmodel_relationships")
+    configure_mappers()
+
+    assert module.Shot.sg_sequence.property.lazy == orm["Shot"].sg_sequence.property.lazy == "selectin"
+    assert module.Shot.sg_sequence.property.mapper.class_ is module.Sequence
+    assert hasattr(module.Sequence, "Shot_sg_sequence")
+
+    engine = sa.create_engine("sqlite+pysqlite:///:memory:")
+    module.Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all([module.Sequence(id=1, code="sq01"), module.Shot(id=2, code="sh010", sg_sequence_id=1)])
+        session.commit()
+        assert session.get(module.Shot, 2).sg_sequence.code == "sq01"
+
+
+def test_sqlacodegen_generator_still_supported(sg_orm, tmp_path):
+    path = tmp_path / "sgmodel_sqlacodegen.py"
+    sg_orm.create_script(str(path), generator_class=generators.DeclarativeGenerator)
+    content = path.read_text()
+    assert "Base = declarative_base()" in content
+    assert "id = mapped_column(BigInteger, primary_key=True, autoincrement=False)" in content
+
+
+def import_package(parent, name):
+    sys.path.insert(0, str(parent))
+    try:
+        return importlib.import_module(name)
+    finally:
+        sys.path.remove(str(parent))
+
+
+def loaded_entities(name):
+    prefix = f"{name}.entities."
+    return sorted(module[len(prefix) :] for module in sys.modules if module.startswith(prefix))
+
+
+def drop_package(name):
+    for module in [module for module in sys.modules if module == name or module.startswith(f"{name}.")]:
+        del sys.modules[module]
+
+
+def test_package_imports_entities_on_demand(make_sg_orm, tmp_path):
+    """Entities are imported on first access with the entities their FKs reach, link tables included."""
+    orm = make_sg_orm(link_tables=True, encode_lists=True, index_policy=True)
+    orm.create_package(str(tmp_path / "sgmodel_pkg"))
+    package = import_package(tmp_path, "sgmodel_pkg")
+    try:
+        assert loaded_entities("sgmodel_pkg") == []
+        assert sorted(package.Base.metadata.tables) == ["sg_list_value"]
+
+        assert package.Shot.__tablename__ == "Shot"
+        assert loaded_entities("sgmodel_pkg") == ["Project", "Sequence", "Shot"]
+        assert "Asset" not in package.Base.metadata.tables
+
+        assert package.CLASSES["Asset"] is package.Asset
+        assert "Asset__shots" in package.Base.metadata.tables
+        assert sorted(package.CLASSES) == sorted(orm.classes) == sorted(package.load_all())
+        assert describe(package.Base.metadata) == describe(orm.Base.metadata)
+
+        engine = sa.create_engine("sqlite+pysqlite:///:memory:")
+        package.Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            session.add(package.Shot(id=1, code="sh010", project_id=None))
+            session.commit()
+    finally:
+        drop_package("sgmodel_pkg")
+
+
+def test_package_resolves_fk_cycles(example_schema, tmp_path):
+    """Entities linking to each other load together through the package."""
+    schema = copy.deepcopy(example_schema)
+    field = copy.deepcopy(schema["Shot"]["fields"]["sg_sequence"])
+    field["name"]["value"] = "sg_hero_shot"
+    field["properties"]["valid_types"]["value"] = ["Shot"]
+    schema["Project"]["fields"]["sg_hero_shot"] = field
+    orm = SGORM(SchemaType.JSON_TEXT, json.dumps(schema), echo=False, relationships=True)
+    orm.create_package(str(tmp_path / "sgmodel_cycle"))
+
+    package = import_package(tmp_path, "sgmodel_cycle")
+    try:
+        assert package.REFERENCES["Project"] == ("Shot",)
+        assert sorted(package.Base.metadata.tables) == []
+        project = package.Project
+        assert sorted(package.Base.metadata.tables) == ["Project", "Sequence", "Shot"]
+        configure_mappers()
+        assert project.sg_hero_shot.property.mapper.class_ is package.Shot
+    finally:
+        drop_package("sgmodel_cycle")
+
+
+def test_package_regeneration_removes_stale_entities(make_sg_orm, tmp_path):
+    out_dir = tmp_path / "sgmodel"
+    make_sg_orm().create_package(str(out_dir))
+    make_sg_orm(ignored_tables=["Asset"]).create_package(str(out_dir))
+    assert sorted(path.name for path in (out_dir / "entities").glob("*.py")) == [
+        "Project.py",
+        "Sequence.py",
+        "Shot.py",
+        "__init__.py",
+    ]
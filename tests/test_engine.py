@@ -0,0 +1,45 @@
+"""Tests for deferred engine and session creation."""
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import sessionmaker
+
+
+def test_model_build_creates_no_engine(make_sg_orm, tmp_path):
+    """Building classes and scripts never creates the in-memory database."""
+    orm = make_sg_orm()
+    assert orm._engine is None
+    assert orm._session is None
+
+    orm.create_script(str(tmp_path / "sgmodel.py"))
+    assert orm._engine is None
+
+
+def test_default_engine_created_on_first_use(make_sg_orm):
+    """The built-in session is backed by an in-memory SQLite database with all tables."""
+    orm = make_sg_orm()
+    session = orm.session
+    assert orm.session is session
+    assert session.get_bind() is orm.engine
+    assert sorted(inspect(orm.engine).get_table_names()) == ["Asset", "Project", "Sequence", "Shot"]
+
+
+def test_supplied_engine_gets_no_ddl(make_sg_orm, sqlite_engine):
+    """A caller-supplied engine is used for sessions without creating tables on it."""
+    orm = make_sg_orm(engine=sqlite_engine)
+
+    assert orm.engine is sqlite_engine
+    assert orm.session.get_bind() is sqlite_engine
+    assert inspect(sqlite_engine).get_table_names() == []
+
+    orm.Base.metadata.create_all(sqlite_engine)
+    orm.session.add(orm["Shot"](id=1, code="SHOT_001"))
+    orm.session.commit()
+
+
+def test_supplied_sessionmaker(make_sg_orm, sqlite_engine):
+    """create_sg_orm uses a caller-supplied sessionmaker."""
+    factory = sessionmaker(bind=sqlite_engine)
+    orm = make_sg_orm(sessionmaker=factory)
+
+    assert orm.session.get_bind() is sqlite_engine
+    assert orm.create_sg_orm() is not orm.session
@@ -0,0 +1,174 @@
+"""Tests for the EventLogEntry tailer."""
+
+from sqlalchemy import select
+
+from shotgrid_orm import event_entity, group_events
+
+
+class Events:
+    """Appends EventLogEntry records to a FakeShotgun like the site does."""
+
+    def __init__(self, sg, start=100):
+        self.sg = sg
+        self.next_id = start
+
+    def log(self, entity_type, action, entity_id):
+        self.next_id += 1
+        entity = {"type": entity_type, "id": entity_id} if action != "Retirement" else None
+        self.sg.add(
+            "EventLogEntry",
+            id=self.next_id,
+            event_type=f"Shotgun_{entity_type}_{action}",
+            entity=entity,
+            meta={"type": "attribute_change", "entity_type": entity_type, "entity_id": entity_id},
+        )
+
+
+def shot_codes(orm):
+    Shot = orm["Shot"]
+    with orm.engine.connect() as connection:
+        return dict(connection.execute(select(Shot.id, Shot.code).order_by(Shot.id)).all())
+
+
+def test_event_entity():
+    assert event_entity({"event_type": "Shotgun_Shot_Change", "meta": {"entity_type": "Shot", "entity_id": 3}}) == (
+        "Shot",
+        3,
+    )
+    assert event_entity(
+        {"event_type": "Shotgun_CustomEntity01_New", "entity": {"type": "CustomEntity01", "id": 4}}
+    ) == (
+        "CustomEntity01",
+        4,
+    )
+    assert event_entity({"event_type": "Toolkit_App_Startup", "meta": {}}) is None
+    events = [
+        {"event_type": "Shotgun_Shot_Change", "meta": {"entity_type": "Shot", "entity_id": 2}},
+        {"event_type": "Shotgun_Asset_New", "meta": {"entity_type": "Asset", "entity_id": 1}},
+        {"event_type": "Shotgun_Shot_Change", "meta": {"entity_type": "Shot", "entity_id": 1}},
+        {"event_type": "Shotgun_Shot_Change", "meta": {"entity_type": "Shot", "entity_id": 2}},
+    ]
+    assert group_events(events) == {"Shot": [2, 1], "Asset": [1]}
+
+
+def test_tailer_applies_changes(fake_sg, mirror):
+    """New, changed and retired entities reach the mirror; the cursor advances with them."""
+    events = Events(fake_sg)
+    events.log("Shot", "New", 1)  # before the tailer started: skipped
+    orm = mirror(link_tables=True)
+    tailer = orm.event_tailer(page_size=2)
+
+    assert tailer.poll()["events"] == 0
+    assert tailer.cursor == 101
+
+    for shot_id in (1, 2, 3):
+        fake_sg.add("Shot", id=shot_id, code=f"SHOT_{shot_id}")
+        events.log("Shot", "New", shot_id)
+    fake_sg.add("Asset", id=1, code="HERO", shots=[{"type": "Shot", "id": 2}])
+    events.log("Asset", "New", 1)
+    events.log("HumanUser", "Change", 5)  # not in the model
+
+    # two full pages, then a partial one
+    totals = tailer.run(poll_interval=0, max_polls=3)
+    assert totals["events"] == 5 and totals["written"] == 4
+    assert tailer.cursor == 106
+    assert shot_codes(orm) == {1: "SHOT_1", 2: "SHOT_2", 3: "SHOT_3"}
+    assert orm.find("Asset", [], ["shots"]) == [{"type": "Asset", "id": 1, "shots": [{"type": "Shot", "id": 2}]}]
+
+    fake_sg.records["Shot"][1]["code"] = "RENAMED"
+    events.log("Shot", "Change", 1)
+    events.log("Shot", "Change", 1)
+    fake_sg.retire("Shot", 3)
+    events.log("Shot", "Retirement", 3)
+    fake_sg.calls.clear()
+
+    stats = tailer.run(poll_interval=0, max_polls=2)
+    assert stats["deleted"] == 1
+    assert shot_codes(orm) == {1: "RENAMED", 2: "SHOT_2"}
+    # one refetch per entity type and page, however many events touched it
+    refetches = [call for call in fake_sg.calls if call[0] == "find" and call[1] == "Shot"]
+    assert [call[2] for call in refetches] == [[["id", "in", [1]]], [["id", "in", [3]]]]
+
+
+def test_tailer_retirement_with_foreign_keys(fake_sg, fk_engine, mirror):
+    """Retiring a referenced entity doesn't abort the poll when FKs are enforced; the cursor moves on."""
+    events = Events(fake_sg)
+    orm = mirror(engine=fk_engine)
+    tailer = orm.event_tailer()
+    tailer.reset(0)
+    fake_sg.add("Project", id=1, code="DEMO")
+    events.log("Project", "New", 1)
+    fake_sg.add("Shot", id=1, code="SHOT_1", project={"type": "Project", "id": 1})
+    events.log("Shot", "New", 1)
+    assert tailer.poll()["written"] == 2
+
+    fake_sg.retire("Project", 1)
+    events.log("Project", "Retirement", 1)
+    assert tailer.poll()["deleted"] == 1
+    assert tailer.cursor == 103
+    assert orm.find("Project", []) == []
+    assert orm.find("Shot", [], ["project"]) == [{"type": "Shot", "id": 1, "project": None}]
+
+
+def test_tailer_applies_changes_in_foreign_key_order(fake_sg, fk_engine, mirror):
+    """A Shot event linking to a new Sequence may come first; the Sequence is still written before it."""
+    events = Events(fake_sg)
+    orm = mirror(engine=fk_engine)
+    tailer = orm.event_tailer()
+    tailer.reset(100)
+    fake_sg.add("Shot", id=1, code="SHOT_1", sg_sequence={"type": "Sequence", "id": 10})
+    events.log("Shot", "Change", 1)
+    fake_sg.add("Sequence", id=10, code="SEQ_10")
+    events.log("Sequence", "New", 10)
+
+    assert tailer.poll()["written"] == 2
+    assert tailer.cursor == 102
+    assert orm.find("Shot", [], ["sg_sequence"]) == [
+        {"type": "Shot", "id": 1, "sg_sequence": {"type": "Sequence", "id": 10}}
+    ]
+
+
+def test_tailer_rereads_late_events(fake_sg, mirror):
+    """An event id that commits after higher ids were applied is picked up; ids that never show up expire."""
+    orm = mirror()
+    tailer = orm.event_tailer(gap_timeout=60)
+    tailer.reset(100)
+    fake_sg.add("Shot", id=1, code="SHOT_1")
+    fake_sg.add("Shot", id=2, code="SHOT_2")
+    late = Events(fake_sg, start=100)
+    Events(fake_sg, start=102).log("Shot", "New", 2)  # 103 is visible before 101 and 102
+
+    stats = tailer.poll()
+    assert (stats["events"], stats["late"], stats["written"]) == (1, 0, 1)
+    assert tailer.cursor == 103
+    assert sorted(tailer.gaps) == [101, 102]
+
+    late.log("Shot", "New", 1)  # 101 commits; 102 was rolled back
+    stats = tailer.poll()
+    assert (stats["events"], stats["late"], stats["written"]) == (0, 1, 1)
+    assert shot_codes(orm) == {1: "SHOT_1", 2: "SHOT_2"}
+    assert list(tailer.gaps) == [102]
+
+    tailer.gap_timeout = 0
+    tailer.poll()
+    assert tailer.gaps == {}
+    assert tailer.cursor == 103
+
+    tailer.reset(100)
+    Events(fake_sg, start=110).log("Shot", "Change", 2)
+    tailer.max_gaps = 3
+    tailer.poll()
+    assert sorted(tailer.gaps) == [108, 109, 110]  # the highest skipped ids are the likely late ones
+
+
+def test_tailer_cursor_is_per_name(fake_sg, mirror):
+    events = Events(fake_sg)
+    orm = mirror()
+    first = orm.event_tailer(name="first")
+    first.reset(0)
+    events.log("Shot", "New", 1)
+    fake_sg.add("Shot", id=1, code="SHOT_1")
+
+    assert first.poll()["written"] == 1
+    assert first.cursor == 101
+    assert orm.event_tailer(name="second").cursor is None
@@ -0,0 +1,107 @@
+"""Tests for the parallel extraction scheduler."""
+
+import pytest
+from conftest import FakeShotgun
+from sqlalchemy import func, select
+
+from shotgrid_orm import RateLimiter, SchemaType, id_ranges
+
+SG_SCRIPT_SOURCE = {"url": "https://fake.shotgunstudio.com", "script": "orm", "api_key": "key"}
+
+
+@pytest.fixture
+def extract_orm(fake_sg_api, mirror):
+    orm = mirror(source=SG_SCRIPT_SOURCE, sg_schema_type=SchemaType.SG_SCRIPT, schema_workers=1)
+    fake_sg_api[0].add_shots(1200)
+    return orm
+
+
+def count(engine, table):
+    with engine.connect() as connection:
+        return connection.execute(select(func.count()).select_from(table)).scalar()
+
+
+def test_id_ranges(fake_sg):
+    """The id space is split into contiguous ranges no narrower than a page."""
+    fake_sg.add_shots(1000)
+    assert id_ranges(fake_sg, "Shot", parts=4, page_size=100) == [(1, 250), (251, 500), (501, 750), (751, 1000)]
+    assert id_ranges(fake_sg, "Shot", parts=8, page_size=400) == [(1, 334), (335, 668), (669, 1000)]
+    assert id_ranges(fake_sg, "Shot", [["id", "greater_than", 990]], parts=4, page_size=100) == [(991, 1000)]
+    assert id_ranges(fake_sg, "Shot", [["id", "greater_than", 5000]], parts=4) == []
+
+
+def test_extract_all_entities(extract_orm, fake_sg_api):
+    """Every entity lands in the database, fetched by worker connections, not the schema one."""
+    stats = extract_orm.extract(workers=3, page_size=100, batch_size=250)
+
+    assert stats["Shot"] == {"entity": "Shot", "fetched": 1200, "written": 1200}
+    assert stats["Project"]["written"] == 1
+    assert stats["Asset"]["written"] == 1
+    engine = extract_orm.engine
+    assert count(engine, extract_orm.entity_table("Shot")) == 1200
+    assert count(engine, extract_orm.entity_table("Sequence")) == 1
+
+    workers = fake_sg_api[1:]
+    assert 1 < len(workers) <= 3
+    assert not any(call[0] == "find" for call in fake_sg_api[0].calls)
+    # the Shot id space was split, so its pages were fetched by more than one connection
+    shot_finds = [sg for sg in workers if any(call[0] == "find" and call[1] == "Shot" for call in sg.calls)]
+    assert len(shot_finds) > 1
+
+
+def test_extract_follows_foreign_keys(fake_sg_api, fk_engine, mirror):
+    """Parent tables are written before the tables pointing at them, so enforced FKs hold."""
+    orm = mirror(source=SG_SCRIPT_SOURCE, sg_schema_type=SchemaType.SG_SCRIPT, schema_workers=1, engine=fk_engine)
+    fake_sg_api[0].add_shots(300)
+
+    stats = orm.extract(["Shot", "Asset", "Sequence", "Project"], workers=3, page_size=50, batch_size=100)
+    assert {entity_type: s["written"] for entity_type, s in stats.items()} == {
+        "Shot": 300,
+        "Asset": 1,
+        "Sequence": 1,
+        "Project": 1,
+    }
+    assert count(fk_engine, orm.entity_table("Shot")) == 300
+
+
+def test_extract_is_idempotent(extract_orm):
+    """Rows are upserted, so extracting twice neither fails nor duplicates."""
+    extract_orm.extract(["Shot"], workers=2, page_size=100)
+    stats = extract_orm.extract(["Shot"], workers=2, page_size=100)
+    assert stats["Shot"]["written"] == 1200
+    assert count(extract_orm.engine, extract_orm.entity_table("Shot")) == 1200
+
+
+def test_extract_surfaces_fetch_errors(extract_orm, monkeypatch):
+    """An error in a fetcher stops the extraction and is re-raised."""
+    find = FakeShotgun.find
+
+    def failing_find(self, entity_type, *args, **kwargs):
+        if entity_type == "Shot":
+            raise RuntimeError("boom")
+        return find(self, entity_type, *args, **kwargs)
+
+    monkeypatch.setattr(FakeShotgun, "find", failing_find)
+    with pytest.raises(RuntimeError, match="boom"):
+        extract_orm.extract(["Shot", "Project"], workers=2, page_size=100)
+
+
+def test_extract_without_credentials_uses_one_worker(fake_sg, mirror):
+    """A caller-supplied connection can't be cloned, so it is used by a single fetcher."""
+    fake_sg.add_shots(50)
+    orm = mirror()
+
+    stats = orm.extract(["Shot"], workers=4, page_size=10)
+    assert stats["Shot"]["written"] == 50
+
+
+def test_rate_limiter_spaces_calls(monkeypatch):
+    """Calls are spaced 1 / rate seconds apart."""
+    sleeps = []
+    monkeypatch.setattr("shotgrid_orm.connection.time.sleep", sleeps.append)
+    limiter = RateLimiter(rate=10)
+    for _ in range(3):
+        limiter.acquire()
+    assert len(sleeps) == 2
+    assert all(0 < wait <= 0.2 for wait in sleeps)
+    RateLimiter().acquire()
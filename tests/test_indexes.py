@@ -0,0 +1,81 @@
+"""Tests for secondary index generation."""
+
+import copy
+import importlib.util
+
+import sqlalchemy as sa
+
+from shotgrid_orm import IndexPolicy, index_name
+
+
+def schema_with_dates(example_schema):
+    """Example schema with a date_time and a status_list field on Shot."""
+    schema = copy.deepcopy(example_schema)
+    for name, data_type in [("updated_at", "date_time"), ("sg_status_list", "status_list"), ("sg_notes", "text")]:
+        field = copy.deepcopy(schema["Shot"]["fields"]["code"])
+        field["data_type"]["value"] = data_type
+        field["name"]["value"] = name
+        schema["Shot"]["fields"][name] = field
+    return schema
+
+
+def indexed_columns(table):
+    return sorted(tuple(column.name for column in index.columns) for index in table.indexes)
+
+
+def test_no_indexes_by_default(sg_orm):
+    """Without a policy only the primary keys are indexed, as before."""
+    assert all(not table.indexes for table in sg_orm.Base.metadata.tables.values())
+
+
+def test_default_policy(fake_sg, example_schema, make_sg_orm):
+    """The default policy indexes entity links, date/time and status columns."""
+    fake_sg.sg_schema = schema_with_dates(example_schema)
+    orm = make_sg_orm(index_policy=True)
+
+    assert indexed_columns(orm.entity_table("Shot")) == [
+        ("project_id",),
+        ("sg_sequence_id",),
+        ("sg_status_list",),
+        ("updated_at",),
+    ]
+    # polymorphic entity links are indexed on (id, type); multi_entity strings are not indexed
+    assert indexed_columns(orm.entity_table("Asset")) == [("entity_source_id", "entity_source_type"), ("project_id",)]
+    assert {index.name for index in orm.entity_table("Shot").indexes} >= {"ix_Shot_project_id", "ix_Shot_updated_at"}
+
+    # the indexes are created in the database
+    index_names = {index["name"] for index in sa.inspect(orm.engine).get_indexes("Shot")}
+    assert "ix_Shot_sg_sequence_id" in index_names
+
+
+def test_custom_policy(fake_sg, example_schema, make_sg_orm):
+    """Categories can be turned off and individual fields added."""
+    fake_sg.sg_schema = schema_with_dates(example_schema)
+    policy = IndexPolicy(entity_links=False, date_times=False, status_lists=False, fields=["code", "Shot.sg_notes"])
+    orm = make_sg_orm(index_policy=policy)
+
+    assert indexed_columns(orm.entity_table("Shot")) == [("code",), ("sg_notes",)]
+    assert indexed_columns(orm.entity_table("Project")) == [("code",)]
+    assert orm.model_options()["index_policy"]["fields"] == ["Shot.sg_notes", "code"]
+
+
+def test_index_name_is_shortened():
+    """Names beyond the PostgreSQL identifier limit are truncated with a stable hash suffix."""
+    name = index_name("CustomNonProjectEntity01", ["sg_a_very_long_custom_field_name_id", "other"])
+    assert len(name) == 63
+    assert name == index_name("CustomNonProjectEntity01", ["sg_a_very_long_custom_field_name_id", "other"])
+    assert index_name("Shot", ["project_id"]) == "ix_Shot_project_id"
+
+
+def test_create_script_carries_indexes(fake_sg, example_schema, make_sg_orm, tmp_path):
+    """Generated scripts declare the same indexes."""
+    fake_sg.sg_schema = schema_with_dates(example_schema)
+    orm = make_sg_orm(index_policy=True)
+    script_path = tmp_path / "sgmodel_indexes.py"
+    orm.create_script(str(script_path))
+    assert "Index('ix_Shot_updated_at', 'updated_at')" in script_path.read_text()
+
+    spec = importlib.util.spec_from_file_location("sgmodel_indexes", script_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    assert indexed_columns(module.Shot.__table__) == indexed_columns(orm.entity_table("Shot"))
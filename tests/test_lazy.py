@@ -0,0 +1,63 @@
+"""Tests for lazy per-entity class materialization."""
+
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import Session
+
+
+def test_lazy_builds_nothing_up_front(make_sg_orm):
+    """No classes or tables exist until an entity is accessed."""
+    orm = make_sg_orm(lazy=True)
+    assert orm.classes.materialized == {}
+    assert orm.Base.metadata.tables == {}
+    assert sorted(orm.classes) == ["Asset", "Project", "Sequence", "Shot"]
+    assert "Shot" in orm.classes
+    assert orm.classes.materialized == {}
+
+
+def test_lazy_builds_fk_targets_transitively(make_sg_orm):
+    """Accessing Shot builds Shot plus the tables its FKs point to, but not Asset."""
+    orm = make_sg_orm(lazy=True)
+    Shot = orm["Shot"]
+    assert Shot.__tablename__ == "Shot"
+    assert sorted(orm.classes.materialized) == ["Project", "Sequence", "Shot"]
+    assert "Asset" not in orm.Base.metadata.tables
+
+    # same class on every access
+    assert orm["Shot"] is Shot
+    assert orm.get("Shot") is Shot
+
+
+def test_lazy_missing_entity(make_sg_orm):
+    """Unknown entities behave like the eager mapping."""
+    orm = make_sg_orm(lazy=True)
+    assert orm.get("NonExistentEntity") is None
+    assert orm["NonExistentEntity"] is None
+
+
+def test_lazy_matches_eager_columns(make_sg_orm, sg_orm):
+    """Lazily built classes have the same columns as eagerly built ones."""
+    orm = make_sg_orm(lazy=True)
+    for name in ["Asset", "Shot"]:
+        lazy_columns = sorted(c.name for c in orm[name].__table__.columns)
+        eager_columns = sorted(c.name for c in sg_orm[name].__table__.columns)
+        assert lazy_columns == eager_columns
+
+
+def test_lazy_classes_usable_in_session(make_sg_orm, sqlite_engine):
+    """Materialized classes work against the built-in session and a real database."""
+    orm = make_sg_orm(lazy=True)
+    Shot = orm["Shot"]
+    orm.session.add(Shot(id=1, code="SHOT_001"))
+    orm.session.commit()
+    assert orm.session.execute(select(Shot.code)).scalar_one() == "SHOT_001"
+
+    # classes materialized after the in-memory engine exists get their tables too
+    Asset = orm["Asset"]
+    orm.session.add(Asset(id=1, code="ASSET_001"))
+    orm.session.commit()
+
+    orm.Base.metadata.create_all(sqlite_engine)
+    assert sorted(inspect(sqlite_engine).get_table_names()) == ["Asset", "Project", "Sequence", "Shot"]
+    with Session(sqlite_engine) as session:
+        session.add(Asset(id=2, code="ASSET_002"))
+        session.commit()
@@ -0,0 +1,86 @@
+"""Tests for link tables generated for multi_entity fields."""
+
+import sqlalchemy as sa
+from sqlalchemy import select
+
+
+def populate(sg):
+    sg.add("Project", id=1, code="DEMO", name="Demo")
+    for shot_id in (1, 2, 3):
+        sg.add("Shot", id=shot_id, code=f"SHOT_{shot_id}")
+    sg.add(
+        "Asset",
+        id=1,
+        code="HERO",
+        shots=[{"type": "Shot", "id": 2}, {"type": "Shot", "id": 1}],
+        task_assignees=[{"type": "HumanUser", "id": 5}, {"type": "Group", "id": 7}],
+    )
+    sg.add("Asset", id=2, code="PROP", shots=[{"type": "Shot", "id": 2}])
+
+
+def links(engine, link_table):
+    with engine.connect() as connection:
+        query = select(link_table).order_by(link_table.c.source_id, link_table.c.ordinal)
+        return [tuple(row) for row in connection.execute(query)]
+
+
+def test_link_table_model(fake_sg, make_sg_orm):
+    """multi_entity fields get a link table instead of _ids/_type columns."""
+    orm = make_sg_orm(link_tables=True)
+    asset = orm.entity_table("Asset")
+    assert "shots_ids" not in asset.c
+    assert "task_assignees_ids" not in asset.c and "task_assignees_type" not in asset.c
+
+    link_tables = orm.entity_link_tables("Asset")
+    assert sorted(link_tables) == ["shots", "task_assignees"]
+    shots = link_tables["shots"]
+    assert shots.name == "Asset__shots"
+    assert [column.name for column in shots.primary_key] == ["source_id", "target_id", "target_type"]
+    assert [fk.target_fullname for fk in shots.c.source_id.foreign_keys] == ["Asset.id"]
+    assert [fk.target_fullname for fk in shots.c.target_id.foreign_keys] == ["Shot.id"]
+    assert not link_tables["task_assignees"].c.target_id.foreign_keys
+    assert [[column.name for column in index.columns] for index in shots.indexes] == [["target_id", "target_type"]]
+
+    # tables are created with the model
+    assert {"Asset__shots", "Asset__task_assignees"} <= set(sa.inspect(orm.engine).get_table_names())
+
+
+def test_load_populates_link_tables(fake_sg, mirror):
+    """Loading writes one link row per linked entity, in field order."""
+    populate(fake_sg)
+    orm = mirror(link_tables=True)
+    engine = orm.engine
+
+    assert orm.load_entity("Asset")["written"] == 2
+    link_tables = orm.entity_link_tables("Asset")
+    assert links(engine, link_tables["shots"]) == [(1, 2, "Shot", 0), (1, 1, "Shot", 1), (2, 2, "Shot", 0)]
+    assert links(engine, link_tables["task_assignees"]) == [(1, 5, "HumanUser", 0), (1, 7, "Group", 1)]
+
+    # reverse lookup: which assets use shot 2
+    shots = link_tables["shots"]
+    with engine.connect() as connection:
+        query = select(shots.c.source_id).where(shots.c.target_id == 2, shots.c.target_type == "Shot")
+        assert sorted(connection.execute(query).scalars()) == [1, 2]
+
+
+def test_reload_replaces_links(fake_sg, mirror):
+    """Re-loading a record replaces its links, dropping the ones removed in SG."""
+    populate(fake_sg)
+    orm = mirror(link_tables=True)
+    engine = orm.engine
+    orm.load_entity("Asset", resume=True)
+
+    fake_sg.records["Asset"][1]["shots"] = [{"type": "Shot", "id": 3}]
+    fake_sg.records["Asset"][2]["shots"] = []
+    orm.load_entity("Asset", resume=True)
+    assert links(engine, orm.entity_link_tables("Asset")["shots"]) == [(1, 3, "Shot", 0)]
+
+
+def test_link_tables_lazy(fake_sg, make_sg_orm):
+    """Link tables follow lazy materialization."""
+    orm = make_sg_orm(link_tables=True, lazy=True)
+    orm["Asset"]
+    assert "Shot" in orm.classes.materialized
+    assert "Asset__shots" in sa.inspect(orm.engine).get_table_names()
+    assert sorted(orm.entity_link_tables("Asset")) == ["shots", "task_assignees"]
+    assert "shots_ids" not in orm.entity_table("Asset").c
@@ -0,0 +1,130 @@
+"""Tests for dictionary-encoded status_list/list columns."""
+
+import copy
+import pickle
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy import select
+
+from shotgrid_orm import LIST_VALUE_TABLE, ListEncoder
+
+
+@pytest.fixture
+def list_sg(fake_sg, example_schema):
+    """FakeShotgun whose Shot has a status_list and a list field, with 4 shots."""
+    schema = copy.deepcopy(example_schema)
+    for name, data_type, values in [
+        ("sg_status_list", "status_list", ["wtg", "ip", "fin"]),
+        ("sg_kind", "list", ["vfx", "plate"]),
+    ]:
+        field = copy.deepcopy(schema["Shot"]["fields"]["code"])
+        field["data_type"]["value"] = data_type
+        field["name"]["value"] = name
+        field["properties"]["valid_values"] = {"value": values}
+        schema["Shot"]["fields"][name] = field
+    fake_sg.sg_schema = schema
+    for shot_id, status, kind in [(1, "wtg", "vfx"), (2, "fin", None), (3, "omt", "plate"), (4, "ip", "vfx")]:
+        fake_sg.add("Shot", id=shot_id, code=f"SHOT_{shot_id}", sg_status_list=status, sg_kind=kind)
+    return fake_sg
+
+
+def lookup_rows(engine):
+    with engine.connect() as connection:
+        table = sa.Table(LIST_VALUE_TABLE, sa.MetaData(), autoload_with=connection)
+        query = select(table.c.field, table.c.code, table.c.value).order_by(table.c.field, table.c.code)
+        return [tuple(row) for row in connection.execute(query)]
+
+
+def test_encoded_columns_and_seed(list_sg, make_sg_orm):
+    """List fields become SmallInteger codes; the lookup table is seeded from valid_values."""
+    orm = make_sg_orm(encode_lists=True)
+    shot = orm.entity_table("Shot")
+    assert isinstance(shot.c.sg_status_list.type, sa.SmallInteger)
+    assert isinstance(shot.c.sg_kind.type, sa.SmallInteger)
+    assert LIST_VALUE_TABLE in orm.Base.metadata.tables
+
+    assert lookup_rows(orm.engine) == [
+        ("sg_kind", 1, "vfx"),
+        ("sg_kind", 2, "plate"),
+        ("sg_status_list", 1, "wtg"),
+        ("sg_status_list", 2, "ip"),
+        ("sg_status_list", 3, "fin"),
+    ]
+
+
+def test_load_translates_and_appends(list_sg, mirror):
+    """The loader stores codes and appends values missing from valid_values."""
+    orm = mirror(encode_lists=True)
+    engine = orm.engine
+    orm.load_entity("Shot", page_size=2)
+
+    shot = orm.entity_table("Shot")
+    with engine.connect() as connection:
+        rows = connection.execute(select(shot.c.id, shot.c.sg_status_list, shot.c.sg_kind).order_by(shot.c.id)).all()
+    assert [tuple(row) for row in rows] == [(1, 1, 1), (2, 3, None), (3, 4, 2), (4, 2, 1)]
+    assert orm.list_codes("Shot", "sg_status_list") == {"wtg": 1, "ip": 2, "fin": 3, "omt": 4}
+
+    # upserts translate values too, and pass codes through
+    orm.upsert("Shot", [{"id": 1, "sg_status_list": "omt"}, {"id": 2, "sg_status_list": 2}])
+    with engine.connect() as connection:
+        statuses = connection.execute(select(shot.c.sg_status_list).order_by(shot.c.id)).scalars().all()
+    assert statuses == [4, 2, 4, 2]
+
+
+def test_rolled_back_codes_are_not_cached(list_sg, fk_engine, mirror):
+    """A value added in a transaction that rolls back is added again, not reused with a code nobody has."""
+    orm = mirror(encode_lists=True, engine=fk_engine)
+    with pytest.raises(sa.exc.IntegrityError):
+        orm.upsert("Shot", [{"id": 1, "code": "SHOT_1", "project_id": 99, "sg_status_list": "omt"}])
+    assert "omt" not in orm.list_codes("Shot", "sg_status_list")
+
+    orm.upsert("Shot", [{"id": 2, "code": "SHOT_2", "sg_status_list": "omt"}])
+    orm.upsert("Shot", [{"id": 3, "code": "SHOT_3", "sg_status_list": "hld"}])
+    assert orm.list_codes("Shot", "sg_status_list") == {"wtg": 1, "ip": 2, "fin": 3, "omt": 4, "hld": 5}
+    assert orm.find("Shot", [], ["sg_status_list"], order=[{"field_name": "id", "direction": "asc"}]) == [
+        {"type": "Shot", "id": 2, "sg_status_list": "omt"},
+        {"type": "Shot", "id": 3, "sg_status_list": "hld"},
+    ]
+
+
+def test_concurrently_added_code_is_skipped(list_sg, make_sg_orm, monkeypatch):
+    """A code taken by another process between reading and inserting moves the value to the next free code."""
+    orm = make_sg_orm(encode_lists=True)
+    encoder = orm.list_encoder
+    with orm.engine.begin() as connection:
+        stale = encoder.read_codes(connection, "Shot", "sg_status_list")
+        connection.execute(
+            encoder.table.insert().values(entity_type="Shot", field="sg_status_list", code=4, value="hld")
+        )
+    reads = []
+    read_codes = encoder.read_codes
+
+    def racing_read(*args):
+        reads.append(args)
+        return dict(stale) if len(reads) == 1 else read_codes(*args)
+
+    monkeypatch.setattr(encoder, "read_codes", racing_read)
+    with orm.engine.begin() as connection:
+        assert encoder.add_values(connection, "Shot", "sg_status_list", {"omt"})["omt"] == 5
+    assert len(reads) == 3
+    assert orm.list_codes("Shot", "sg_status_list") == {"wtg": 1, "ip": 2, "fin": 3, "hld": 4, "omt": 5}
+
+
+def test_encoding_in_lazy_mode(list_sg, make_sg_orm):
+    """The lookup table is created and seeded with the first materialized classes."""
+    orm = make_sg_orm(encode_lists=True, lazy=True)
+    assert orm.engine is not None
+    orm["Shot"]
+    assert ("sg_status_list", 3, "fin") in lookup_rows(orm.engine)
+
+
+def test_list_encoder_pickles(list_sg, make_sg_orm):
+    """Encoders travel to worker processes with their known codes."""
+    encoder = make_sg_orm(encode_lists=True).list_encoder
+    encoder.codes[("Shot", "sg_status_list")] = {"wtg": 1}
+    clone = pickle.loads(pickle.dumps(encoder))
+    assert isinstance(clone, ListEncoder)
+    assert clone.codes == encoder.codes
+    assert clone.fields == {"Shot": {"sg_status_list": "sg_status_list", "sg_kind": "sg_kind"}}
+    assert clone.table.name == LIST_VALUE_TABLE
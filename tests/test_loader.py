@@ -0,0 +1,112 @@
+"""Tests for the bulk entity loader."""
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from shotgrid_orm import SGORM, SchemaType, flatten_record, read_checkpoints, reset_checkpoint
+
+
+def test_flatten_record(fake_sg, make_sg_orm):
+    """entity/multi_entity values are flattened into the generated _id/_type/_ids columns."""
+    fake_sg.add_shots(2)
+    orm = make_sg_orm()
+    record = fake_sg.find("Asset", [], list(orm.field_map("Asset")))[0]
+
+    row = flatten_record(record, orm.field_map("Asset"), orm.entity_table("Asset"))
+    assert row["id"] == 1
+    assert row["project_id"] == 1
+    assert "project_type" not in row
+    assert row["shots_ids"] == "1,2"
+    assert row["entity_source_id"] == 10
+    assert row["entity_source_type"] == "Sequence"
+    assert row["task_assignees_ids"] == "5,7"
+    assert row["task_assignees_type"] == "HumanUser,Group"
+
+
+def test_load_entity_pages_and_batches(fake_sg, mirror):
+    """Records are paged by id keyset and all of them land in the table."""
+    fake_sg.add_shots(1200)
+    orm = mirror()
+    engine = orm.engine
+
+    for entity_type in ["Project", "Sequence"]:
+        orm.load_entity(entity_type)
+    fake_sg.calls.clear()
+    stats = orm.load_entity("Shot", page_size=100, batch_size=250)
+
+    assert stats == {"entity": "Shot", "fetched": 1200, "written": 1200}
+    finds = [call for call in fake_sg.calls if call[0] == "find"]
+    # 12 full pages plus the empty page that ends the keyset scan
+    assert len(finds) == 13
+    assert finds[1][2][-1] == ["id", "greater_than", 100]
+
+    Shot = orm["Shot"]
+    with Session(engine) as session:
+        assert session.scalar(select(func.count()).select_from(Shot)) == 1200
+        shot = session.get(Shot, 42)
+        assert shot.code == "SHOT_0042"
+        assert shot.project_id == 1
+        assert shot.sg_sequence_id == 10
+
+
+def test_load_entity_with_filters(fake_sg, mirror):
+    """Caller filters are combined with the id keyset filter."""
+    fake_sg.add_shots(20)
+    orm = mirror()
+
+    stats = orm.load_entity("Shot", filters=[["id", "less_than", 11]], page_size=3)
+    assert stats["written"] == 10
+
+
+def test_load_entity_requires_connection(schema_file):
+    """Loading without a SG connection fails clearly."""
+    import pytest
+
+    orm = SGORM(sg_schema_type=SchemaType.JSON_FILE, sg_schema_source=str(schema_file.absolute()), echo=False)
+    with pytest.raises(ValueError):
+        orm.load_entity("Shot")
+    with pytest.raises(ValueError):
+        orm.entity_table("NonExistentEntity")
+
+
+def test_load_entity_resumes_from_checkpoint(fake_sg, mirror):
+    """A load that dies part way resumes after the last committed batch."""
+    import pytest
+
+    fake_sg.add_shots(1000)
+    orm = mirror()
+    engine = orm.engine
+
+    find = fake_sg.find
+    pages = []
+
+    def dying_find(*args, **kwargs):
+        pages.append(args[1])
+        if len(pages) == 6:
+            raise RuntimeError("connection lost")
+        return find(*args, **kwargs)
+
+    fake_sg.find = dying_find
+    with pytest.raises(RuntimeError):
+        orm.load_entity("Shot", page_size=100, batch_size=200, resume=True)
+
+    # two batches of two pages committed before the sixth page failed
+    checkpoint = read_checkpoints(engine)["Shot"]
+    assert (checkpoint["last_id"], checkpoint["rows"], checkpoint["status"]) == (400, 400, "running")
+
+    fake_sg.find = find
+    fake_sg.calls.clear()
+    stats = orm.load_entity("Shot", page_size=100, batch_size=200, resume=True)
+    assert stats == {"entity": "Shot", "fetched": 600, "written": 600, "resumed_from": 400}
+    assert fake_sg.calls[0][2][-1] == ["id", "greater_than", 400]
+
+    checkpoint = read_checkpoints(engine)["Shot"]
+    assert (checkpoint["last_id"], checkpoint["rows"], checkpoint["status"]) == (1000, 1000, "done")
+    with engine.connect() as connection:
+        assert connection.execute(select(func.count()).select_from(orm.entity_table("Shot"))).scalar() == 1000
+
+    # a finished load starts over (upserting), as does one whose checkpoint was reset
+    stats = orm.load_entity("Shot", page_size=500, resume=True)
+    assert (stats["resumed_from"], stats["written"]) == (0, 1000)
+    reset_checkpoint(engine, "Shot")
+    assert read_checkpoints(engine) == {}
@@ -0,0 +1,111 @@
+"""Tests for the Alembic integration."""
+
+import copy
+import io
+import json
+import shutil
+from pathlib import Path
+
+import sqlalchemy as sa
+from alembic.autogenerate import render_python_code
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.operations import Operations, ops
+
+from alembic import command
+from shotgrid_orm import CreateIndexConcurrentlyOp, create_control_tables, include_object, process_revision_directives
+
+ALEMBIC_DIR = Path(__file__).parent.parent / "alembic"
+
+
+def alembic_config(tmp_path, schema_path, url):
+    script_location = tmp_path / "alembic"
+    shutil.copytree(ALEMBIC_DIR, script_location)
+    (script_location / "versions").mkdir(exist_ok=True)
+    config = Config()
+    config.set_main_option("script_location", str(script_location))
+    config.set_main_option("sqlalchemy.url", url)
+    config.set_main_option("sg_schema_file", str(schema_path))
+    return config
+
+
+def test_env_autogenerates_from_sgorm_metadata(tmp_path, example_schema_path, example_schema):
+    """env.py feeds the SGORM model to autogenerate; SQLite revisions use batch mode."""
+    db_path = tmp_path / "warehouse.db"
+    config = alembic_config(tmp_path, example_schema_path, f"sqlite:///{db_path}")
+
+    command.revision(config, message="initial", autogenerate=True)
+    command.upgrade(config, "head")
+    engine = sa.create_engine(f"sqlite:///{db_path}")
+    assert {"Project", "Shot", "Asset", "Sequence"} <= set(sa.inspect(engine).get_table_names())
+
+    # a loader's control table is not proposed for dropping, a new field is added in batch mode
+    create_control_tables(engine)
+    schema = copy.deepcopy(example_schema)
+    field = copy.deepcopy(schema["Shot"]["fields"]["code"])
+    field["name"]["value"] = "sg_cut_in"
+    field["data_type"]["value"] = "number"
+    schema["Shot"]["fields"]["sg_cut_in"] = field
+    changed_path = tmp_path / "schema.json"
+    changed_path.write_text(json.dumps(schema))
+    config.set_main_option("sg_schema_file", str(changed_path))
+    script = command.revision(config, message="cut in", autogenerate=True)
+    code = Path(script.path).read_text()
+    assert "with op.batch_alter_table('Shot'" in code
+    assert "sg_cut_in" in code
+    assert "drop_table" not in code
+
+
+def test_postgres_revisions_are_online_safe():
+    """Indexes on existing tables are built concurrently and added columns are nullable."""
+    upgrade = ops.UpgradeOps(
+        ops=[
+            ops.CreateTableOp("Scene", [sa.Column("id", sa.BigInteger, primary_key=True)]),
+            ops.CreateIndexOp("ix_Scene_id", "Scene", ["id"]),
+            ops.ModifyTableOps(
+                "EventLogEntry",
+                [
+                    ops.AddColumnOp("EventLogEntry", sa.Column("sg_flag", sa.Boolean, nullable=False)),
+                    ops.CreateIndexOp("ix_EventLogEntry_sg_flag", "EventLogEntry", ["sg_flag"]),
+                ],
+            ),
+        ]
+    )
+    script = ops.MigrationScript("abc", upgrade, ops.DowngradeOps(ops=[]))
+    context = MigrationContext.configure(dialect_name="postgresql", opts={"as_sql": True})
+    process_revision_directives(context, None, [script])
+
+    code = render_python_code(script.upgrade_ops)
+    assert "op.create_index('ix_Scene_id', 'Scene', ['id']" in code
+    assert "op.create_index_concurrently('ix_EventLogEntry_sg_flag', 'EventLogEntry', ['sg_flag'])" in code
+    assert "sa.Column('sg_flag', sa.Boolean(), nullable=True)" in code
+
+    # other dialects are left alone
+    sqlite_script = ops.MigrationScript(
+        "abc", ops.UpgradeOps(ops=[ops.CreateIndexOp("ix", "Shot", ["code"])]), ops.DowngradeOps(ops=[])
+    )
+    process_revision_directives(MigrationContext.configure(dialect_name="sqlite"), None, [sqlite_script])
+    assert type(sqlite_script.upgrade_ops.ops[0]) is ops.CreateIndexOp
+
+
+def test_create_index_concurrently(tmp_path):
+    buffer = io.StringIO()
+    context = MigrationContext.configure(
+        dialect_name="postgresql", opts={"as_sql": True, "output_buffer": buffer, "transactional_ddl": True}
+    )
+    Operations(context).create_index_concurrently("ix_Shot_code", "Shot", ["code"])
+    assert 'CREATE INDEX CONCURRENTLY "ix_Shot_code" ON "Shot" (code)' in buffer.getvalue()
+
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    with engine.begin() as connection:
+        connection.execute(sa.text('CREATE TABLE "Shot" (id INTEGER, code VARCHAR)'))
+        Operations(MigrationContext.configure(connection)).invoke(
+            CreateIndexConcurrentlyOp("ix_Shot_code", "Shot", ["code"])
+        )
+    assert [index["name"] for index in sa.inspect(engine).get_indexes("Shot")] == ["ix_Shot_code"]
+
+
+def test_include_object_skips_control_tables():
+    assert not include_object(None, "sg_sync_watermark", "table", True, None)
+    assert include_object(None, "Shot", "table", True, None)
+    assert include_object(None, "sg_sync_watermark", "table", False, None)
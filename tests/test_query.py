@@ -0,0 +1,149 @@
+"""Tests for the sg.find facade over the local mirror."""
+
+import copy
+
+import pytest
+
+PROJECT = {"type": "Project", "id": 1}
+SEQUENCE = {"type": "Sequence", "id": 10}
+MIRRORED = ["Project", "Sequence", "Shot", "Asset"]
+
+
+def populate(sg):
+    sg.add("Project", id=1, code="DEMO", name="Demo")
+    sg.add("Project", id=2, code="OTHER", name="Other")
+    sg.add("Sequence", id=10, code="SEQ010", project=PROJECT)
+    for shot_id in range(1, 7):
+        sg.add(
+            "Shot",
+            id=shot_id,
+            code=f"SHOT_{shot_id:02d}",
+            description="hero shot" if shot_id % 2 else None,
+            project=PROJECT if shot_id < 5 else {"type": "Project", "id": 2},
+            sg_sequence=SEQUENCE if shot_id < 4 else None,
+        )
+    sg.add(
+        "Asset",
+        id=1,
+        code="HERO",
+        project=PROJECT,
+        shots=[{"type": "Shot", "id": 2}, {"type": "Shot", "id": 1}],
+        entity_source={"type": "Sequence", "id": 10},
+        task_assignees=[{"type": "HumanUser", "id": 5}, {"type": "Group", "id": 7}],
+    )
+    sg.add("Asset", id=2, code="PROP", project=PROJECT, shots=[{"type": "Shot", "id": 3}], entity_source=None)
+
+
+SHOT_FIELDS = ["code", "description", "project", "sg_sequence"]
+
+SHOT_QUERIES = [
+    ([], {}),
+    ([["code", "is", "SHOT_03"]], {}),
+    ([["project", "is", PROJECT]], {}),
+    ([["project", "is_not", PROJECT]], {}),
+    ([["sg_sequence", "is", None]], {}),
+    ([["id", "between", [2, 4]]], {}),
+    ([["id", "greater_than", 2], ["id", "less_than", 6]], {}),
+    ([["code", "in", ["SHOT_01", "SHOT_06"]]], {}),
+    ([["code", "starts_with", "SHOT_0"]], {"limit": 2, "page": 2}),
+    ([["id", "is", 1], ["id", "is", 5]], {"filter_operator": "any"}),
+    (
+        [
+            ["project", "is", PROJECT],
+            {"filter_operator": "any", "filters": [["id", "is", 2], ["sg_sequence", "is", None]]},
+        ],
+        {},
+    ),
+    ([], {"order": [{"field_name": "code", "direction": "desc"}], "limit": 3}),
+]
+
+
+@pytest.mark.parametrize("filters,kwargs", SHOT_QUERIES)
+def test_find_matches_sg(fake_sg, mirror, filters, kwargs):
+    """The local facade returns what sg.find returns for the same arguments."""
+    populate(fake_sg)
+    orm = mirror(MIRRORED)
+
+    expected = fake_sg.find("Shot", copy.deepcopy(filters), SHOT_FIELDS, **kwargs)
+    assert orm.find("Shot", filters, SHOT_FIELDS, **kwargs) == expected
+
+
+@pytest.mark.parametrize("link_tables", [False, True])
+def test_find_multi_entity(fake_sg, mirror, link_tables):
+    """multi_entity fields come back as entity lists and filter by membership."""
+    populate(fake_sg)
+    orm = mirror(MIRRORED, link_tables=link_tables)
+    fields = ["code", "shots", "entity_source", "task_assignees"]
+
+    assert orm.find("Asset", [], fields) == [
+        {
+            "type": "Asset",
+            "id": 1,
+            "code": "HERO",
+            "shots": [{"type": "Shot", "id": 2}, {"type": "Shot", "id": 1}],
+            "entity_source": {"type": "Sequence", "id": 10},
+            "task_assignees": [{"type": "HumanUser", "id": 5}, {"type": "Group", "id": 7}],
+        },
+        {
+            "type": "Asset",
+            "id": 2,
+            "code": "PROP",
+            "shots": [{"type": "Shot", "id": 3}],
+            "entity_source": None,
+            "task_assignees": [],
+        },
+    ]
+    assert [a["id"] for a in orm.find("Asset", [["shots", "is", {"type": "Shot", "id": 1}]])] == [1]
+    assert [a["id"] for a in orm.find("Asset", [["shots", "is_not", {"type": "Shot", "id": 1}]])] == [2]
+    shots = [{"type": "Shot", "id": 1}, {"type": "Shot", "id": 3}]
+    assert [a["id"] for a in orm.find("Asset", [["shots", "in", shots]])] == [1, 2]
+    assert [a["id"] for a in orm.find("Asset", [["entity_source", "type_is", "Sequence"]])] == [1]
+    # the entity type counts, not just the id
+    assert orm.find("Asset", [["shots", "is", {"type": "Asset", "id": 1}]]) == []
+    assert [a["id"] for a in orm.find("Asset", [["shots", "not_in", [{"type": "Asset", "id": 3}]]])] == [1, 2]
+    group = {"type": "Group", "id": 5}
+    if link_tables:
+        assert orm.find("Asset", [["task_assignees", "is", group]]) == []
+        assert [a["id"] for a in orm.find("Asset", [["task_assignees", "is", {"type": "Group", "id": 7}]])] == [1]
+    else:
+        with pytest.raises(ValueError):
+            orm.find("Asset", [["task_assignees", "is", group]])
+        assert [a["id"] for a in orm.find("Asset", [["task_assignees", "is", None]])] == [2]
+
+
+def test_find_one_and_errors(fake_sg, mirror):
+    populate(fake_sg)
+    orm = mirror(MIRRORED)
+
+    assert orm.find_one("Shot", [["code", "is", "SHOT_02"]], ["code"]) == {"type": "Shot", "id": 2, "code": "SHOT_02"}
+    assert orm.find_one("Shot", [["code", "is", "nope"]]) is None
+    assert orm.find_one("Shot", [["code", "contains", "hot_0"]], order=[{"field_name": "id", "direction": "desc"}]) == {
+        "type": "Shot",
+        "id": 6,
+    }
+    other = [{"type": "Project", "id": 2}, {"type": "Sequence", "id": 1}]
+    assert [s["id"] for s in orm.find("Shot", [["project", "in", other]])] == [5, 6]
+    with pytest.raises(ValueError):
+        orm.find("Shot", [["no_such_field", "is", 1]])
+    with pytest.raises(ValueError):
+        orm.find("Shot", [["code", "in_last", 1, "DAY"]])
+
+
+def test_find_encoded_lists(fake_sg, example_schema, mirror):
+    """Encoded list columns are filtered by value and decoded in results."""
+    schema = copy.deepcopy(example_schema)
+    field = copy.deepcopy(schema["Shot"]["fields"]["code"])
+    field["data_type"]["value"] = "status_list"
+    field["name"]["value"] = "sg_status_list"
+    field["properties"]["valid_values"] = {"value": ["wtg", "ip", "fin"]}
+    schema["Shot"]["fields"]["sg_status_list"] = field
+    fake_sg.sg_schema = schema
+    for shot_id, status in [(1, "wtg"), (2, "ip"), (3, "fin"), (4, "ip")]:
+        fake_sg.add("Shot", id=shot_id, code=f"SHOT_{shot_id}", sg_status_list=status)
+    orm = mirror(["Shot"], encode_lists=True)
+
+    assert orm.find("Shot", [["sg_status_list", "is", "ip"]], ["sg_status_list"]) == [
+        {"type": "Shot", "id": 2, "sg_status_list": "ip"},
+        {"type": "Shot", "id": 4, "sg_status_list": "ip"},
+    ]
+    assert [s["id"] for s in orm.find("Shot", [["sg_status_list", "not_in", ["ip", "wtg"]]])] == [3]
@@ -0,0 +1,217 @@
+"""Tests for read-through lookups that fall back to SG."""
+
+import hashlib
+import json
+import threading
+import time
+
+import pytest
+from sqlalchemy import select
+
+from shotgrid_orm import SingleFlight, fetch_claim, row_fetch
+
+
+def cache_key(entity_type, entity_id):
+    """The sg_fetch_claim key of a get() lookup."""
+    return hashlib.sha256(json.dumps([entity_type, entity_id]).encode("utf-8")).hexdigest()
+
+
+def finds(sg):
+    return [call for call in sg.calls if call[0] == "find"]
+
+
+def test_get_reads_through_and_caches(fake_sg, mirror):
+    """A miss fetches from SG and writes back; the next lookup is served locally."""
+    fake_sg.add("Shot", id=1, code="SHOT_1", project={"type": "Project", "id": 1})
+    orm = mirror()
+    cache = orm.read_through(max_age=60)
+
+    expected = {"type": "Shot", "id": 1, "code": "SHOT_1", "project": {"type": "Project", "id": 1}}
+    assert cache.get("Shot", 1, ["code", "project"]) == expected
+    assert len(finds(fake_sg)) == 1
+    assert orm.find("Shot", [], ["code"]) == [{"type": "Shot", "id": 1, "code": "SHOT_1"}]
+
+    fake_sg.records["Shot"][1]["code"] = "RENAMED"
+    assert cache.get("Shot", 1, ["code", "project"]) == expected
+    assert len(finds(fake_sg)) == 1
+
+    # unknown ids are remembered as missing too
+    assert cache.get("Shot", 99) is None
+    assert cache.get("Shot", 99) is None
+    assert len(finds(fake_sg)) == 2
+
+
+def test_stale_rows_are_refetched(fake_sg, mirror):
+    """Past max_age records are fetched again; retired ones are deleted locally."""
+    fake_sg.add("Shot", id=1, code="SHOT_1")
+    fake_sg.add("Shot", id=2, code="SHOT_2")
+    orm = mirror()
+    cache = orm.read_through(max_age=0)
+
+    assert cache.get("Shot", 1, ["code"])["code"] == "SHOT_1"
+    fake_sg.records["Shot"][1]["code"] = "RENAMED"
+    assert cache.get("Shot", 1, ["code"])["code"] == "RENAMED"
+    assert orm.find_one("Shot", [["id", "is", 1]], ["code"])["code"] == "RENAMED"
+
+    cache.get("Shot", 2)
+    fake_sg.retire("Shot", 2)
+    assert cache.get("Shot", 2) is None
+    assert orm.find("Shot", []) == [{"type": "Shot", "id": 1}]
+    with orm.engine.connect() as connection:
+        assert sorted(connection.scalars(select(row_fetch.c.id))) == [1, 2]
+
+
+def test_retired_referenced_row_with_foreign_keys(fake_sg, fk_engine, mirror):
+    """A retired record other rows link to is deleted locally when FKs are enforced."""
+    fake_sg.add("Project", id=1, code="DEMO")
+    fake_sg.add("Shot", id=1, code="SHOT_1", project={"type": "Project", "id": 1})
+    orm = mirror(engine=fk_engine)
+    cache = orm.read_through(max_age=0)
+    cache.get("Project", 1)
+    cache.get("Shot", 1)
+
+    fake_sg.retire("Project", 1)
+    assert cache.get("Project", 1) is None
+    assert orm.find("Project", []) == []
+    assert orm.find("Shot", [], ["project"]) == [{"type": "Shot", "id": 1, "project": None}]
+
+
+def test_find_reads_through(fake_sg, mirror):
+    """Filter lookups with no fresh local match go to SG; fresh ones stay local."""
+    for shot_id in (1, 2, 3):
+        fake_sg.add("Shot", id=shot_id, code=f"SHOT_{shot_id}", project={"type": "Project", "id": shot_id % 2})
+    orm = mirror()
+    cache = orm.read_through(max_age=60)
+    filters = [["project", "is", {"type": "Project", "id": 1}]]
+
+    expected = [{"type": "Shot", "id": 1, "code": "SHOT_1"}, {"type": "Shot", "id": 3, "code": "SHOT_3"}]
+    assert cache.find("Shot", filters, ["code"]) == expected
+    assert cache.find("Shot", filters, ["code"]) == expected
+    assert cache.find_one("Shot", filters, ["code"]) == expected[0]
+    assert len(finds(fake_sg)) == 1
+
+
+def test_concurrent_misses_share_one_call(fake_sg, mirror):
+    """A burst of identical misses results in a single SG request."""
+    fake_sg.add("Shot", id=1, code="SHOT_1")
+    orm = mirror()
+    cache = orm.read_through(max_age=60)
+    find = fake_sg.find
+
+    def slow_find(*args, **kwargs):
+        time.sleep(0.2)
+        return find(*args, **kwargs)
+
+    fake_sg.find = slow_find
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("Shot", 1, ["code"]))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [{"type": "Shot", "id": 1, "code": "SHOT_1"}] * 8
+    assert len(finds(fake_sg)) == 1
+
+
+def test_misses_share_one_call_across_processes(fake_sg, mirror):
+    """Read-throughs sharing a database (separate processes) fetch a miss once, through a claim row."""
+    fake_sg.add("Shot", id=1, code="SHOT_1")
+    orm = mirror()
+    caches = [orm.read_through(max_age=60) for _ in range(3)]  # no shared SingleFlight, like processes
+    find = fake_sg.find
+
+    def slow_find(*args, **kwargs):
+        time.sleep(0.2)
+        return find(*args, **kwargs)
+
+    fake_sg.find = slow_find
+    results = []
+    threads = [
+        threading.Thread(target=lambda cache=cache: results.append(cache.get("Shot", 1, ["code"])))
+        for cache in caches
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [{"type": "Shot", "id": 1, "code": "SHOT_1"}] * 6
+    assert len(finds(fake_sg)) == 1
+    with orm.engine.connect() as connection:
+        assert [row.done_at is not None for row in connection.execute(select(fetch_claim))] == [True]
+
+
+def test_shared_misses_keep_each_callers_fields(fake_sg, mirror):
+    """Callers sharing a fetch, in one process or through a claim, each get the fields they asked for."""
+    fake_sg.add("Shot", id=1, code="SHOT_1", description="hero")
+    orm = mirror()
+    cache, other = orm.read_through(max_age=60), orm.read_through(max_age=60)
+    find = fake_sg.find
+
+    def slow_find(*args, **kwargs):
+        time.sleep(0.2)
+        return find(*args, **kwargs)
+
+    fake_sg.find = slow_find
+    results = {}
+    lookups = [
+        ("code", lambda: cache.get("Shot", 1, ["code"])),
+        ("description", lambda: cache.get("Shot", 1, ["description"])),
+        ("other", lambda: other.get("Shot", 1, ["code", "description"])),
+    ]
+    threads = [
+        threading.Thread(target=lambda name=name, get=get: results.update({name: get()})) for name, get in lookups
+    ]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+    for thread in threads:
+        thread.join()
+
+    assert results == {
+        "code": {"type": "Shot", "id": 1, "code": "SHOT_1"},
+        "description": {"type": "Shot", "id": 1, "description": "hero"},
+        "other": {"type": "Shot", "id": 1, "code": "SHOT_1", "description": "hero"},
+    }
+
+
+def test_abandoned_claim_is_taken_over(fake_sg, mirror):
+    """A claim whose holder died stops blocking others after claim_timeout; a failed fetch drops it."""
+    fake_sg.add("Shot", id=1, code="SHOT_1")
+    orm = mirror()
+    cache = orm.read_through(max_age=60, claim_timeout=0.2)
+    assert cache.claim(cache_key("Shot", 1))
+    other = orm.read_through(max_age=60, claim_timeout=0.2)
+
+    start = time.perf_counter()
+    assert other.get("Shot", 1, ["code"]) == {"type": "Shot", "id": 1, "code": "SHOT_1"}
+    assert time.perf_counter() - start >= 0.2
+
+    def failing_find(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    fake_sg.find = failing_find
+    with pytest.raises(RuntimeError):
+        other.get("Shot", 2)
+    with orm.engine.connect() as connection:
+        assert connection.execute(select(fetch_claim.c.key)).scalars().all() == [cache_key("Shot", 1)]
+
+
+def test_single_flight_shares_errors():
+    flights = SingleFlight()
+    calls = []
+
+    def fail():
+        calls.append(1)
+        raise RuntimeError("boom")
+
+    for _ in range(2):
+        try:
+            flights.do("key", fail)
+        except RuntimeError as error:
+            assert str(error) == "boom"
+    # calls that don't overlap are not coalesced
+    assert calls == [1, 1]
+    assert flights.do("key", lambda: 42) == 42
@@ -0,0 +1,103 @@
+"""Tests for generated relationship() attributes and polymorphic accessors."""
+
+import copy
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+
+@pytest.fixture
+def rel_sg(fake_sg, example_schema):
+    """FakeShotgun whose Shot also links a parent Shot and a second Project."""
+    schema = copy.deepcopy(example_schema)
+    for name, target in [("parent_shot", "Shot"), ("sg_client_project", "Project")]:
+        field = copy.deepcopy(schema["Shot"]["fields"]["project"])
+        field["name"]["value"] = name
+        field["properties"]["valid_types"] = {"value": [target]}
+        schema["Shot"]["fields"][name] = field
+    fake_sg.sg_schema = schema
+    return fake_sg
+
+
+def populate(orm):
+    Project, Sequence, Shot, Asset = orm["Project"], orm["Sequence"], orm["Shot"], orm["Asset"]
+    with orm.create_sg_orm() as session:
+        session.add_all(
+            [
+                Project(id=1, code="DEMO"),
+                Project(id=2, code="CLIENT"),
+                Sequence(id=10, code="SEQ010", project_id=1),
+                Shot(id=100, code="010", project_id=1, sg_sequence_id=10, sg_client_project_id=2),
+                Shot(id=101, code="010A", project_id=1, parent_shot_id=100),
+                Asset(id=5, code="HERO", project_id=1, entity_source_id=10, entity_source_type="Sequence"),
+            ]
+        )
+        session.commit()
+
+
+def test_no_relationships_by_default(rel_sg, make_sg_orm):
+    orm = make_sg_orm()
+    assert not sa.inspect(orm["Shot"]).relationships
+
+
+def test_relationships_and_backrefs(rel_sg, make_sg_orm):
+    """FK entity fields get a many-to-one relationship and a <table>_<field> backref."""
+    orm = make_sg_orm(relationships=True)
+    populate(orm)
+    Shot, Project = orm["Shot"], orm["Project"]
+
+    with orm.create_sg_orm() as session:
+        shot = session.get(Shot, 100)
+        assert shot.project.code == "DEMO"
+        assert shot.sg_client_project.code == "CLIENT"  # second FK to Project is disambiguated
+        assert shot.sg_sequence.code == "SEQ010"
+        assert [s.id for s in session.get(Project, 1).Shot_project] == [100, 101]
+        assert [s.id for s in session.get(Project, 2).Shot_sg_client_project] == [100]
+
+        # self-reference: many-to-one to the parent, one-to-many backref to the children
+        child = session.get(Shot, 101)
+        assert child.parent_shot is shot
+        assert shot.Shot_parent_shot == [child]
+
+
+def test_relationship_loader_strategy(rel_sg, make_sg_orm):
+    """relationship_lazy sets the default strategy; "raise" forbids implicit lazy loads."""
+    orm = make_sg_orm(relationships=True, relationship_lazy="raise")
+    populate(orm)
+    Shot = orm["Shot"]
+
+    with orm.create_sg_orm() as session:
+        shot = session.get(Shot, 100)
+        with pytest.raises(sa.exc.InvalidRequestError):
+            _ = shot.project
+        shot = session.scalars(select(Shot).where(Shot.id == 101).options(selectinload(Shot.project))).one()
+        assert shot.project.code == "DEMO"
+
+    orm = make_sg_orm(relationships=True, relationship_lazy="selectin")
+    assert sa.inspect(orm["Shot"]).relationships["project"].lazy == "selectin"
+
+
+def test_polymorphic_accessor(rel_sg, make_sg_orm):
+    """Opt-in properties resolve _id/_type pairs through the session and set both on assignment."""
+    orm = make_sg_orm(polymorphic_accessors=True)
+    populate(orm)
+    Asset, Project = orm["Asset"], orm["Project"]
+
+    with orm.create_sg_orm() as session:
+        asset = session.get(Asset, 5)
+        assert asset.entity_source.code == "SEQ010"
+        asset.entity_source = session.get(Project, 2)
+        assert (asset.entity_source_id, asset.entity_source_type) == (2, "Project")
+        asset.entity_source = None
+        assert asset.entity_source is None
+        assert (asset.entity_source_id, asset.entity_source_type) == (None, None)
+
+
+def test_relationships_lazy(rel_sg, make_sg_orm):
+    """Relationships are derived from the tables, so lazily built classes get them too."""
+    lazy = make_sg_orm(lazy=True, relationships=True)
+    populate(lazy)
+    with lazy.create_sg_orm() as session:
+        assert session.get(lazy["Shot"], 100).project.code == "DEMO"
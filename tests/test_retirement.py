@@ -0,0 +1,102 @@
+"""Tests for retirement sync and id reconciliation."""
+
+import pytest
+from sqlalchemy import func, select
+
+
+def populate(sg, shots=10):
+    for shot_id in range(1, shots + 1):
+        sg.add("Shot", id=shot_id, code=f"SHOT_{shot_id}")
+    sg.add("Asset", id=1, code="HERO", shots=[{"type": "Shot", "id": 1}])
+    sg.add("Asset", id=2, code="PROP", shots=[{"type": "Shot", "id": 2}])
+
+
+def ids(orm, entity_type):
+    table = orm.entity_table(entity_type)
+    with orm.engine.connect() as connection:
+        return list(connection.scalars(select(table.c.id).order_by(table.c.id)))
+
+
+def test_sync_retirements_deletes(fake_sg, mirror):
+    """Retired ids are paged with retired_only and deleted with their link rows."""
+    populate(fake_sg)
+    orm = mirror(["Shot", "Asset"], link_tables=True)
+    for shot_id in (2, 4, 6):
+        fake_sg.retire("Shot", shot_id)
+    fake_sg.retire("Asset", 2)
+    fake_sg.calls.clear()
+
+    stats = orm.sync_retirements("Shot", page_size=2, batch_size=2)
+    assert stats == {"entity": "Shot", "retired": 3, "applied": 3}
+    assert ids(orm, "Shot") == [1, 3, 5, 7, 8, 9, 10]
+    # keyset pages over the retired records only
+    assert [call[2] for call in fake_sg.calls] == [[["id", "greater_than", 0]], [["id", "greater_than", 4]]]
+
+    assert orm.sync_retirements("Asset")["applied"] == 1
+    link = orm.entity_link_tables("Asset")["shots"]
+    with orm.engine.connect() as connection:
+        assert connection.scalar(select(func.count()).select_from(link)) == 1
+    # already applied
+    assert orm.sync_retirements("Shot")["applied"] == 0
+
+
+def test_soft_delete_column(fake_sg, mirror):
+    """With retired_column, retirements flag rows; the query facade hides them and loads revive them."""
+    populate(fake_sg)
+    orm = mirror(["Shot", "Asset"], retired_column=True)
+    Shot = orm["Shot"]
+    assert "retired" in Shot.__table__.c
+    assert orm.model_options()["retired_column"] is True
+
+    fake_sg.retire("Shot", 3)
+    assert orm.sync_retirements("Shot")["applied"] == 1
+    assert len(ids(orm, "Shot")) == 10
+    with orm.engine.connect() as connection:
+        assert list(connection.scalars(select(Shot.id).where(Shot.retired))) == [3]
+    assert [shot["id"] for shot in orm.find("Shot", [["id", "less_than", 5]])] == [1, 2, 4]
+
+    # a revived record is un-flagged by the next upsert of it
+    fake_sg.records["Shot"][3] = fake_sg.retired["Shot"].pop(3)
+    orm.load_entity("Shot", resume=True)
+    assert [shot["id"] for shot in orm.find("Shot", [["id", "less_than", 5]])] == [1, 2, 3, 4]
+
+
+@pytest.mark.parametrize("retired_column", [False, True])
+def test_reconcile_ids(fake_sg, mirror, retired_column):
+    """Rows SG no longer returns are removed by a set-based anti-join."""
+    populate(fake_sg, shots=25)
+    orm = mirror(["Shot", "Asset"], retired_column=retired_column)
+    for shot_id in (5, 17):
+        del fake_sg.records["Shot"][shot_id]  # purged, not even retired
+    fake_sg.add("Shot", id=30, code="SHOT_30")
+
+    stats = orm.reconcile_ids("Shot", page_size=10)
+    assert stats == {"entity": "Shot", "live": 24, "applied": 2, "revived": 0, "missing": 1}
+    assert [shot["id"] for shot in orm.find("Shot", [["id", "between", [4, 18]]])] == [
+        i for i in range(4, 19) if i not in (5, 17)
+    ]
+    assert len(ids(orm, "Shot")) == (25 if retired_column else 23)
+    assert orm.reconcile_ids("Shot")["applied"] == 0
+
+
+@pytest.mark.parametrize("reconcile", [False, True])
+def test_removal_with_foreign_keys(fake_sg, fk_engine, mirror, reconcile):
+    """With FKs enforced, references to removed rows are set to NULL and link rows to them deleted."""
+    fake_sg.add("Project", id=1, code="DEMO")
+    fake_sg.add("Project", id=2, code="OTHER")
+    for shot_id in (1, 2, 3):
+        fake_sg.add("Shot", id=shot_id, code=f"SHOT_{shot_id}", project={"type": "Project", "id": 1 + shot_id // 3})
+    fake_sg.add("Asset", id=1, code="HERO", shots=[{"type": "Shot", "id": 1}, {"type": "Shot", "id": 2}])
+    orm = mirror(["Project", "Shot", "Asset"], engine=fk_engine, link_tables=True)
+    fake_sg.retire("Project", 1)
+    fake_sg.retire("Shot", 1)
+
+    for entity_type in ("Project", "Shot"):
+        stats = orm.reconcile_ids(entity_type) if reconcile else orm.sync_retirements(entity_type)
+        assert stats["applied"] == 1
+    assert ids(orm, "Project") == [2]
+    assert orm.find("Shot", [], ["project"]) == [
+        {"type": "Shot", "id": 2, "project": None},
+        {"type": "Shot", "id": 3, "project": {"type": "Project", "id": 2}},
+    ]
+    assert orm.find("Asset", [], ["shots"]) == [{"type": "Asset", "id": 1, "shots": [{"type": "Shot", "id": 2}]}]
@@ -0,0 +1,78 @@
+"""Tests for the on-disk schema cache used by live-connection modes."""
+
+import time
+
+from shotgrid_orm import SchemaCache, schema_fingerprint
+
+
+def field_reads(sg):
+    return [call for call in sg.calls if call[0] == "schema_field_read"]
+
+
+def test_schema_fingerprint_is_order_independent(example_schema):
+    """Fingerprints depend on content only, not on dict ordering."""
+    reordered = dict(reversed(list(example_schema.items())))
+    assert schema_fingerprint(reordered) == schema_fingerprint(example_schema)
+
+    changed = dict(example_schema, Extra={"fields": {}})
+    assert schema_fingerprint(changed) != schema_fingerprint(example_schema)
+
+
+def test_cache_hit_skips_field_reads(fake_sg, make_sg_orm, tmp_path):
+    """A fresh cache entry is used without touching the site schema."""
+    cache = SchemaCache(cache_dir=str(tmp_path), ttl=3600)
+    first = make_sg_orm(schema_cache=cache)
+    assert field_reads(fake_sg)
+
+    fake_sg.calls.clear()
+    second = make_sg_orm(schema_cache=cache)
+    assert fake_sg.calls == []
+    assert second.sg_schema == first.sg_schema
+    assert second.schema_fingerprint == first.schema_fingerprint == schema_fingerprint(first.sg_schema)
+    assert second["Shot"] is not None
+
+
+def test_cache_directory_path_argument(fake_sg, make_sg_orm, tmp_path):
+    """schema_cache also accepts a plain directory path."""
+    make_sg_orm(schema_cache=str(tmp_path))
+    fake_sg.calls.clear()
+    make_sg_orm(schema_cache=str(tmp_path))
+    assert not field_reads(fake_sg)
+
+
+def test_expired_entry_revalidated_by_probe(fake_sg, make_sg_orm, tmp_path):
+    """After the TTL, an unchanged probe revalidates the entry instead of refetching."""
+    cache = SchemaCache(cache_dir=str(tmp_path), ttl=0)
+    make_sg_orm(schema_cache=cache)
+
+    fake_sg.calls.clear()
+    make_sg_orm(schema_cache=cache)
+    assert not field_reads(fake_sg)
+    assert cache.load(fake_sg.base_url)["validated_at"] <= time.time()
+
+
+def test_probe_change_triggers_refetch(fake_sg, make_sg_orm, tmp_path):
+    """A new schema event moves the probe and the schema is downloaded again."""
+    cache = SchemaCache(cache_dir=str(tmp_path), ttl=0)
+    make_sg_orm(schema_cache=cache)
+
+    fake_sg.add("EventLogEntry", id=10, event_type="Shotgun_DisplayColumn_New")
+    fake_sg.calls.clear()
+    make_sg_orm(schema_cache=cache)
+    assert field_reads(fake_sg)
+
+
+def test_invalidate_forces_refetch(fake_sg, make_sg_orm, tmp_path):
+    """Explicit invalidation drops the entry for the site."""
+    cache = SchemaCache(cache_dir=str(tmp_path), ttl=3600)
+    make_sg_orm(schema_cache=cache)
+
+    cache.invalidate(fake_sg.base_url)
+    assert cache.load(fake_sg.base_url) is None
+
+    fake_sg.calls.clear()
+    make_sg_orm(schema_cache=cache)
+    assert field_reads(fake_sg)
+
+    cache.clear()
+    assert cache.load(fake_sg.base_url) is None
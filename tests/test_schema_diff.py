@@ -0,0 +1,81 @@
+"""Tests for the schema diff and the migrations derived from it."""
+
+import copy
+
+import sqlalchemy as sa
+
+from shotgrid_orm import SchemaType, diff_schemas
+
+
+def changed_schema(example_schema):
+    """example_schema with a new Shot field, a dropped Asset field, a now polymorphic field and a new entity."""
+    schema = copy.deepcopy(example_schema)
+    field = copy.deepcopy(schema["Shot"]["fields"]["code"])
+    field["name"]["value"] = "sg_cut_in"
+    field["data_type"]["value"] = "number"
+    schema["Shot"]["fields"]["sg_cut_in"] = field
+    del schema["Asset"]["fields"]["description"]
+    schema["Shot"]["fields"]["sg_sequence"]["properties"]["valid_types"]["value"] = ["Sequence", "Scene"]
+    schema["Scene"] = {"fields": {name: copy.deepcopy(schema["Shot"]["fields"][name]) for name in ("id", "code")}}
+    return schema
+
+
+def test_diff_schemas(example_schema):
+    new_schema = changed_schema(example_schema)
+    assert not diff_schemas(example_schema, copy.deepcopy(example_schema))
+
+    diff = diff_schemas(example_schema, new_schema)
+    assert diff.added_entities == ["Scene"]
+    assert diff.removed_entities == []
+    assert diff.changed_entities == {
+        "Asset": {"added": [], "removed": ["description"], "changed": []},
+        "Shot": {"added": ["sg_cut_in"], "removed": [], "changed": ["sg_sequence"]},
+    }
+    # the reverse diff, and ignored entities/fields
+    assert diff_schemas(new_schema, example_schema).removed_entities == ["Scene"]
+    diff = diff_schemas(example_schema, new_schema, ignored_tables=["Scene"], ignored_fields=["description"])
+    assert not diff.added_entities and list(diff.changed_entities) == ["Shot"]
+
+
+def test_migration_ops_touch_only_changed_entities(example_schema, make_sg_orm):
+    """Ops are derived from the changed entities only; untouched ones are never built."""
+    orm = make_sg_orm(changed_schema(example_schema), SchemaType.JSON_TEXT, lazy=True, index_policy=True)
+    migration = orm.migration_from(example_schema)
+
+    code = migration.python()
+    assert "op.create_table('Scene'" in code
+    assert "op.add_column('Shot', sa.Column('sg_cut_in', sa.Integer()" in code
+    assert "op.add_column('Shot', sa.Column('sg_sequence_type', sa.String()" in code
+    assert "op.drop_column('Asset', 'description')" in code
+    assert "op.drop_index('ix_Shot_sg_sequence_id', table_name='Shot')" in code
+    assert "Project" not in code and "Sequence'" not in code
+    assert "op.drop_table('Scene')" in migration.python(downgrade=True)
+
+    # changed entities plus their FK targets
+    assert set(orm.classes.materialized) == {"Scene", "Asset", "Shot", "Project"}
+    assert set(migration.old_orm.classes.materialized) == {"Asset", "Shot", "Project", "Sequence"}
+
+    sql = migration.sql("postgresql")
+    assert 'ALTER TABLE "Shot" ADD COLUMN sg_cut_in INTEGER;' in sql
+    assert 'ALTER TABLE "Asset" DROP COLUMN description;' in sql
+
+
+def test_migration_applies_to_database(example_schema, make_sg_orm, sqlite_engine):
+    """Applying the upgrade to a database built from the old model yields the new model's columns."""
+    make_sg_orm(example_schema, SchemaType.JSON_TEXT, link_tables=True).Base.metadata.create_all(sqlite_engine)
+    new_schema = changed_schema(example_schema)
+    new_schema["Asset"]["fields"]["shots"]["properties"]["valid_types"]["value"] = ["Shot", "Scene"]
+    new_orm = make_sg_orm(new_schema, SchemaType.JSON_TEXT, link_tables=True)
+    migration = new_orm.migration_from(example_schema)
+
+    with sqlite_engine.begin() as connection:
+        migration.apply(connection)
+    inspector = sa.inspect(sqlite_engine)
+    for name, table in new_orm.Base.metadata.tables.items():
+        assert [c["name"] for c in inspector.get_columns(name)] == [c.name for c in table.columns], name
+
+    with sqlite_engine.begin() as connection:
+        migration.apply(connection, downgrade=True)
+    inspector = sa.inspect(sqlite_engine)
+    assert "Scene" not in inspector.get_table_names()
+    assert "sg_cut_in" not in [c["name"] for c in inspector.get_columns("Shot")]
@@ -0,0 +1,83 @@
+"""Tests for reading the schema from a live (fake) Shotgrid connection."""
+
+import xmlrpc.client
+
+import pytest
+
+from shotgrid_orm import SGORM, SchemaType, call_with_retry
+
+SG_SCRIPT_SOURCE = {"url": "https://fake.shotgunstudio.com", "script": "orm", "api_key": "key"}
+
+
+def test_read_schema_from_connection(fake_sg, example_schema):
+    """A caller-supplied connection is read serially and matches the JSON schema."""
+    orm = SGORM(sg_schema_type=SchemaType.SG_CONNECTION, sg_schema_source=fake_sg, echo=False)
+
+    assert list(orm.sg_schema) == sorted(example_schema)
+    for entity_name, entity in example_schema.items():
+        assert orm.sg_schema[entity_name]["fields"] == entity["fields"]
+    assert orm["Shot"] is not None
+
+
+def test_read_schema_parallel_matches_serial(fake_sg_api, fake_sg):
+    """Parallel field reads open one connection per worker and merge deterministically."""
+    serial = SGORM(sg_schema_type=SchemaType.SG_CONNECTION, sg_schema_source=fake_sg, echo=False)
+    parallel = SGORM(
+        sg_schema_type=SchemaType.SG_SCRIPT, sg_schema_source=SG_SCRIPT_SOURCE, schema_workers=3, echo=False
+    )
+
+    assert parallel.sg_schema == serial.sg_schema
+    assert list(parallel.sg_schema) == list(serial.sg_schema)
+
+    # main connection + at least one worker connection, none shared across workers
+    assert len(fake_sg_api) > 1
+    field_reads = [call for sg in fake_sg_api for call in sg.calls if call[0] == "schema_field_read"]
+    assert sorted(call[1] for call in field_reads) == sorted(serial.sg_schema)
+    assert not any(call[0] == "schema_field_read" for call in fake_sg_api[0].calls)
+
+
+def test_read_schema_single_worker_is_serial(fake_sg_api):
+    """schema_workers=1 reuses the main connection."""
+    SGORM(sg_schema_type=SchemaType.SG_SCRIPT, sg_schema_source=SG_SCRIPT_SOURCE, schema_workers=1, echo=False)
+    assert len(fake_sg_api) == 1
+
+
+def test_read_schema_retries_transient_errors(fake_sg):
+    """Transient network errors are retried instead of aborting the schema read."""
+    failures = {"Shot": 2}
+    schema_field_read = fake_sg.schema_field_read
+
+    def flaky_schema_field_read(entity_type, field_name=None):
+        if failures.get(entity_type):
+            failures[entity_type] -= 1
+            raise ConnectionResetError("connection reset by peer")
+        return schema_field_read(entity_type, field_name)
+
+    fake_sg.schema_field_read = flaky_schema_field_read
+    orm = SGORM(sg_schema_type=SchemaType.SG_CONNECTION, sg_schema_source=fake_sg, backoff=0, echo=False)
+
+    assert failures["Shot"] == 0
+    assert "Shot" in orm.sg_schema
+
+
+def test_only_transient_http_statuses_are_retried():
+    """503s are retried; 401/403/404 (bad credentials, blocked API access) fail at once."""
+    calls = []
+
+    def fail_with(*statuses):
+        def call():
+            calls.append(1)
+            if len(calls) <= len(statuses):
+                raise xmlrpc.client.ProtocolError("https://fake.shotgunstudio.com", statuses[len(calls) - 1], "", {})
+            return "ok"
+
+        return call
+
+    assert call_with_retry(fail_with(503, 429), backoff=0) == "ok"
+    assert len(calls) == 3
+
+    for status in (401, 403, 404):
+        calls.clear()
+        with pytest.raises(xmlrpc.client.ProtocolError):
+            call_with_retry(fail_with(status), backoff=0)
+        assert len(calls) == 1
@@ -0,0 +1,71 @@
+"""Tests for id-range sharded loading across processes."""
+
+import copy
+import functools
+
+import pytest
+from sqlalchemy import func, select
+
+from shotgrid_orm import load_shard, shard_spec
+
+
+@pytest.fixture
+def shard_orm(fake_sg, mirror):
+    fake_sg.add_shots(1000)
+    return mirror()
+
+
+def count(engine, table):
+    with engine.connect() as connection:
+        return connection.execute(select(func.count()).select_from(table)).scalar()
+
+
+def test_load_shard_loads_only_its_range(shard_orm, fake_sg):
+    """A shard upserts exactly the ids of its range, and re-running it is harmless."""
+    table = shard_orm.entity_table("Shot")
+    shard = {
+        "connect": functools.partial(copy.deepcopy, fake_sg),
+        "url": str(shard_orm.engine.url),
+        "spec": shard_spec(table),
+        "links": {},
+        "encoder": None,
+        "t_def": shard_orm.sg_schema["Shot"],
+        "entity_type": "Shot",
+        "filters": [],
+        "page_size": 100,
+        "batch_size": 250,
+        "retries": 0,
+        "backoff": 0,
+        "first_id": 201,
+        "last_id": 450,
+    }
+    assert load_shard(shard)["written"] == 250
+    assert load_shard(shard)["written"] == 250
+
+    with shard_orm.engine.connect() as connection:
+        ids = connection.execute(select(table.c.id).order_by(table.c.id)).scalars().all()
+    assert ids == list(range(201, 451))
+
+
+def test_load_sharded(shard_orm, fake_sg):
+    """The id space is split across worker processes and every row lands once."""
+    # worker processes get a pickled copy of the fake site as their "connection"
+    connect = functools.partial(copy.deepcopy, fake_sg)
+    stats = shard_orm.load_sharded("Shot", processes=2, shards=4, connect=connect, page_size=100)
+
+    assert stats == {"entity": "Shot", "fetched": 1000, "written": 1000, "shards": 4}
+    assert count(shard_orm.engine, shard_orm.entity_table("Shot")) == 1000
+
+
+def test_load_sharded_requires_credentials(shard_orm):
+    """A caller-supplied connection can't be reopened in another process."""
+    with pytest.raises(ValueError, match="credentials"):
+        shard_orm.load_sharded("Shot")
+
+
+def test_load_sharded_rejects_memory_database(fake_sg, make_sg_orm):
+    """Worker processes can't see an in-memory database."""
+    fake_sg.add_shots(10)
+    orm = make_sg_orm()
+    with pytest.raises(ValueError, match="in-memory"):
+        orm.load_sharded("Shot", connect=functools.partial(copy.deepcopy, fake_sg))
@@ -0,0 +1,144 @@
+"""Tests for incremental sync driven by updated_at watermarks."""
+
+import copy
+import warnings
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from conftest import FakeShotgun
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from shotgrid_orm import read_watermarks, reset_watermark
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def sync_sg(example_schema):
+    """FakeShotgun whose Shot entity has an updated_at field, with 10 shots."""
+    schema = copy.deepcopy(example_schema)
+    updated_at = copy.deepcopy(schema["Shot"]["fields"]["code"])
+    updated_at["data_type"]["value"] = "date_time"
+    updated_at["name"]["value"] = "updated_at"
+    schema["Shot"]["fields"]["updated_at"] = updated_at
+
+    sg = FakeShotgun(schema)
+    for shot_id in range(1, 11):
+        # pairs of shots share a timestamp to exercise the (updated_at, id) tie-break
+        sg.add("Shot", id=shot_id, code=f"SHOT_{shot_id:03d}", updated_at=T0 + timedelta(minutes=shot_id // 2))
+    return sg
+
+
+@pytest.fixture
+def orm_engine(sync_sg, mirror):
+    orm = mirror(source=sync_sg)
+    return orm, orm.engine
+
+
+def shot_codes(orm, engine):
+    Shot = orm["Shot"]
+    with Session(engine) as session:
+        return dict(session.execute(select(Shot.id, Shot.code)).all())
+
+
+def test_initial_sync_loads_everything(orm_engine):
+    """The first sync has no watermark and pulls every record."""
+    orm, engine = orm_engine
+    stats = orm.sync_entity("Shot", page_size=3)
+
+    assert stats["fetched"] == stats["written"] == 10
+    assert stats["last_id"] == 10
+    assert len(shot_codes(orm, engine)) == 10
+
+    watermark = read_watermarks(engine)["Shot"]
+    assert watermark["last_id"] == 10
+    assert watermark["updated_at"] == (T0 + timedelta(minutes=5)).replace(tzinfo=None)
+
+
+def test_second_sync_pulls_only_changes(orm_engine, sync_sg):
+    """Only records updated after the watermark are fetched and upserted."""
+    orm, engine = orm_engine
+    orm.sync_entity("Shot")
+
+    assert orm.sync_entity("Shot")["fetched"] == 0
+
+    later = T0 + timedelta(hours=1)
+    sync_sg.records["Shot"][3].update(code="SHOT_003_v2", updated_at=later)
+    sync_sg.add("Shot", id=11, code="SHOT_011", updated_at=later)
+    stats = orm.sync_entity("Shot")
+
+    assert stats["fetched"] == stats["written"] == 2
+    codes = shot_codes(orm, engine)
+    assert codes[3] == "SHOT_003_v2"
+    assert codes[11] == "SHOT_011"
+    assert len(codes) == 11
+
+
+def test_sync_resumes_after_crash(orm_engine, sync_sg):
+    """A sync that dies mid-way resumes after the last committed batch."""
+    orm, engine = orm_engine
+    find = sync_sg.find
+    pages = {"count": 0}
+
+    def failing_find(*args, **kwargs):
+        pages["count"] += 1
+        if pages["count"] == 3:
+            raise RuntimeError("worker killed")
+        return find(*args, **kwargs)
+
+    sync_sg.find = failing_find
+    with pytest.raises(RuntimeError):
+        orm.sync_entity("Shot", page_size=2, batch_size=2)
+    assert len(shot_codes(orm, engine)) == 4
+
+    sync_sg.find = find
+    sync_sg.calls.clear()
+    stats = orm.sync_entity("Shot", page_size=2, batch_size=2)
+    assert stats["fetched"] == 6
+    assert len(shot_codes(orm, engine)) == 10
+
+
+def test_sync_many_entities_and_reset(orm_engine, sync_sg):
+    """sync() reports per entity; entities without updated_at sync new ids only."""
+    orm, engine = orm_engine
+    sync_sg.add("Project", id=1, code="DEMO", name="Demo")
+
+    report = orm.sync(["Project", "Shot"])
+    assert report["Project"]["written"] == 1
+    assert report["Shot"]["written"] == 10
+
+    reset_watermark(engine, "Shot")
+    assert "Shot" not in read_watermarks(engine)
+    assert orm.sync_entity("Shot")["written"] == 10
+    Shot = orm["Shot"]
+    with Session(engine) as session:
+        assert session.scalar(select(func.count()).select_from(Shot)) == 10
+
+
+def test_sync_follows_foreign_keys(sync_sg, fk_engine, mirror):
+    """sync() writes the rows FKs point at first, so databases enforcing FKs accept every batch."""
+    sync_sg.add("Project", id=1, code="DEMO")
+    sync_sg.add("Sequence", id=10, code="SEQ010", project={"type": "Project", "id": 1})
+    for shot in sync_sg.records["Shot"].values():
+        shot.update(project={"type": "Project", "id": 1}, sg_sequence={"type": "Sequence", "id": 10})
+    orm = mirror(source=sync_sg, engine=fk_engine)
+
+    report = orm.sync(["Shot", "Sequence", "Project"])
+    assert list(report) == ["Project", "Sequence", "Shot"]
+    assert report["Shot"]["written"] == 10
+
+
+def test_dependency_order_with_cycles(example_schema, make_sg_orm):
+    """FK cycles are broken silently instead of failing the sort."""
+    schema = copy.deepcopy(example_schema)
+    hero_shot = copy.deepcopy(schema["Shot"]["fields"]["project"])
+    hero_shot["properties"]["valid_types"]["value"] = ["Shot"]
+    schema["Project"]["fields"]["hero_shot"] = hero_shot
+    orm = make_sg_orm(FakeShotgun(schema))
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        order = orm.dependency_order()
+    assert sorted(order) == sorted(schema)
+    assert order.index("Sequence") < order.index("Shot")
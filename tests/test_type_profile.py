@@ -0,0 +1,85 @@
+"""Tests for the typed column profile."""
+
+import copy
+from datetime import date
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+
+TYPED_FIELDS = {
+    "due_date": "date",
+    "sg_data": "serializable",
+    "sg_link": "url",
+    "sg_cut_in_tc": "timecode",
+    "tags": "tag_list",
+}
+
+
+@pytest.fixture
+def typed_sg(fake_sg, example_schema):
+    schema = copy.deepcopy(example_schema)
+    for name, data_type in TYPED_FIELDS.items():
+        field = copy.deepcopy(schema["Shot"]["fields"]["code"])
+        field["data_type"]["value"] = data_type
+        field["name"]["value"] = name
+        schema["Shot"]["fields"][name] = field
+    fake_sg.sg_schema = schema
+    fake_sg.add(
+        "Shot",
+        id=1,
+        code="010",
+        due_date="2026-03-14",
+        sg_data={"frames": [1001, 1100]},
+        sg_link={"link_type": "web", "url": "https://example.com", "name": "ref"},
+        sg_cut_in_tc=3_600_000_000,
+        tags=[{"type": "Tag", "id": 3, "name": "hero"}],
+    )
+    fake_sg.add("Asset", id=1, code="HERO", shots=[{"type": "Shot", "id": 1}])
+    return fake_sg
+
+
+def test_default_profile_unchanged(typed_sg, make_sg_orm):
+    """Without a profile, dates and payloads stay strings."""
+    shot = make_sg_orm().entity_table("Shot")
+    for name in ("due_date", "sg_data", "sg_link"):
+        assert isinstance(shot.c[name].type, sa.String)
+    assert isinstance(shot.c.sg_cut_in_tc.type, sa.Integer)
+
+
+def test_typed_profile_columns(typed_sg, make_sg_orm):
+    """The typed profile uses Date, JSON (JSONB on PostgreSQL) and BigInteger."""
+    orm = make_sg_orm(type_profile="typed")
+    shot = orm.entity_table("Shot")
+    assert isinstance(shot.c.due_date.type, sa.Date)
+    assert isinstance(shot.c.sg_cut_in_tc.type, sa.BigInteger)
+    for name in ("sg_data", "sg_link", "tags"):
+        assert isinstance(shot.c[name].type, sa.JSON)
+    assert isinstance(orm.entity_table("Asset").c.shots_ids.type, sa.JSON)
+
+    ddl = str(CreateTable(shot).compile(dialect=postgresql.dialect()))
+    assert "sg_data JSONB" in ddl
+    assert "due_date DATE" in ddl
+
+
+def test_typed_profile_load(typed_sg, mirror):
+    """The loader converts SG date strings and stores payloads as JSON."""
+    orm = mirror(["Shot", "Asset"], type_profile="typed")
+
+    Shot = orm["Shot"]
+    with orm.create_sg_orm() as session:
+        shot = session.get(Shot, 1)
+        assert shot.due_date == date(2026, 3, 14)
+        assert shot.sg_data == {"frames": [1001, 1100]}
+        assert shot.sg_link["url"] == "https://example.com"
+        assert shot.sg_cut_in_tc == 3_600_000_000
+        assert shot.tags[0]["name"] == "hero"
+        assert session.scalars(select(Shot.id).where(Shot.due_date >= date(2026, 3, 1))).all() == [1]
+        assert session.get(orm["Asset"], 1).shots_ids == [1]
+
+
+def test_unknown_profile(typed_sg, make_sg_orm):
+    with pytest.raises(ValueError):
+        make_sg_orm(type_profile="nope")
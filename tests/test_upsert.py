@@ -0,0 +1,98 @@
+"""Tests for dialect-aware batched upserts."""
+
+from datetime import datetime
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.dialects import mysql, postgresql
+from sqlalchemy.orm import Session
+
+from shotgrid_orm import create_control_tables, replace_rows, row_fetch, upsert_statement
+
+
+def shots(sg_orm, engine):
+    Shot = sg_orm["Shot"]
+    with Session(engine) as session:
+        return {shot.id: (shot.code, shot.description) for shot in session.scalars(select(Shot))}
+
+
+def test_upsert_inserts_and_updates(sg_orm, test_db_path):
+    """New ids are inserted and existing ids updated, across several batches."""
+    engine = create_engine(f"sqlite+pysqlite:///{test_db_path}", echo=False)
+    sg_orm.Base.metadata.create_all(engine)
+
+    rows = [{"id": i, "code": f"SHOT_{i}", "description": "v1"} for i in range(1, 6)]
+    assert sg_orm.upsert("Shot", rows, engine=engine, batch_size=2) == 5
+
+    rows = [{"id": i, "code": f"SHOT_{i}", "description": "v2"} for i in range(4, 9)]
+    sg_orm.upsert("Shot", rows, engine=engine, batch_size=2)
+
+    result = shots(sg_orm, engine)
+    assert len(result) == 8
+    assert result[1] == ("SHOT_1", "v1")
+    assert result[4] == ("SHOT_4", "v2")
+    assert result[8] == ("SHOT_8", "v2")
+
+
+def test_upsert_partial_rows_keep_other_columns(sg_orm, test_db_path):
+    """Only the columns present in a row are updated."""
+    engine = create_engine(f"sqlite+pysqlite:///{test_db_path}", echo=False)
+    sg_orm.Base.metadata.create_all(engine)
+
+    sg_orm.upsert("Shot", [{"id": 1, "code": "SHOT_1", "description": "keep me"}], engine=engine)
+    sg_orm.upsert("Shot", [{"id": 1, "code": "SHOT_1_v2"}, {"id": 2, "code": "SHOT_2"}], engine=engine)
+
+    result = shots(sg_orm, engine)
+    assert result[1] == ("SHOT_1_v2", "keep me")
+    assert result[2] == ("SHOT_2", None)
+
+
+def test_upsert_instances(sg_orm, test_db_path):
+    """Instances of the generated classes can be upserted directly."""
+    engine = create_engine(f"sqlite+pysqlite:///{test_db_path}", echo=False)
+    sg_orm.Base.metadata.create_all(engine)
+    Shot = sg_orm["Shot"]
+
+    sg_orm.upsert("Shot", [Shot(id=1, code="A"), Shot(id=2, code="B")], engine=engine)
+    sg_orm.upsert("Shot", [Shot(id=2, code="B2")], engine=engine)
+    assert shots(sg_orm, engine) == {1: ("A", None), 2: ("B2", None)}
+
+
+def test_upsert_statements_per_dialect(sg_orm):
+    """PostgreSQL gets ON CONFLICT, MySQL ON DUPLICATE KEY, others the fallback."""
+    table = sg_orm.entity_table("Shot")
+
+    pg = str(upsert_statement(table, ["id", "code"], "postgresql").compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (id) DO UPDATE SET code = excluded.code" in pg
+
+    my = str(upsert_statement(table, ["id", "code"], "mysql").compile(dialect=mysql.dialect()))
+    assert "ON DUPLICATE KEY UPDATE" in my
+
+    assert "DO NOTHING" in str(upsert_statement(table, ["id"], "postgresql").compile(dialect=postgresql.dialect()))
+    assert upsert_statement(table, ["id", "code"], "mssql") is None
+
+
+def test_replace_rows_fallback(sg_orm, fk_engine):
+    """The generic fallback updates existing ids in place and inserts the others."""
+    sg_orm.Base.metadata.create_all(fk_engine)
+    table = sg_orm.entity_table("Shot")
+
+    with fk_engine.begin() as connection:
+        replace_rows(connection, table, [{"id": 1, "code": "A", "description": "first"}])
+        replace_rows(connection, table, [{"id": 1, "code": "B"}, {"id": 2, "code": "C"}])
+    # partial rows leave the other columns alone
+    assert shots(sg_orm, fk_engine) == {1: ("B", "first"), 2: ("C", None)}
+
+    # rows other tables point at are updated, not deleted and re-inserted
+    with fk_engine.begin() as connection:
+        replace_rows(connection, sg_orm.entity_table("Project"), [{"id": 1, "code": "DEMO"}])
+        replace_rows(connection, table, [{"id": 1, "project_id": 1}])
+        replace_rows(connection, sg_orm.entity_table("Project"), [{"id": 1, "code": "RENAMED"}])
+        assert connection.execute(select(table.c.project_id).where(table.c.id == 1)).scalar() == 1
+
+    # composite keys, as on the control tables
+    create_control_tables(fk_engine)
+    with fk_engine.begin() as connection:
+        stamp = {"entity_type": "Shot", "id": 1, "fetched_at": datetime(2026, 1, 1)}
+        replace_rows(connection, row_fetch, [stamp, dict(stamp, entity_type="Asset")])
+        replace_rows(connection, row_fetch, [dict(stamp, entity_type="Asset", id=2), stamp])
+        assert connection.execute(select(func.count()).select_from(row_fetch)).scalar() == 3
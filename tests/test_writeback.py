@@ -0,0 +1,205 @@
+"""Tests for pushing session changes back to SG with sg.batch."""
+
+import copy
+
+from sqlalchemy.orm import Session
+
+from shotgrid_orm import WriteBack, editable_fields
+
+MIRRORED = ["Project", "Shot", "Asset"]
+
+
+def populate(sg):
+    sg.add("Project", id=1, code="DEMO", name="Demo")
+    sg.add("Project", id=2, code="OTHER", name="Other")
+    for shot_id in (1, 2, 3):
+        sg.add("Shot", id=shot_id, code=f"SHOT_{shot_id}", project={"type": "Project", "id": 1})
+    sg.add(
+        "Asset",
+        id=1,
+        code="HERO",
+        shots=[{"type": "Shot", "id": 1}],
+        entity_source={"type": "Shot", "id": 2},
+        task_assignees=[{"type": "HumanUser", "id": 5}],
+    )
+
+
+def test_editable_fields(example_schema):
+    assert editable_fields(example_schema["Shot"]) == ["code", "description", "project", "sg_sequence"]
+    t_def = {"fields": {"id": {}, "code": {"editable": {"value": True}}, "created_at": {"editable": {"value": False}}}}
+    assert editable_fields(t_def) == ["code"]
+
+
+def test_push_batches_changes(fake_sg, mirror):
+    """Updates, creates and deletes become batch requests with SG-shaped values."""
+    populate(fake_sg)
+    orm = mirror(MIRRORED)
+    Shot, Asset = orm["Shot"], orm["Asset"]
+    fake_sg.calls.clear()
+
+    with Session(orm.engine) as session:
+        writer = orm.write_back(session, sg=fake_sg, batch_size=2)
+        shot = session.get(Shot, 1)
+        shot.code = "RENAMED"
+        session.get(Shot, 2).project_id = 2
+        asset = session.get(Asset, 1)
+        asset.shots_ids = "1,3"
+        asset.entity_source_type, asset.entity_source_id = "Project", 1
+        new_shot = Shot(id=-1, code="NEW", project_id=1)
+        session.add(new_shot)
+        session.delete(session.get(Shot, 3))
+
+        # changes survive the autoflush of the session.get calls above
+        requests = sorted(
+            (request for _, request in writer.requests()),
+            key=lambda r: (r["request_type"], r["entity_type"], r.get("entity_id", 0)),
+        )
+        assert requests == [
+            {
+                "request_type": "create",
+                "entity_type": "Shot",
+                "data": {"code": "NEW", "project": {"type": "Project", "id": 1}},
+            },
+            {"request_type": "delete", "entity_type": "Shot", "entity_id": 3},
+            {
+                "request_type": "update",
+                "entity_type": "Asset",
+                "entity_id": 1,
+                "data": {
+                    "shots": [{"type": "Shot", "id": 1}, {"type": "Shot", "id": 3}],
+                    "entity_source": {"type": "Project", "id": 1},
+                },
+            },
+            {"request_type": "update", "entity_type": "Shot", "entity_id": 1, "data": {"code": "RENAMED"}},
+            {
+                "request_type": "update",
+                "entity_type": "Shot",
+                "entity_id": 2,
+                "data": {"project": {"type": "Project", "id": 2}},
+            },
+        ]
+
+        stats = writer.push()
+        assert stats == {"created": 1, "updated": 3, "deleted": 1, "batches": 3, "errors": []}
+        assert [call for call in fake_sg.calls if call[0] == "batch"] == [
+            ("batch", ["create", "update"]),
+            ("batch", ["update", "update"]),
+            ("batch", ["delete"]),
+        ]
+        assert writer.pending == {}
+        # the new shot takes the id SG assigned
+        assert new_shot.id == 4
+        session.commit()
+
+    assert fake_sg.records["Shot"][1]["code"] == "RENAMED"
+    assert fake_sg.records["Shot"][2]["project"] == {"type": "Project", "id": 2}
+    assert fake_sg.records["Shot"][4]["code"] == "NEW"
+    assert 3 in fake_sg.retired["Shot"]
+    assert orm.find("Shot", [["id", "is", 4]], ["code"]) == [{"type": "Shot", "id": 4, "code": "NEW"}]
+
+
+def test_failed_batch_falls_back_per_request(fake_sg, mirror):
+    """A rejected request is reported with its instance; the rest of its batch still lands."""
+    populate(fake_sg)
+    orm = mirror(MIRRORED)
+    Shot = orm["Shot"]
+    fake_sg.retire("Shot", 2)  # gone in SG, still mirrored
+
+    with Session(orm.engine) as session:
+        writer = orm.write_back(session, sg=fake_sg)
+        session.get(Shot, 1).code = "ONE"
+        stale = session.get(Shot, 2)
+        stale.code = "TWO"
+        session.get(Shot, 3).code = "THREE"
+        stats = writer.push()
+        # rejected changes stay pending
+        assert list(writer.pending) == [stale]
+
+    assert stats["updated"] == 2
+    assert stats["batches"] == 3
+    assert [(error["instance"], error["request"]["entity_id"]) for error in stats["errors"]] == [(stale, 2)]
+    assert "does not exist" in str(stats["errors"][0]["error"])
+    assert [fake_sg.records["Shot"][i]["code"] for i in (1, 3)] == ["ONE", "THREE"]
+
+
+def test_transport_errors_never_resend_creates(fake_sg, mirror, monkeypatch):
+    """A batch with creates lost after SG committed it is not retried or replayed; updates are retried."""
+    populate(fake_sg)
+    orm = mirror(MIRRORED)
+    Shot = orm["Shot"]
+    batch = fake_sg.batch
+    failures = []
+
+    def flaky_batch(requests):
+        if failures:
+            commit = failures.pop(0)
+            if commit:
+                batch(requests)
+            raise TimeoutError("read timed out")
+        return batch(requests)
+
+    monkeypatch.setattr(fake_sg, "batch", flaky_batch)
+
+    with Session(orm.engine) as session:
+        writer = WriteBack(orm, fake_sg, session, backoff=0)
+        new_shot = Shot(id=-1, code="NEW", project_id=1)
+        session.add(new_shot)
+        session.get(Shot, 1).code = "ONE"
+        failures.append(True)  # committed, then the response is lost
+        stats = writer.push()
+
+        assert [call for call in fake_sg.calls if call[0] == "batch"] == [("batch", ["create", "update"])]
+        assert [error["instance"] for error in stats["errors"]] == [new_shot, session.get(Shot, 1)]
+        assert isinstance(stats["errors"][0]["error"], TimeoutError)
+        assert len(writer.pending) == 2
+        assert [r["code"] for r in fake_sg.records["Shot"].values()].count("NEW") == 1
+
+        writer.pending.clear()
+        fake_sg.calls.clear()
+        session.get(Shot, 2).code = "TWO"
+        failures.append(False)  # dropped before reaching SG
+        stats = writer.push()
+
+    assert stats["updated"] == 1 and stats["errors"] == []
+    assert [call for call in fake_sg.calls if call[0] == "batch"] == [("batch", ["update"])]
+    assert fake_sg.records["Shot"][2]["code"] == "TWO"
+
+
+def test_push_decodes_lists_and_link_tables(fake_sg, example_schema, mirror):
+    """Encoded list codes go back as values and link-table fields are read back for new records."""
+    schema = copy.deepcopy(example_schema)
+    field = copy.deepcopy(schema["Shot"]["fields"]["code"])
+    field["data_type"]["value"] = "status_list"
+    field["name"]["value"] = "sg_status_list"
+    field["properties"]["valid_values"] = {"value": ["wtg", "ip", "fin"]}
+    schema["Shot"]["fields"]["sg_status_list"] = field
+    fake_sg.sg_schema = schema
+    populate(fake_sg)
+    fake_sg.records["Shot"][1]["sg_status_list"] = "wtg"
+    orm = mirror(MIRRORED, encode_lists=True, link_tables=True)
+    Shot = orm["Shot"]
+    codes = orm.list_codes("Shot", "sg_status_list")
+
+    with Session(orm.engine) as session:
+        writer = orm.write_back(session, sg=fake_sg)
+        session.get(Shot, 1).sg_status_list = codes["fin"]
+        asset = session.get(orm["Asset"], 1)
+        asset.code = "HERO_V2"
+        stats = writer.push()
+    assert stats["updated"] == 2
+    assert fake_sg.records["Shot"][1]["sg_status_list"] == "fin"
+    # link-table fields can't be change-tracked on the instance, only explicit columns are sent
+    assert fake_sg.records["Asset"][1]["code"] == "HERO_V2"
+    assert fake_sg.records["Asset"][1]["shots"] == [{"type": "Shot", "id": 1}]
+
+    link = orm.entity_link_tables("Asset")["shots"]
+    with Session(orm.engine) as session:
+        writer = WriteBack(orm, fake_sg, session)
+        session.execute(link.insert().values(source_id=-1, target_id=2, target_type="Shot", ordinal=0))
+        session.add(orm["Asset"](id=-1, code="NEW"))
+        [(_, request)] = writer.requests()
+    assert request == {
+        "request_type": "create",
+        "entity_type": "Asset",
+        "data": {"code": "NEW", "shots": [{"type": "Shot", "id": 2}]},
+    }